@@ -0,0 +1,115 @@
+"""
+The API wired for benchmarking without Postgres: products are served from an
+in-process NumPy index built from the sample catalog, and jobs are queued in
+memory. Run it with `uvicorn benchmarks.app:app`.
+
+With BENCH_FAKE_EMBEDDINGS set, a hashing embedder replaces the sentence
+transformer, so the benchmark also runs where the model cannot be downloaded.
+"""
+
+import hashlib
+import logging
+import os
+import re
+from contextlib import asynccontextmanager
+import numpy as np
+from fastapi import FastAPI
+
+from script.data.products_description import PRODUCT_DESCRIPTIONS
+from src.api import routes
+from src.config import http
+from src.config.http import create_http_client, get_http_client
+from src.config.logger import setup_logging
+from src.config.secrets import secrets
+from src.containers import AppContainer
+from src.models.query import ProductDocument
+from src.repositories import CachingProductRepository, NumpyProductRepository
+
+setup_logging()
+
+logger = logging.getLogger(__name__)
+
+
+class HashingEmbedder:
+    """
+    Embeds texts by hashing their words into a fixed number of dimensions.
+    Texts sharing words are close, which is enough to exercise retrieval.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True, **kwargs):
+        embeddings = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                sign = 1.0 if value >> 63 else -1.0
+                embeddings[row, value % self.dimension] += sign
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return embeddings / norms
+
+
+async def build_repository(model) -> NumpyProductRepository:
+    """Indexes the sample catalog in an in-process repository."""
+    embeddings = model.encode(
+        PRODUCT_DESCRIPTIONS, batch_size=64, convert_to_numpy=True
+    )
+    repository = NumpyProductRepository()
+    await repository.index_documents(
+        [
+            ProductDocument(id=i, content=content, embeddings=embedding.tolist())
+            for i, (content, embedding) in enumerate(
+                zip(PRODUCT_DESCRIPTIONS, embeddings), start=1
+            )
+        ]
+    )
+    return repository
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    for name, backend in [
+        ("QUEUE_BACKEND", secrets.QUEUE_BACKEND),
+        ("TOKEN_STREAM_BACKEND", secrets.TOKEN_STREAM_BACKEND),
+        ("ANSWER_CACHE_BACKEND", secrets.ANSWER_CACHE_BACKEND),
+    ]:
+        if backend == "postgres":
+            raise RuntimeError(f"The benchmark app cannot run with {name}=postgres.")
+    if secrets.RETRIEVAL_MODE != "vector" or secrets.RETRIEVAL_BRANCHES != "vector":
+        raise RuntimeError("The benchmark app only supports vector retrieval.")
+
+    http.http_client = create_http_client()
+
+    container = AppContainer()
+    container.http_client.override(get_http_client())
+    if os.environ.get("BENCH_FAKE_EMBEDDINGS"):
+        logger.info("Using hashing embeddings instead of the sentence transformer.")
+        container.embedding_model.override(HashingEmbedder())
+
+    repository = await build_repository(container.embedding_model())
+    container.product_repo.override(
+        CachingProductRepository(
+            repository=repository,
+            cache=container.result_cache(),
+            timings=container.stage_timings(),
+        )
+    )
+    app.state.container = container
+    logger.info(f"Indexed {len(repository)} products for benchmarking.")
+
+    worker_pool = container.worker_pool()
+    worker_pool.start()
+
+    yield
+
+    await worker_pool.stop()
+    await container.callback_service().drain()
+    await http.http_client.aclose()
+    container.shutdown_resources()
+
+
+app = FastAPI(title="Product Query Bot (benchmark)", lifespan=lifespan)
+app.include_router(routes.router)
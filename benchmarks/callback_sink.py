@@ -0,0 +1,35 @@
+import asyncio
+import time
+from fastapi import FastAPI, Request
+
+
+class CallbackSink:
+    """
+    Receives the API's answer callbacks and records when each user's answer
+    arrived. Accepts both single payloads and `{"batch": [...]}` bodies.
+    """
+
+    def __init__(self):
+        self.app = FastAPI(title="Callback Sink")
+        self.received = 0
+        self._waiters: dict[str, asyncio.Future] = {}
+        self.app.add_api_route("/callback", self._receive, methods=["POST"])
+
+    def expect(self, user_id: str) -> asyncio.Future:
+        """Returns a future resolved with the arrival time of the user's answer."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[user_id] = future
+        return future
+
+    def forget(self, user_id: str):
+        self._waiters.pop(user_id, None)
+
+    async def _receive(self, request: Request):
+        arrived = time.perf_counter()
+        body = await request.json()
+        for payload in body.get("batch", [body]):
+            self.received += 1
+            future = self._waiters.pop(payload.get("user_id"), None)
+            if future is not None and not future.done():
+                future.set_result(arrived)
+        return {"status": "ok"}
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import json
+import time
+import uuid
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+
+def create_app(ttft_ms: float, tokens: int, token_interval_ms: float) -> FastAPI:
+    """
+    Creates an OpenAI-compatible chat completions server that answers every
+    request with `tokens` words, after `ttft_ms` for the first token and
+    `token_interval_ms` between the following ones. Supports streaming.
+    """
+    app = FastAPI(title="Fake OpenAI")
+    words = [f"word{i} " for i in range(tokens)]
+
+    def chunk(completion_id: str, model: str, delta: dict, finish_reason=None):
+        return (
+            "data: "
+            + json.dumps(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                    ],
+                }
+            )
+            + "\n\n"
+        )
+
+    @app.post("/v1/chat/completions")
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "fake")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        if body.get("stream"):
+
+            async def events():
+                await asyncio.sleep(ttft_ms / 1000)
+                yield chunk(completion_id, model, {"role": "assistant", "content": ""})
+                for i, word in enumerate(words):
+                    if i:
+                        await asyncio.sleep(token_interval_ms / 1000)
+                    yield chunk(completion_id, model, {"content": word})
+                yield chunk(completion_id, model, {}, finish_reason="stop")
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        await asyncio.sleep((ttft_ms + token_interval_ms * max(0, tokens - 1)) / 1000)
+        prompt_tokens = sum(
+            len(str(m.get("content", "")).split()) for m in body.get("messages", [])
+        )
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(words)},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": tokens,
+                "total_tokens": prompt_tokens + tokens,
+            },
+        }
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serves a fake OpenAI chat completions API with configurable latency."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument(
+        "--ttft-ms", type=float, default=200.0, help="Time to the first token."
+    )
+    parser.add_argument("--tokens", type=int, default=40, help="Tokens per answer.")
+    parser.add_argument("--token-interval-ms", type=float, default=10.0)
+    args = parser.parse_args()
+
+    app = create_app(args.ttft_ms, args.tokens, args.token_interval_ms)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
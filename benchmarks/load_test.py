@@ -0,0 +1,391 @@
+"""
+Drives `POST /query` at a fixed concurrency and measures the time until each
+answer reaches the callback.
+
+The harness starts a fake OpenAI server and the API as subprocesses, and
+serves the callback sink itself. Each client sends a query, waits for its
+callback, then sends the next one, so the offered load follows the
+concurrency. Run `python -m benchmarks.load_test --help` for the options.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+import httpx
+import numpy as np
+import uvicorn
+
+from benchmarks.callback_sink import CallbackSink
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "queries.jsonl"
+
+
+def read_corpus(path: str | Path, field: str) -> list[str]:
+    """
+    Reads the queries to replay from a JSONL file. A line is either a JSON
+    string or an object holding the query under `field`.
+    """
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            query = record if isinstance(record, str) else record.get(field)
+            if query:
+                queries.append(str(query))
+    if not queries:
+        raise ValueError(f"No queries found under '{field}' in {path}.")
+    return queries
+
+
+def percentiles(seconds: list[float]) -> dict:
+    """Returns the count and latency percentiles, in ms, of the samples."""
+    if not seconds:
+        return {"count": 0}
+    ms = np.asarray(seconds) * 1000
+    p50, p90, p95, p99 = np.percentile(ms, [50, 90, 95, 99])
+    return {
+        "count": len(ms),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(p50),
+        "p90_ms": float(p90),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(ms.max()),
+    }
+
+
+def start_process(args: list[str], env: dict) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, *args], cwd=REPO_ROOT, env=env)
+
+
+def stop_process(process: subprocess.Popen):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def wait_until_ready(
+    client: httpx.AsyncClient,
+    url: str,
+    timeout: float,
+    process: subprocess.Popen | None = None,
+):
+    """Polls `url` until it answers, failing early if the process exits."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(
+                f"Process serving {url} exited with {process.returncode}."
+            )
+        try:
+            response = await client.get(url)
+            if response.status_code < 500:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise TimeoutError(f"{url} was not ready after {timeout}s.")
+
+
+class LoadTest:
+    """Runs closed-loop clients against the API and collects their latencies."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        sink: CallbackSink,
+        queries: list[str],
+        requests: int,
+        concurrency: int,
+        answer_timeout: float,
+    ):
+        self._client = client
+        self._sink = sink
+        self._queries = queries
+        self._requests = requests
+        self._concurrency = concurrency
+        self._answer_timeout = answer_timeout
+        self._run_id = uuid.uuid4().hex[:8]
+
+        self.accept_latencies: list[float] = []
+        self.end_to_end: list[float] = []
+        self.rejected: Counter = Counter()
+        self.timeouts = 0
+        self.queue_depths: list[int] = []
+        self.in_flight: list[int] = []
+
+    async def run(self) -> float:
+        """Sends every request and returns the elapsed time."""
+        counter = itertools.count()
+        started = time.perf_counter()
+        monitor = asyncio.create_task(self._monitor())
+        try:
+            await asyncio.gather(
+                *(self._client_loop(counter) for _ in range(self._concurrency))
+            )
+        finally:
+            monitor.cancel()
+        return time.perf_counter() - started
+
+    async def _client_loop(self, counter):
+        while (i := next(counter)) < self._requests:
+            user_id = f"bench-{self._run_id}-{i}"
+            query = self._queries[i % len(self._queries)]
+            answered = self._sink.expect(user_id)
+            started = time.perf_counter()
+            try:
+                response = await self._client.post(
+                    "/query", json={"user_id": user_id, "query": query}
+                )
+            except httpx.HTTPError as e:
+                self._sink.forget(user_id)
+                self.rejected[type(e).__name__] += 1
+                continue
+            self.accept_latencies.append(time.perf_counter() - started)
+
+            if response.status_code != 202:
+                self._sink.forget(user_id)
+                self.rejected[str(response.status_code)] += 1
+                retry_after = float(response.headers.get("Retry-After", 1))
+                await asyncio.sleep(min(retry_after, 1.0))
+                continue
+
+            try:
+                arrived = await asyncio.wait_for(answered, self._answer_timeout)
+            except asyncio.TimeoutError:
+                self._sink.forget(user_id)
+                self.timeouts += 1
+                continue
+            self.end_to_end.append(arrived - started)
+
+    async def _monitor(self, interval: float = 0.5):
+        """Samples the queue depth while the test runs."""
+        while True:
+            try:
+                stats = (await self._client.get("/stats")).json()
+                self.queue_depths.append(stats["queue"]["depth"])
+                self.in_flight.append(stats["queue"].get("in_flight", 0))
+            except Exception:
+                pass
+            await asyncio.sleep(interval)
+
+    def report(self, duration: float, stats: dict) -> dict:
+        return {
+            "requests": self._requests,
+            "concurrency": self._concurrency,
+            "completed": len(self.end_to_end),
+            "rejected": dict(self.rejected),
+            "timeouts": self.timeouts,
+            "duration_s": duration,
+            "throughput_rps": len(self.end_to_end) / duration if duration else 0.0,
+            "accept_latency": percentiles(self.accept_latencies),
+            "end_to_end_latency": percentiles(self.end_to_end),
+            "queue_depth": {
+                "max": max(self.queue_depths, default=0),
+                "mean": float(np.mean(self.queue_depths)) if self.queue_depths else 0.0,
+            },
+            "max_in_flight": max(self.in_flight, default=0),
+            "stages": stats.get("stages", {}),
+            "callbacks": stats.get("callbacks"),
+        }
+
+
+def api_environment(args) -> dict:
+    env = dict(os.environ)
+    llm_url = f"http://{args.host}:{args.llm_port}/v1"
+    env.update(
+        {
+            "CALLBACK_URL": f"http://{args.host}:{args.sink_port}/callback",
+            "OPENAI_BASE_URL": llm_url,
+            "OPENAI_API_BASE": llm_url,
+            "LOG_LEVEL": args.log_level,
+        }
+    )
+    env.setdefault("OPENAI_API_KEY", "sk-bench")
+    env.setdefault("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+    if args.in_memory:
+        # Never used by the benchmark app, but required by the settings.
+        env.setdefault("DATABASE_URL", "postgresql://bench@localhost/bench")
+        env.update(
+            {
+                "QUEUE_BACKEND": "memory",
+                "TOKEN_STREAM_BACKEND": "memory",
+                "RETRIEVAL_MODE": "vector",
+                "RETRIEVAL_BRANCHES": "vector",
+                "RUN_WORKERS": "true",
+            }
+        )
+        if env.get("ANSWER_CACHE_BACKEND") == "postgres":
+            env["ANSWER_CACHE_BACKEND"] = "memory"
+    if args.fake_embeddings:
+        env["BENCH_FAKE_EMBEDDINGS"] = "1"
+    return env
+
+
+async def run(args) -> dict:
+    queries = read_corpus(args.corpus, args.field)
+    env = api_environment(args)
+    processes = [
+        start_process(
+            [
+                "-m",
+                "benchmarks.fake_openai",
+                "--host",
+                args.host,
+                "--port",
+                str(args.llm_port),
+                "--ttft-ms",
+                str(args.llm_ttft_ms),
+                "--tokens",
+                str(args.llm_tokens),
+                "--token-interval-ms",
+                str(args.llm_token_interval_ms),
+            ],
+            env,
+        )
+    ]
+
+    sink = CallbackSink()
+    sink_server = uvicorn.Server(
+        uvicorn.Config(
+            sink.app, host=args.host, port=args.sink_port, log_level="warning"
+        )
+    )
+    sink_task = asyncio.create_task(sink_server.serve())
+
+    api_url = args.target or f"http://{args.host}:{args.api_port}"
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+    try:
+        if args.target is None:
+            app = "benchmarks.app:app" if args.in_memory else "main:app"
+            processes.append(
+                start_process(
+                    [
+                        "-m",
+                        "uvicorn",
+                        app,
+                        "--host",
+                        args.host,
+                        "--port",
+                        str(args.api_port),
+                        "--log-level",
+                        "warning",
+                    ],
+                    env,
+                )
+            )
+
+        async with httpx.AsyncClient(
+            base_url=api_url, timeout=30.0, limits=limits
+        ) as client:
+            await wait_until_ready(
+                client, f"http://{args.host}:{args.llm_port}/docs", 30, processes[0]
+            )
+            await wait_until_ready(
+                client,
+                f"{api_url}/stats",
+                args.startup_timeout,
+                processes[1] if len(processes) > 1 else None,
+            )
+
+            if args.warmup:
+                warmup = LoadTest(
+                    client, sink, queries, args.warmup, args.concurrency, args.timeout
+                )
+                await warmup.run()
+
+            load_test = LoadTest(
+                client, sink, queries, args.requests, args.concurrency, args.timeout
+            )
+            duration = await load_test.run()
+            stats = (await client.get("/stats")).json()
+    finally:
+        for process in reversed(processes):
+            stop_process(process)
+        sink_server.should_exit = True
+        await sink_task
+
+    report = load_test.report(duration, stats)
+    report["config"] = {
+        "target": api_url,
+        "in_memory": args.in_memory,
+        "fake_embeddings": args.fake_embeddings,
+        "corpus": str(args.corpus),
+        "queries": len(queries),
+        "warmup": args.warmup,
+        "llm_ttft_ms": args.llm_ttft_ms,
+        "llm_tokens": args.llm_tokens,
+        "llm_token_interval_ms": args.llm_token_interval_ms,
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load-tests the API end to end against a fake LLM and callback sink."
+    )
+    parser.add_argument(
+        "--corpus", default=DEFAULT_CORPUS, help="JSONL file of queries to replay."
+    )
+    parser.add_argument(
+        "--field", default="query", help="Field holding the query in each line."
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--warmup", type=int, default=0, help="Requests sent before measuring."
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=60.0, help="Seconds to wait for an answer."
+    )
+    parser.add_argument("--llm-ttft-ms", type=float, default=200.0)
+    parser.add_argument("--llm-tokens", type=int, default=40)
+    parser.add_argument("--llm-token-interval-ms", type=float, default=10.0)
+    parser.add_argument(
+        "--in-memory",
+        action="store_true",
+        help="Serve products from an in-process index instead of Postgres.",
+    )
+    parser.add_argument(
+        "--fake-embeddings",
+        action="store_true",
+        help="Use hashing embeddings instead of the sentence transformer (implies --in-memory).",
+    )
+    parser.add_argument(
+        "--target",
+        help="URL of an API that is already running. Its CALLBACK_URL must point at the sink.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--api-port", type=int, default=8200)
+    parser.add_argument("--llm-port", type=int, default=8100)
+    parser.add_argument("--sink-port", type=int, default=8300)
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="Writes the JSON report to this file.")
+    args = parser.parse_args()
+    if args.fake_embeddings:
+        args.in_memory = True
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+"""
+Measures how `semantic_search` scales with the catalogue size.
+
+For each size, a synthetic dataset of clustered, L2-normalized embeddings is
+generated (and cached on disk), and every backend is searched with the same
+queries:
+
+  - numpy: the in-process `NumpyProductRepository` (an exact scan).
+  - postgres: `PostgresProductRepository` on a scratch schema, with an exact
+    sequential scan, then an HNSW index for each `--ef-search` value and an
+    IVFFlat index for each `--probes` value. With `--storage halfvec binary`,
+    the indexes are also built on the compact representations, whose
+    candidates are re-ranked on the float32 vectors.
+
+Recall@k is measured against a brute-force scan of the dataset. Results are
+printed, and written with `--output`, as JSON. Run
+`python -m benchmarks.retrieval_bench --help` for the options.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import struct
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import asyncpg
+import numpy as np
+
+from src.config.pgvector import register_vector_codecs
+from src.repositories import NumpyProductRepository, PostgresProductRepository
+from src.repositories.vector_storage import check_storage_support, index_expression
+
+logger = logging.getLogger(__name__)
+
+# all-MiniLM-L6-v2, the default embedding model.
+DEFAULT_DIMENSION = 384
+BENCH_SCHEMA = "retrieval_bench"
+GENERATION_CHUNK = 100_000
+
+
+def _content(ids: np.ndarray) -> list[str]:
+    return [f"product {i:08d}" for i in ids]
+
+
+def generate_dataset(
+    directory: Path, size: int, dimension: int, clusters: int, seed: int
+) -> np.ndarray:
+    """
+    Returns a memory-mapped (size, dimension) float32 matrix of normalized
+    embeddings drawn around `clusters` random centers, generating it on the
+    first call. Clustering makes ANN recall behave as on real embeddings.
+    """
+    path = directory / f"dataset-{size}-{dimension}-{clusters}-{seed}.npy"
+    if path.exists():
+        return np.load(path, mmap_mode="r")
+
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension), dtype=np.float32)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    matrix = np.lib.format.open_memmap(
+        tmp_path, mode="w+", dtype=np.float32, shape=(size, dimension)
+    )
+    for start in range(0, size, GENERATION_CHUNK):
+        end = min(size, start + GENERATION_CHUNK)
+        chunk = centers[rng.integers(0, clusters, end - start)]
+        chunk += 0.5 * rng.standard_normal((end - start, dimension), dtype=np.float32)
+        chunk /= np.linalg.norm(chunk, axis=1, keepdims=True)
+        matrix[start:end] = chunk
+    matrix.flush()
+    del matrix
+    os.replace(tmp_path, path)
+    return np.load(path, mmap_mode="r")
+
+
+def sample_queries(dataset: np.ndarray, count: int, seed: int) -> np.ndarray:
+    """Perturbs random dataset rows, so every query has close neighbours."""
+    rng = np.random.default_rng(seed + 1)
+    rows = np.sort(rng.choice(len(dataset), size=count, replace=False))
+    queries = np.asarray(dataset[rows], dtype=np.float32)
+    queries += 0.1 * rng.standard_normal(queries.shape, dtype=np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def brute_force(dataset: np.ndarray, queries: np.ndarray, top_k: int) -> np.ndarray:
+    """Returns the exact top-k row numbers of every query, scanning in chunks."""
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_rows = np.empty((len(queries), 0), dtype=np.int64)
+    for start in range(0, len(dataset), GENERATION_CHUNK):
+        scores = queries @ np.asarray(dataset[start : start + GENERATION_CHUNK]).T
+        scores = np.concatenate([best_scores, scores], axis=1)
+        rows = np.concatenate(
+            [
+                best_rows,
+                np.broadcast_to(
+                    np.arange(start, start + scores.shape[1] - best_rows.shape[1]),
+                    (len(queries), scores.shape[1] - best_rows.shape[1]),
+                ),
+            ],
+            axis=1,
+        )
+        k = min(top_k, scores.shape[1])
+        keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, keep, axis=1)
+        best_rows = np.take_along_axis(rows, keep, axis=1)
+    order = np.argsort(-best_scores, axis=1, kind="stable")
+    return np.take_along_axis(best_rows, order, axis=1)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process so far."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_queries(
+    search, queries: np.ndarray, concurrency: int
+) -> tuple[list[list[int]], list[float], float]:
+    """
+    Runs `search(query)` for every query, `concurrency` at a time. Returns
+    the found ids, the latency of each search and the total elapsed time.
+    """
+    results: list[list[int]] = [[] for _ in queries]
+    latencies: list[float] = [0.0] * len(queries)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            documents = await search(queries[i])
+            latencies[i] = time.perf_counter() - started
+            results[i] = [d.id for d in documents]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(len(queries))))
+    return results, latencies, time.perf_counter() - started
+
+
+def summarize(
+    results: list[list[int]],
+    latencies: list[float],
+    elapsed: float,
+    exact_ids: np.ndarray,
+    top_k: int,
+) -> dict:
+    recall = np.mean(
+        [
+            len(set(got) & set(want.tolist())) / len(want)
+            for got, want in zip(results, exact_ids)
+        ]
+    )
+    ms = np.asarray(latencies) * 1000
+    return {
+        "recall_at_k": round(float(recall), 4),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "qps": round(len(latencies) / elapsed, 1),
+    }
+
+
+async def bench_numpy(
+    dataset: np.ndarray,
+    queries: np.ndarray,
+    exact_ids: np.ndarray,
+    top_k: int,
+    concurrency: int,
+) -> list[dict]:
+    started = time.perf_counter()
+    ids = np.arange(1, len(dataset) + 1, dtype=np.int64)
+    repository = NumpyProductRepository()
+    repository.load_embeddings(ids, _content(ids), dataset)
+    # Fault the memory-mapped pages in, so the first queries do not pay for it.
+    float(np.asarray(dataset).sum())
+    build_seconds = time.perf_counter() - started
+
+    results, latencies, elapsed = await run_queries(
+        lambda q: repository.semantic_search(q, top_k), queries, concurrency
+    )
+    return [
+        {
+            "backend": "numpy",
+            "mode": "exact",
+            "build_s": round(build_seconds, 3),
+            "index_bytes": int(dataset.nbytes),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            **summarize(results, latencies, elapsed, exact_ids, top_k),
+        }
+    ]
+
+
+def _copy_rows(dataset: np.ndarray, start: int, end: int) -> bytes:
+    """
+    Encodes rows as COPY binary tuples of (id, content, embedding), with the
+    embedding in pgvector's binary format.
+    """
+    dimension = dataset.shape[1]
+    tuple_type = np.dtype(
+        [
+            ("fields", ">i2"),
+            ("id_len", ">i4"),
+            ("id", ">i8"),
+            ("content_len", ">i4"),
+            ("content", "S16"),
+            ("embedding_len", ">i4"),
+            ("dimension", ">i2"),
+            ("unused", ">i2"),
+            ("embedding", ">f4", (dimension,)),
+        ]
+    )
+    ids = np.arange(start + 1, end + 1, dtype=np.int64)
+    rows = np.empty(end - start, dtype=tuple_type)
+    rows["fields"] = 3
+    rows["id_len"] = 8
+    rows["id"] = ids
+    rows["content_len"] = 16
+    rows["content"] = [c.encode("ascii") for c in _content(ids)]
+    rows["embedding_len"] = 4 + 4 * dimension
+    rows["dimension"] = dimension
+    rows["unused"] = 0
+    rows["embedding"] = dataset[start:end]
+    return rows.tobytes()
+
+
+async def _copy_dataset(conn: asyncpg.Connection, dataset: np.ndarray):
+    async def source():
+        yield b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+        for start in range(0, len(dataset), GENERATION_CHUNK):
+            end = min(len(dataset), start + GENERATION_CHUNK)
+            yield _copy_rows(dataset, start, end)
+        yield struct.pack(">h", -1)
+
+    await conn.copy_to_table(
+        "products",
+        source=source(),
+        columns=["id", "content", "embedding"],
+        schema_name=BENCH_SCHEMA,
+        format="binary",
+    )
+
+
+async def bench_postgres(
+    database_url: str,
+    dataset: np.ndarray,
+    queries: np.ndarray,
+    exact_ids: np.ndarray,
+    top_k: int,
+    concurrency: int,
+    args,
+) -> list[dict]:
+    """
+    Loads the dataset into a scratch schema and runs the repository's
+    searches, so the `products` table of the application is left untouched.
+    """
+    pool = await asyncpg.create_pool(
+        dsn=database_url,
+        min_size=1,
+        max_size=max(1, concurrency),
+        server_settings={
+            "search_path": f"{BENCH_SCHEMA}, public",
+            "maintenance_work_mem": args.maintenance_work_mem,
+        },
+        init=register_vector_codecs,
+    )
+    report = []
+    try:
+        async with pool.acquire() as conn:
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            await register_vector_codecs(conn)
+            await conn.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+            await conn.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+            await conn.execute(
+                f"""
+                CREATE TABLE {BENCH_SCHEMA}.products (
+                    id BIGINT PRIMARY KEY,
+                    content TEXT NOT NULL,
+                    embedding VECTOR({dataset.shape[1]}) NOT NULL
+                )
+                """
+            )
+            started = time.perf_counter()
+            await _copy_dataset(conn, dataset)
+            await conn.execute(f"ANALYZE {BENCH_SCHEMA}.products")
+            load_seconds = time.perf_counter() - started
+            table_bytes = await conn.fetchval(
+                f"SELECT pg_table_size('{BENCH_SCHEMA}.products')"
+            )
+
+        async def measure(
+            repository: PostgresProductRepository,
+            mode: str,
+            build_seconds: float,
+            index_bytes: int,
+            **options,
+        ):
+            results, latencies, elapsed = await run_queries(
+                lambda q: repository.semantic_search(q, top_k, **options),
+                queries,
+                concurrency,
+            )
+            report.append(
+                {
+                    "backend": "postgres",
+                    "mode": mode,
+                    "build_s": round(build_seconds, 3),
+                    "index_bytes": index_bytes,
+                    "table_bytes": table_bytes,
+                    **summarize(results, latencies, elapsed, exact_ids, top_k),
+                }
+            )
+
+        await measure(PostgresProductRepository(pool), "exact", load_seconds, 0)
+
+        index_builds = [
+            (
+                "hnsw",
+                f"m = {args.hnsw_m}, ef_construction = {args.hnsw_ef_construction}",
+                [{"ef_search": v} for v in args.ef_search],
+            ),
+            (
+                "ivfflat",
+                f"lists = {args.ivfflat_lists or max(1, int(len(dataset) ** 0.5))}",
+                [{"probes": v} for v in args.probes],
+            ),
+        ]
+        for storage in args.storage:
+            async with pool.acquire() as conn:
+                await check_storage_support(conn, storage)
+            repository = PostgresProductRepository(
+                pool, storage=storage, rerank_candidates=args.rerank_candidates
+            )
+            expression, opclass = index_expression(storage, dataset.shape[1])
+            for index_type, options, sweeps in index_builds:
+                if index_type not in args.indexes:
+                    continue
+                index_name = f"{BENCH_SCHEMA}.products_{index_type}_idx"
+                async with pool.acquire() as conn:
+                    started = time.perf_counter()
+                    await conn.execute(
+                        f"CREATE INDEX products_{index_type}_idx ON {BENCH_SCHEMA}.products "
+                        f"USING {index_type} ({expression} {opclass}) WITH ({options})"
+                    )
+                    build_seconds = time.perf_counter() - started
+                    index_bytes = await conn.fetchval(
+                        f"SELECT pg_relation_size('{index_name}')"
+                    )
+                for sweep in sweeps:
+                    if storage != "full" and "ef_search" in sweep:
+                        # HNSW returns at most ef_search candidates to re-rank.
+                        sweep = {
+                            "ef_search": max(sweep["ef_search"], args.rerank_candidates)
+                        }
+                    setting = ", ".join(f"{k}={v}" for k, v in sweep.items())
+                    await measure(
+                        repository,
+                        f"{storage} {index_type} {options.replace(' ', '')} {setting}",
+                        build_seconds,
+                        index_bytes,
+                        **sweep,
+                    )
+                async with pool.acquire() as conn:
+                    await conn.execute(f"DROP INDEX {index_name}")
+    finally:
+        if not args.keep_schema:
+            async with pool.acquire() as conn:
+                await conn.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        await pool.close()
+    return report
+
+
+async def run(args) -> dict:
+    directory = Path(args.data_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    results = []
+    for size in sorted(args.sizes):
+        started = time.perf_counter()
+        dataset = generate_dataset(
+            directory, size, args.dimension, args.clusters, args.seed
+        )
+        generation_seconds = time.perf_counter() - started
+        queries = sample_queries(dataset, min(args.queries, size), args.seed)
+
+        started = time.perf_counter()
+        # Row n holds product id n + 1.
+        exact_ids = brute_force(dataset, queries, args.top_k) + 1
+        logger.info(
+            f"{size} vectors: generated in {generation_seconds:.1f}s, "
+            f"ground truth in {time.perf_counter() - started:.1f}s."
+        )
+
+        rows = []
+        if "numpy" in args.backends:
+            rows += await bench_numpy(
+                dataset, queries, exact_ids, args.top_k, args.concurrency
+            )
+        if "postgres" in args.backends:
+            if not args.database_url:
+                raise ValueError("The postgres backend needs --database-url.")
+            rows += await bench_postgres(
+                args.database_url,
+                dataset,
+                queries,
+                exact_ids,
+                args.top_k,
+                args.concurrency,
+                args,
+            )
+        for row in rows:
+            logger.info(
+                f"{size:>9} {row['backend']:<9}{row['mode']:<48}"
+                f"recall@k={row['recall_at_k']:<7} p50={row['p50_ms']}ms "
+                f"p99={row['p99_ms']}ms qps={row['qps']}"
+            )
+            results.append({"size": size, "dimension": args.dimension, **row})
+
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "host": {
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+        },
+        "config": {
+            "sizes": sorted(args.sizes),
+            "dimension": args.dimension,
+            "clusters": args.clusters,
+            "queries": args.queries,
+            "top_k": args.top_k,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "backends": args.backends,
+            "storage": args.storage,
+            "rerank_candidates": args.rerank_candidates,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmarks semantic search across catalogue sizes, backends and ANN settings."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000],
+        help="Vectors per dataset.",
+    )
+    parser.add_argument("--dimension", type=int, default=DEFAULT_DIMENSION)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--backends", nargs="+", choices=["numpy", "postgres"], default=["numpy"]
+    )
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("DATABASE_URL"),
+        help="Database for the postgres backend; a scratch schema is used.",
+    )
+    parser.add_argument(
+        "--indexes", nargs="*", choices=["hnsw", "ivfflat"], default=["hnsw", "ivfflat"]
+    )
+    parser.add_argument(
+        "--storage",
+        nargs="+",
+        choices=["full", "halfvec", "binary"],
+        default=["full"],
+        help="Vector representations to index; compact ones need pgvector 0.7+.",
+    )
+    parser.add_argument(
+        "--rerank-candidates",
+        type=int,
+        default=40,
+        help="Candidates re-ranked on full precision with a compact storage.",
+    )
+    parser.add_argument("--hnsw-m", type=int, default=16)
+    parser.add_argument("--hnsw-ef-construction", type=int, default=64)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[10, 40, 100])
+    parser.add_argument(
+        "--ivfflat-lists", type=int, help="Defaults to the square root of the size."
+    )
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 10, 40])
+    parser.add_argument("--maintenance-work-mem", default="1GB")
+    parser.add_argument("--keep-schema", action="store_true")
+    parser.add_argument(
+        "--data-dir",
+        default=os.path.join(tempfile.gettempdir(), "retrieval_bench"),
+        help="Where generated datasets are cached.",
+    )
+    parser.add_argument("--output", help="Writes the JSON report to this file.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text)
+
+
+if __name__ == "__main__":
+    main()
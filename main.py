@@ -1,79 +1,91 @@
-import logging
 import asyncio
+import logging
 import asyncpg
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
-from src.config.db import get_db_pool
-from src.config.queue import request_queue
+from src.config.db import get_db_pool, vector_search_settings
+from src.config.pgvector import register_vector_codecs
+from src.config.http import create_http_client, get_http_client
 from src.config.secrets import secrets
 from src.api import routes
 from src.containers import AppContainer
 from script.db_setup import initialize_database
 from src.config.logger import setup_logging
-from src.config import db
+from src.config import db, http
 
 setup_logging()
 
 logger = logging.getLogger(__name__)
 
 
-async def worker():
-    """The background worker that processes tasks from the queue."""
-    logger.info("Background worker started.")
-
-    container = AppContainer()
-    container.db_pool.override(get_db_pool())
-
-    orchestrator = container.rag_orchestrator()
-
-    while True:
-        try:
-            request = await request_queue.get()
-            logger.info(f"Worker picked up request for user: {request.user_id}")
-
-            await orchestrator.process_query(
-                user_id=request.user_id, query=request.query
-            )
-
-            request_queue.task_done()
-        except asyncio.CancelledError:
-            logger.info("Worker shutting down gracefully.")
-            break
-        except Exception:
-            logger.error("An error occurred in the worker:", exc_info=True)
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Manages the application's startup and shutdown events.
-    - Initializes the database connection pool.
-    - Starts the background worker task.
-    - Cleans up both on shutdown.
+    - Initializes the database connection pool and the callback HTTP client.
+    - Warms up the embedding model, loads the context packer's tokenizer and
+      starts the background worker pool, unless RUN_WORKERS is disabled.
+    - Drains in-flight work and pending callbacks, then cleans up on shutdown.
     """
     logger.info("Application startup...")
 
     logger.info("Attempting to connect to the database...")
     db.db_pool = await asyncpg.create_pool(
-        dsn=secrets.DATABASE_URL, min_size=5, max_size=20
+        dsn=secrets.DATABASE_URL,
+        min_size=5,
+        max_size=20,
+        server_settings=vector_search_settings(),
+        init=register_vector_codecs,
+    )
+    container = AppContainer()
+    container.db_pool.override(get_db_pool())
+    await initialize_database(
+        db.db_pool,
+        reset=secrets.DB_RESET_ON_STARTUP,
+        registry=container.model_registry(),
     )
-    await initialize_database(db.db_pool)
+    # Connections opened before the vector extension existed have no codecs.
+    await db.db_pool.expire_connections()
     logger.info("Database connection pool created and seeded successfully.")
 
-    logger.info("Starting background worker task.")
-    worker_task = asyncio.create_task(worker())
+    http.http_client = create_http_client()
+    container.http_client.override(get_http_client())
+    app.state.container = container
+
+    await container.product_repo().initialize()
+    token_stream = container.token_stream()
+    if token_stream is not None:
+        await token_stream.initialize()
+
+    worker_pool = container.worker_pool()
+    if secrets.RUN_WORKERS:
+        if secrets.EMBEDDING_WARM_UP:
+            await asyncio.to_thread(
+                container.model_registry().warm_up, secrets.EMBEDDING_MODEL_NAME
+            )
+        context_packer = container.context_packer()
+        if context_packer.enabled:
+            await context_packer.load_encoding()
+        logger.info("Starting background worker pool.")
+        worker_pool.start()
 
     yield
 
     logger.info("Application shutdown...")
 
-    logger.info("Stopping background worker task...")
-    worker_task.cancel()
-    try:
-        await worker_task
-    except asyncio.CancelledError:
-        logger.info("Background worker task cancelled successfully.")
+    logger.info("Stopping background worker pool...")
+    await worker_pool.stop()
+    await container.request_queue().close()
+    if token_stream is not None:
+        await token_stream.close()
+
+    logger.info("Delivering pending callbacks...")
+    await container.callback_service().drain()
+    await http.http_client.aclose()
+    logger.info("Callback HTTP client closed.")
+
+    container.shutdown_resources()
 
     if db.db_pool:
         await db.db_pool.close()
@@ -1,67 +1,312 @@
 import logging
+import time
 import asyncpg
-from sentence_transformers import SentenceTransformer
+import numpy as np
 from script.data.products_description import PRODUCT_DESCRIPTIONS
+from src.config.pgvector import register_vector_codecs
 from src.config.secrets import secrets
+from src.embeddings import ModelRegistry
+from src.repositories.embedding_snapshot import (
+    EmbeddingSnapshot,
+    content_hash,
+    normalize,
+)
+from src.repositories.vector_storage import (
+    check_storage_support,
+    index_expression,
+)
 
 logger = logging.getLogger(__name__)
 
+VECTOR_INDEX_TYPES = ("hnsw", "ivfflat")
+# Advisory lock key serializing ANN index builds across processes.
+VECTOR_INDEX_LOCK = 0x76656374
 
-async def initialize_database(pool: asyncpg.Pool, reset: bool = True):
+
+def vector_index_name(index_type: str, storage: str = "full") -> str:
+    if storage == "full":
+        return f"products_embedding_{index_type}_idx"
+    return f"products_embedding_{storage}_{index_type}_idx"
+
+
+def _vector_index_options(index_type: str) -> list[str]:
+    if index_type == "hnsw":
+        return [
+            f"m={secrets.HNSW_M}",
+            f"ef_construction={secrets.HNSW_EF_CONSTRUCTION}",
+        ]
+    return [f"lists={secrets.IVFFLAT_LISTS}"]
+
+
+async def _index_state(conn: asyncpg.Connection, name: str):
+    """Returns the reloptions and validity of an index, or None if it is missing."""
+    return await conn.fetchrow(
+        """
+        SELECT c.reloptions, i.indisvalid FROM pg_class c
+        JOIN pg_index i ON i.indexrelid = c.oid
+        WHERE c.relname = $1 AND c.relkind = 'i'
+        """,
+        name,
+    )
+
+
+def _needs_rebuild(current, options: list[str]) -> bool:
+    """Whether an index in `current` state is missing, invalid or built with other options."""
+    return (
+        current is None
+        or not current["indisvalid"]
+        or sorted(current["reloptions"] or []) != sorted(options)
+    )
+
+
+async def ensure_vector_index(
+    conn: asyncpg.Connection,
+    index_type: str,
+    storage: str = "full",
+    dimension: int | None = None,
+):
+    """
+    Makes sure the products table has the configured ANN index ("hnsw",
+    "ivfflat" or "none") for `storage`, rebuilding it if its build parameters
+    changed. With a compact `storage`, the index is built on the
+    half-precision or binary-quantized expression of `embedding` of the given
+    dimension.
+
+    Indexes are built with CREATE INDEX CONCURRENTLY, so `conn` must not be
+    in a transaction and the table stays writable meanwhile. A rebuilt index
+    replaces the old one only once it is ready. Only the index it replaces,
+    of the same storage, is dropped; indexes of other storages are kept.
+    """
+    if index_type not in ("none", *VECTOR_INDEX_TYPES):
+        raise ValueError(f"Unknown vector index type: {index_type!r}")
+    await check_storage_support(conn, storage)
+
+    # Replicas starting together must not build the same index twice.
+    await conn.execute("SELECT pg_advisory_lock($1)", VECTOR_INDEX_LOCK)
+    try:
+        await _ensure_vector_index(conn, index_type, storage, dimension)
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", VECTOR_INDEX_LOCK)
+
+
+async def _ensure_vector_index(
+    conn: asyncpg.Connection, index_type: str, storage: str, dimension: int | None
+):
+    replaced = [
+        vector_index_name(other_type, storage)
+        for other_type in VECTOR_INDEX_TYPES
+        if other_type != index_type
+    ]
+    if index_type == "none":
+        for name in replaced:
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
+        logger.info("No ANN index configured; searches will scan 'products'.")
+        return
+
+    index_name = vector_index_name(index_type, storage)
+    options = _vector_index_options(index_type)
+    current = await _index_state(conn, index_name)
+    if not _needs_rebuild(current, options):
+        logger.info(f"Index '{index_name}' is up to date.")
+    else:
+        # Build under a temporary name and swap it in, so searches keep an
+        # index while the new one is built.
+        building = f"{index_name}_new"
+        await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {building};")
+        if current is not None:
+            logger.info(f"Build parameters of '{index_name}' changed; rebuilding it.")
+
+        expression, opclass = index_expression(storage, dimension)
+        started = time.perf_counter()
+        await conn.execute(
+            f"CREATE INDEX CONCURRENTLY {building} ON products "
+            f"USING {index_type} ({expression} {opclass}) "
+            f"WITH ({', '.join(o.replace('=', ' = ') for o in options)});"
+        )
+        if current is not None:
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name};")
+        await conn.execute(f"ALTER INDEX {building} RENAME TO {index_name};")
+        logger.info(
+            f"Built {index_type} index '{index_name}' ({', '.join(options)}) "
+            f"in {time.perf_counter() - started:.2f}s."
+        )
+
+    for name in replaced:
+        await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name};")
+
+
+def load_product_embeddings(
+    registry: ModelRegistry | None = None,
+) -> tuple[EmbeddingSnapshot, set[str]]:
+    """
+    Returns the embedding snapshot of PRODUCT_DESCRIPTIONS, reusing the one on
+    disk and only embedding products whose text is new or changed. Also
+    returns the content hashes that were embedded in this run. The model is
+    taken from `registry`, and only loaded if some product needs embedding.
+    """
+    model_name = secrets.EMBEDDING_MODEL_NAME
+    hashes = [content_hash(desc) for desc in PRODUCT_DESCRIPTIONS]
+    snapshot = EmbeddingSnapshot.load(secrets.EMBEDDING_SNAPSHOT_DIR, model_name)
+    if snapshot is not None and snapshot.hashes == hashes:
+        logger.info(f"Embedding snapshot is up to date ({len(snapshot)} products).")
+        return snapshot, set()
+
+    positions = [snapshot.position(h) if snapshot else None for h in hashes]
+    missing = [i for i, position in enumerate(positions) if position is None]
+
+    fresh = None
+    if missing:
+        model = (registry or ModelRegistry()).get(model_name)
+        logger.info(f"Embedding {len(missing)} new or changed products...")
+        fresh = normalize(
+            model.encode(
+                [PRODUCT_DESCRIPTIONS[i] for i in missing], show_progress_bar=True
+            )
+        )
+
+    dimension = fresh.shape[1] if fresh is not None else snapshot.dimension
+    embeddings = np.empty((len(hashes), dimension), dtype=np.float32)
+    for i, position in enumerate(positions):
+        if position is not None:
+            embeddings[i] = snapshot.embeddings[position]
+    if fresh is not None:
+        embeddings[missing] = fresh
+
+    snapshot = EmbeddingSnapshot.write(
+        secrets.EMBEDDING_SNAPSHOT_DIR, model_name, hashes, embeddings
+    )
+    return snapshot, {hashes[i] for i in missing}
+
+
+async def initialize_database(
+    pool: asyncpg.Pool, reset: bool = False, registry: ModelRegistry | None = None
+):
     """
     Uses the application's connection pool to initialize the database.
-    If reset=True, drops and recreates the products table.
+    Products missing from the table, or re-embedded in this run, are upserted
+    by content hash. If reset=True, drops and recreates the products table.
     """
     logger.info("Starting database initialization...")
     try:
+        snapshot, embedded = load_product_embeddings(registry)
+        embedding_dim = snapshot.dimension
+
         async with pool.acquire() as conn:
             async with conn.transaction():
-                logger.info(
-                    f"Loading embedding model '{secrets.EMBEDDING_MODEL_NAME}'..."
-                )
-                model = SentenceTransformer(secrets.EMBEDDING_MODEL_NAME)
-                embedding_dim = model.get_sentence_embedding_dimension()
-
                 await conn.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+                await register_vector_codecs(conn)
 
                 if reset:
                     logger.warning("Dropping and recreating 'products' table!")
                     await conn.execute("DROP TABLE IF EXISTS products;")
+                    await conn.execute("DROP TABLE IF EXISTS answer_cache;")
+                else:
+                    current_dim = await conn.fetchval(
+                        """
+                        SELECT atttypmod FROM pg_attribute
+                        WHERE attrelid = to_regclass('products') AND attname = 'embedding'
+                        """
+                    )
+                    if current_dim is not None and current_dim != embedding_dim:
+                        raise RuntimeError(
+                            f"'products.embedding' has dimension {current_dim} but the model "
+                            f"produces {embedding_dim}; restart with DB_RESET_ON_STARTUP=true."
+                        )
 
                 create_table_query = f"""
                 CREATE TABLE IF NOT EXISTS products (
                     id SERIAL PRIMARY KEY,
                     content TEXT NOT NULL UNIQUE,
-                    embedding VECTOR({embedding_dim})
+                    content_hash TEXT,
+                    embedding VECTOR({embedding_dim}),
+                    content_tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', content)) STORED
                 );
+                ALTER TABLE products ADD COLUMN IF NOT EXISTS content_hash TEXT;
+                ALTER TABLE products ADD COLUMN IF NOT EXISTS content_tsv TSVECTOR
+                    GENERATED ALWAYS AS (to_tsvector('english', content)) STORED;
+                CREATE INDEX IF NOT EXISTS products_content_tsv_idx
+                    ON products USING GIN (content_tsv);
+                UPDATE products
+                    SET content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex')
+                    WHERE content_hash IS NULL;
+                CREATE UNIQUE INDEX IF NOT EXISTS products_content_hash_idx
+                    ON products (content_hash);
                 """
                 await conn.execute(create_table_query)
                 logger.info("Table 'products' is ready.")
 
-                if (
-                    reset
-                    or (await conn.fetchval("SELECT COUNT(*) FROM products;")) == 0
-                ):
-                    if not reset:
-                        logger.info("'products' table is empty. Seeding data...")
-                    embeddings = model.encode(
-                        PRODUCT_DESCRIPTIONS, show_progress_bar=True
+                create_answer_cache_query = f"""
+                CREATE TABLE IF NOT EXISTS answer_cache (
+                    id BIGSERIAL PRIMARY KEY,
+                    product_ids INT[] NOT NULL,
+                    query_embedding VECTOR({embedding_dim}) NOT NULL,
+                    answer TEXT NOT NULL,
+                    generation_ms REAL NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                );
+                CREATE INDEX IF NOT EXISTS answer_cache_product_ids_idx
+                    ON answer_cache (product_ids);
+                """
+                await conn.execute(create_answer_cache_query)
+                logger.info("Table 'answer_cache' is ready.")
+
+                create_jobs_query = """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id UUID PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    priority SMALLINT NOT NULL DEFAULT 1,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INT NOT NULL DEFAULT 0,
+                    visible_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                    answer TEXT,
+                    error TEXT
+                );
+                CREATE INDEX IF NOT EXISTS jobs_ready_idx
+                    ON jobs (priority, visible_at)
+                    WHERE status IN ('queued', 'running');
+                CREATE INDEX IF NOT EXISTS jobs_finished_idx
+                    ON jobs (updated_at)
+                    WHERE status IN ('done', 'failed');
+                """
+                await conn.execute(create_jobs_query)
+                logger.info("Table 'jobs' is ready.")
+
+                stored = {
+                    r["content_hash"]
+                    for r in await conn.fetch("SELECT content_hash FROM products;")
+                }
+                records_to_upsert = [
+                    (desc, hash_, emb)
+                    for desc, hash_, emb in zip(
+                        PRODUCT_DESCRIPTIONS, snapshot.hashes, snapshot.embeddings
                     )
-                    records_to_insert = [
-                        (desc, str(emb.tolist()))
-                        for desc, emb in zip(PRODUCT_DESCRIPTIONS, embeddings)
-                    ]
+                    if hash_ not in stored or hash_ in embedded
+                ]
+                if records_to_upsert:
                     await conn.executemany(
-                        "INSERT INTO products (content, embedding) VALUES ($1, $2)",
-                        records_to_insert,
+                        """
+                        INSERT INTO products (content, content_hash, embedding)
+                        VALUES ($1, $2, $3)
+                        ON CONFLICT (content_hash) DO UPDATE SET embedding = EXCLUDED.embedding
+                        """,
+                        records_to_upsert,
                     )
                     logger.info(
-                        f"Successfully seeded {len(records_to_insert)} products."
+                        f"Successfully upserted {len(records_to_upsert)} products."
                     )
                 else:
-                    logger.info(
-                        "'products' table already contains data. Skipping seeding."
-                    )
+                    logger.info("'products' table is up to date. Skipping seeding.")
+
+            # Outside the transaction, so the index is built concurrently.
+            await ensure_vector_index(
+                conn,
+                secrets.VECTOR_INDEX_TYPE,
+                secrets.VECTOR_STORAGE,
+                embedding_dim,
+            )
     except Exception as e:
         logger.error(f"Database initialization failed: {e}", exc_info=True)
         raise
@@ -0,0 +1,145 @@
+import argparse
+import json
+import logging
+import sys
+import time
+import numpy as np
+from script.data.products_description import PRODUCT_DESCRIPTIONS
+from src.config.logger import setup_logging
+from src.config.secrets import secrets
+from src.embeddings import OnnxEmbeddingBackend, TorchEmbeddingBackend
+from src.repositories.embedding_snapshot import normalize
+
+logger = logging.getLogger(__name__)
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> dict:
+    """Summarizes the cosine similarity between matching rows."""
+    cosines = np.sum(normalize(reference) * normalize(candidate), axis=1)
+    return {
+        "mean": float(cosines.mean()),
+        "p1": float(np.percentile(cosines, 1)),
+        "min": float(cosines.min()),
+    }
+
+
+def top_k(queries: np.ndarray, corpus: np.ndarray, k: int) -> np.ndarray:
+    scores = normalize(queries) @ normalize(corpus).T
+    return np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+
+def top_k_agreement(expected: np.ndarray, found: np.ndarray) -> float:
+    """Mean fraction of the expected top-k that was also found."""
+    return float(
+        np.mean([len(set(e) & set(f)) / len(e) for e, f in zip(expected, found)])
+    )
+
+
+def throughput(model, texts: list[str], batch_size: int) -> dict:
+    """Encodes `texts` in batches and returns the latency per batch and texts/s."""
+    model.encode(texts[:batch_size], batch_size=batch_size, convert_to_numpy=True)
+    latencies = []
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start : start + batch_size]
+        started = time.perf_counter()
+        model.encode(batch, batch_size=len(batch), convert_to_numpy=True)
+        latencies.append(time.perf_counter() - started)
+    return {
+        "batch_size": batch_size,
+        "p50_ms": 1000 * float(np.percentile(latencies, 50)),
+        "texts_per_second": len(texts) / sum(latencies),
+    }
+
+
+def build_report(args) -> dict:
+    """
+    Embeds the sample catalogue with both backends and compares the
+    embeddings, the retrieval results and the encoding speed.
+    """
+    import torch
+
+    torch.set_num_threads(args.threads)
+    texts = PRODUCT_DESCRIPTIONS[: args.texts]
+    # The product names make short, query-like texts.
+    queries = [text.split(":")[0] for text in texts]
+
+    backends = {
+        "torch": TorchEmbeddingBackend(),
+        "onnx": OnnxEmbeddingBackend(
+            model_dir=args.model_dir,
+            quantization=args.quantization,
+            threads=args.threads,
+        ),
+    }
+    models = {name: backend.load(args.model) for name, backend in backends.items()}
+    corpus = {
+        name: model.encode(texts, batch_size=32, convert_to_numpy=True)
+        for name, model in models.items()
+    }
+    query_embeddings = {
+        name: model.encode(queries, batch_size=32, convert_to_numpy=True)
+        for name, model in models.items()
+    }
+
+    expected = top_k(query_embeddings["torch"], corpus["torch"], args.top_k)
+    return {
+        "model": args.model,
+        "quantization": args.quantization,
+        "threads": args.threads,
+        "texts": len(texts),
+        "cosine": cosine_agreement(corpus["torch"], corpus["onnx"]),
+        "top_k": args.top_k,
+        "top_k_agreement": top_k_agreement(
+            expected, top_k(query_embeddings["onnx"], corpus["onnx"], args.top_k)
+        ),
+        # ONNX queries against a catalogue embedded with torch, as right
+        # after switching backends.
+        "top_k_agreement_mixed": top_k_agreement(
+            expected, top_k(query_embeddings["onnx"], corpus["torch"], args.top_k)
+        ),
+        "speed": {
+            name: [throughput(model, texts, size) for size in args.batch_sizes]
+            for name, model in models.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Checks that the ONNX embedding backend agrees with the torch backend."
+    )
+    parser.add_argument("--model", default=secrets.EMBEDDING_MODEL_NAME)
+    parser.add_argument("--model-dir", default=secrets.EMBEDDING_MODEL_DIR)
+    parser.add_argument("--quantization", default=secrets.EMBEDDING_ONNX_QUANTIZATION)
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=1,
+        help="Threads per backend, to compare per core.",
+    )
+    parser.add_argument("--texts", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=secrets.TOP_K)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32])
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--min-top-k-agreement", type=float, default=0.9)
+    args = parser.parse_args()
+
+    setup_logging()
+    report = build_report(args)
+    print(json.dumps(report, indent=2))
+
+    if report["cosine"]["min"] < args.min_cosine:
+        logger.error(
+            f"Minimum cosine {report['cosine']['min']:.4f} is below {args.min_cosine}."
+        )
+        sys.exit(1)
+    if report["top_k_agreement"] < args.min_top_k_agreement:
+        logger.error(
+            f"Top-k agreement {report['top_k_agreement']:.4f} is below "
+            f"{args.min_top_k_agreement}."
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
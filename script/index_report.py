@@ -0,0 +1,222 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+import asyncpg
+import numpy as np
+from src.config.logger import setup_logging
+from src.config.pgvector import register_vector_codecs
+from src.config.secrets import secrets
+from src.repositories.vector_storage import candidates_source
+from script.db_setup import VECTOR_INDEX_TYPES, vector_index_name
+
+logger = logging.getLogger(__name__)
+
+SEARCH_QUERY = "SELECT id FROM {source} ORDER BY embedding <=> $1 LIMIT $2"
+
+
+async def _sample_queries(
+    conn: asyncpg.Connection, count: int
+) -> list[tuple[int, np.ndarray]]:
+    """
+    Uses stored product embeddings as query vectors, with the id of the
+    product each one comes from.
+    """
+    records = await conn.fetch(
+        "SELECT id, embedding FROM products ORDER BY random() LIMIT $1",
+        count,
+    )
+    return [(r["id"], r["embedding"]) for r in records]
+
+
+def _neighbours(ids: list[int], source_id: int, top_k: int) -> list[int]:
+    """
+    Drops the product a query vector was taken from: it is its own nearest
+    neighbour, so keeping it would inflate recall.
+    """
+    return [i for i in ids if i != source_id][:top_k]
+
+
+async def _run_searches(
+    conn: asyncpg.Connection,
+    query: str,
+    queries: list[tuple[int, np.ndarray]],
+    top_k: int,
+    settings: list[str],
+) -> tuple[list[list[int]], list[float]]:
+    """
+    Runs every query with the given SET LOCAL settings, timing each one.
+    One extra neighbour is fetched to make up for the source product.
+    """
+    results, latencies = [], []
+    async with conn.transaction():
+        for setting in settings:
+            await conn.execute(f"SET LOCAL {setting}")
+        for source_id, embedding in queries:
+            started = time.perf_counter()
+            records = await conn.fetch(query, embedding, top_k + 1)
+            latencies.append(time.perf_counter() - started)
+            results.append(_neighbours([r["id"] for r in records], source_id, top_k))
+    return results, latencies
+
+
+def _summarize(
+    name: str,
+    results: list[list[int]],
+    latencies: list[float],
+    exact: list[list[int]],
+    top_k: int,
+    index_bytes: int = 0,
+) -> dict:
+    recall = np.mean(
+        [
+            len(set(got) & set(want)) / max(1, min(top_k, len(want)))
+            for got, want in zip(results, exact)
+        ]
+    )
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "mode": name,
+        "recall_at_k": round(float(recall), 4),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "qps": round(len(latencies) / sum(latencies), 1),
+        "index_mb": round(index_bytes / 2**20, 2),
+    }
+
+
+async def build_report(
+    pool: asyncpg.Pool,
+    queries: int,
+    top_k: int,
+    ef_search_values: list[int],
+    probes_values: list[int],
+    storage: str = "full",
+    rerank_candidates: int = 40,
+) -> list[dict]:
+    """
+    Compares the ANN index of the given vector storage against an exact
+    sequential scan, reporting recall@k, latency and index size for each
+    ef_search / probes value. Compact storages re-rank `rerank_candidates`.
+    """
+    async with pool.acquire() as conn:
+        index_sizes = {}
+        for index_type in VECTOR_INDEX_TYPES:
+            size = await conn.fetchval(
+                "SELECT pg_relation_size(to_regclass($1))",
+                vector_index_name(index_type, storage),
+            )
+            if size is not None:
+                index_sizes[index_type] = size
+        dimension = await conn.fetchval(
+            "SELECT vector_dims(embedding) FROM products LIMIT 1"
+        )
+        sample = await _sample_queries(conn, queries)
+        if not sample:
+            raise RuntimeError("The 'products' table is empty.")
+
+        exact_query = SEARCH_QUERY.format(source="products")
+        ann_query = SEARCH_QUERY.format(
+            source=candidates_source(storage, dimension, "$2", rerank_candidates)
+        )
+        exact, exact_latencies = await _run_searches(
+            conn, exact_query, sample, top_k, ["enable_indexscan = off"]
+        )
+        report = [_summarize("exact", exact, exact_latencies, exact, top_k)]
+
+        if "hnsw" in index_sizes:
+            for ef_search in ef_search_values:
+                # HNSW returns at most ef_search candidates to re-rank.
+                if storage != "full":
+                    ef_search = max(ef_search, rerank_candidates)
+                results, latencies = await _run_searches(
+                    conn, ann_query, sample, top_k, [f"hnsw.ef_search = {ef_search}"]
+                )
+                report.append(
+                    _summarize(
+                        f"{storage} hnsw ef_search={ef_search}",
+                        results,
+                        latencies,
+                        exact,
+                        top_k,
+                        index_sizes["hnsw"],
+                    )
+                )
+        if "ivfflat" in index_sizes:
+            for probes in probes_values:
+                results, latencies = await _run_searches(
+                    conn, ann_query, sample, top_k, [f"ivfflat.probes = {probes}"]
+                )
+                report.append(
+                    _summarize(
+                        f"{storage} ivfflat probes={probes}",
+                        results,
+                        latencies,
+                        exact,
+                        top_k,
+                        index_sizes["ivfflat"],
+                    )
+                )
+        if not index_sizes:
+            logger.warning(
+                f"No {storage} ANN index found on 'products'; only exact search was run."
+            )
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Recall-vs-latency report of the products ANN index against exact search."
+    )
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=secrets.TOP_K)
+    parser.add_argument(
+        "--ef-search", type=int, nargs="+", default=[10, 20, 40, 80, 160]
+    )
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 5, 10, 20])
+    parser.add_argument(
+        "--storage",
+        choices=["full", "halfvec", "binary"],
+        default=secrets.VECTOR_STORAGE,
+        help="Vector storage whose index is measured.",
+    )
+    parser.add_argument(
+        "--rerank-candidates", type=int, default=secrets.RERANK_CANDIDATES
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    setup_logging()
+    pool = await asyncpg.create_pool(
+        dsn=secrets.DATABASE_URL, min_size=1, max_size=1, init=register_vector_codecs
+    )
+    try:
+        report = await build_report(
+            pool,
+            args.queries,
+            args.top_k,
+            args.ef_search,
+            args.probes,
+            args.storage,
+            args.rerank_candidates,
+        )
+    finally:
+        await pool.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(
+        f"{'mode':<32}{'recall@k':>10}{'p50 ms':>10}{'p99 ms':>10}{'qps':>10}"
+        f"{'index MB':>10}"
+    )
+    for row in report:
+        print(
+            f"{row['mode']:<32}{row['recall_at_k']:>10}{row['p50_ms']:>10}"
+            f"{row['p99_ms']:>10}{row['qps']:>10}{row['index_mb']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,206 @@
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Iterator
+import asyncpg
+from src.config.logger import setup_logging
+from src.config.pgvector import register_vector_codecs
+from src.config.secrets import secrets
+from src.containers import AppContainer
+from src.repositories import PostgresProductRepository
+from src.repositories.embedding_snapshot import content_hash, normalize
+
+logger = logging.getLogger(__name__)
+
+
+def read_products(path: Path, fmt: str, field: str) -> Iterator[str]:
+    """
+    Streams product descriptions from a JSONL or CSV file. JSONL lines may be
+    plain strings or objects holding the description under `field`.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield row[field]
+            return
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            yield record if isinstance(record, str) else record[field]
+
+
+def chunked(rows: Iterator[str], size: int) -> Iterator[list[str]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Checkpoint:
+    """Records how many input rows are safely stored, to resume after an interruption."""
+
+    def __init__(self, path: Path, source: Path):
+        self._path = path
+        stat = source.stat()
+        self._source = {
+            "path": str(source.resolve()),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+        }
+
+    def load(self) -> int:
+        if not self._path.exists():
+            return 0
+        state = json.loads(self._path.read_text())
+        if state.get("source") != self._source:
+            logger.warning("Input file changed since the last run; starting over.")
+            return 0
+        return state["rows_done"]
+
+    def save(self, rows_done: int):
+        tmp = self._path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"source": self._source, "rows_done": rows_done}))
+        tmp.replace(self._path)
+
+    def clear(self):
+        self._path.unlink(missing_ok=True)
+
+
+async def ingest(
+    pool: asyncpg.Pool,
+    model,
+    path: Path,
+    fmt: str,
+    field: str,
+    chunk_size: int,
+    batch_size: int,
+    checkpoint: Checkpoint,
+) -> dict:
+    """
+    Ingests the file chunk by chunk. Each chunk skips products already stored,
+    embeds the rest in batches and bulk-loads them, while the previous chunk
+    is still being written. At most two chunks are held in memory.
+    """
+    repository = PostgresProductRepository(pool)
+    skip = checkpoint.load()
+    if skip:
+        logger.info(f"Resuming after {skip} rows.")
+
+    rows_done, embedded, written = skip, 0, 0
+    started = time.perf_counter()
+    pending_write: asyncio.Task | None = None
+
+    async def write(records, rows_through: int):
+        nonlocal written
+        written += await repository.upsert_products(records)
+        checkpoint.save(rows_through)
+
+    rows = read_products(path, fmt, field)
+    for _ in range(skip):
+        next(rows, None)
+
+    for chunk in chunked(rows, chunk_size):
+        hashes = [content_hash(text) for text in chunk]
+        stored = await repository.existing_hashes(hashes)
+        new = {h: text for h, text in zip(hashes, chunk) if h not in stored}
+
+        records = []
+        if new:
+            vectors = await asyncio.to_thread(
+                model.encode, list(new.values()), batch_size=batch_size
+            )
+            records = [
+                (text, h, vector)
+                for (h, text), vector in zip(new.items(), normalize(vectors))
+            ]
+            embedded += len(records)
+
+        if pending_write is not None:
+            await pending_write
+        rows_done += len(chunk)
+        pending_write = asyncio.create_task(write(records, rows_done))
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"{rows_done} rows read, {embedded} embedded "
+            f"({(rows_done - skip) / elapsed:.1f} rows/s)."
+        )
+
+    if pending_write is not None:
+        await pending_write
+    checkpoint.clear()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": rows_done - skip,
+        "embedded": embedded,
+        "written": written,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round((rows_done - skip) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Streams products from a JSONL or CSV file into the products table."
+    )
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=["jsonl", "csv"])
+    parser.add_argument(
+        "--field", default="content", help="Column or key holding the description."
+    )
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument(
+        "--batch-size", type=int, default=64, help="Embedding batch size."
+    )
+    parser.add_argument(
+        "--checkpoint", type=Path, help="Defaults to <path>.checkpoint.json"
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="Ignore any saved checkpoint."
+    )
+    args = parser.parse_args()
+
+    setup_logging()
+    fmt = args.format or ("csv" if args.path.suffix.lower() == ".csv" else "jsonl")
+    checkpoint = Checkpoint(
+        args.checkpoint or args.path.with_name(f"{args.path.name}.checkpoint.json"),
+        args.path,
+    )
+    if args.restart:
+        checkpoint.clear()
+
+    model = AppContainer().model_registry().get(secrets.EMBEDDING_MODEL_NAME)
+    pool = await asyncpg.create_pool(
+        dsn=secrets.DATABASE_URL,
+        min_size=1,
+        max_size=2,
+        init=register_vector_codecs,
+    )
+    try:
+        report = await ingest(
+            pool,
+            model,
+            args.path,
+            fmt,
+            args.field,
+            args.chunk_size,
+            args.batch_size,
+            checkpoint,
+        )
+    finally:
+        await pool.close()
+    logger.info(f"Ingestion finished: {report}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,6 +1,19 @@
-from fastapi import APIRouter, status, HTTPException
-from src.models.query import QueryRequest
-from src.config.queue import request_queue
+from fastapi import APIRouter, Request, status, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from src.config.secrets import secrets
+from src.models.query import (
+    BatchQueryRequest,
+    BatchQueryResponse,
+    BatchQueryResult,
+    QueryRequest,
+    QueryResponse,
+)
+from src.models.job import JobStatus
+from src.observability import collect_metrics, CONTENT_TYPE
+from src.orchestration import StageTimeoutError
+from src.queue import QueueFullError
+from src.streaming import TokenStreamError, TokenStreamReset
+import asyncio
 import logging
 from typing import Dict, Any
 import json
@@ -11,18 +24,26 @@ router = APIRouter()
 
 
 @router.post("/query", status_code=status.HTTP_202_ACCEPTED)
-async def accept_query(request: QueryRequest):
+async def accept_query(request: QueryRequest, http_request: Request):
     """
     Validates an user query and adds it to the queue for processing.
-    Responds with 202 Accepted.
+    Responds with 202 Accepted and the job id, or with 429/503 and
+    Retry-After when the user or the queue is at capacity.
     """
     try:
         logger.info(
             f"Query; {request.query} - User: {request.user_id} - Enqueuing for processing."
         )
-        await request_queue.put(request)
-        return {"message": "Request received and is being processed."}
+        job_id = await http_request.app.state.container.request_queue().enqueue(request)
+        return {"message": "Request received and is being processed.", "job_id": job_id}
 
+    except QueueFullError as e:
+        logger.warning(f"Rejected request from user {request.user_id}: {e}")
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         logger.error(f"Failed to enqueue request: {e}")
         raise HTTPException(
@@ -31,6 +52,166 @@ async def accept_query(request: QueryRequest):
         )
 
 
+@router.post("/query/sync", response_model=QueryResponse)
+async def answer_query(request: QueryRequest, http_request: Request):
+    """
+    Answers an user query inline, bypassing the queue and the callback.
+    Responds with 504 when retrieval or generation exceeds its deadline.
+    """
+    orchestrator = http_request.app.state.container.rag_orchestrator()
+    try:
+        answer = await orchestrator.answer_query(
+            user_id=request.user_id, query=request.query
+        )
+    except StageTimeoutError as e:
+        logger.warning(f"Sync query from user {request.user_id} timed out: {e}")
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to answer query: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to answer query.",
+        )
+    return QueryResponse(user_id=request.user_id, answer=answer)
+
+
+@router.post("/query/batch", response_model=BatchQueryResponse)
+async def search_batch(request: BatchQueryRequest, http_request: Request):
+    """
+    Returns the top-k products of each query, without generating answers.
+    The queries are embedded together and searched in one batch, for
+    evaluation and catalogue QA jobs that score many queries at once.
+    """
+    if len(request.queries) > secrets.QUERY_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {secrets.QUERY_BATCH_MAX_SIZE} queries per batch.",
+        )
+    retrieval_service = http_request.app.state.container.retrieval_service()
+    try:
+        results = await retrieval_service.find_similar_products_many(request.queries)
+    except Exception as e:
+        logger.error(f"Failed to search a batch of {len(request.queries)} queries: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to search the queries.",
+        )
+    return BatchQueryResponse(
+        results=[
+            BatchQueryResult(query=query, products=products)
+            for query, products in zip(request.queries, results)
+        ]
+    )
+
+
+@router.get("/stats", status_code=status.HTTP_200_OK)
+async def get_stats(request: Request):
+    """
+    Reports runtime statistics of the processing pipeline.
+    """
+    container = request.app.state.container
+    answer_cache = container.answer_cache()
+    token_stream = container.token_stream()
+    return {
+        "embedding_models": container.model_registry().stats(),
+        "embedding_batcher": container.embedding_batcher().stats(),
+        "embedding_cache": container.embedding_cache().stats(),
+        "result_cache": container.result_cache().stats(),
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "stages": container.stage_timings().stats(),
+        "context_packer": container.context_packer().stats(),
+        "callbacks": container.callback_service().stats(),
+        "token_stream": token_stream.stats() if token_stream else None,
+        "queue": await container.request_queue().stats(),
+    }
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(request: Request):
+    """
+    Exports stage latencies, queue, cache, callback and database pool
+    metrics in the Prometheus text format.
+    """
+    return PlainTextResponse(
+        await collect_metrics(request.app.state.container), media_type=CONTENT_TYPE
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str, request: Request):
+    """
+    Reports the status of a queued query, and its answer once processed.
+    """
+    job = await request.app.state.container.request_queue().get_status(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found."
+        )
+    return job
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str, request: Request):
+    """
+    Streams the answer of a job as Server-Sent Events: a `token` event per
+    generated chunk, then `done`, or `error` if the job failed. A `reset`
+    event means the job is being retried and the tokens so far are void.
+    Tokens generated before the client connected are replayed.
+    """
+    container = request.app.state.container
+    queue = container.request_queue()
+    token_stream = container.token_stream()
+    if token_stream is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Token streaming is disabled.",
+        )
+    if await queue.get_status(job_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found."
+        )
+
+    async def events():
+        sent = 0
+        sent_chars = 0
+        while True:
+            job = await queue.get_status(job_id)
+            finished = job is None or job.status in ("done", "failed")
+            # A finished job whose stream is gone, or never reached this
+            # process, is answered from its status, without the part of the
+            # answer already sent.
+            if finished and not token_stream.has(job_id):
+                if job is not None and job.answer and len(job.answer) > sent_chars:
+                    yield _sse("token", {"token": job.answer[sent_chars:]})
+                if job is not None and job.status == "done":
+                    yield _sse("done", {})
+                else:
+                    yield _sse("error", {"error": job.error if job else None})
+                return
+
+            try:
+                async for token in token_stream.subscribe(job_id, offset=sent):
+                    sent += 1
+                    sent_chars += len(token)
+                    yield _sse("token", {"token": token})
+                yield _sse("done", {})
+                return
+            except TokenStreamError as e:
+                yield _sse("error", {"error": str(e)})
+                return
+            except TokenStreamReset:
+                sent = sent_chars = 0
+                yield _sse("reset", {})
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 # This enpoint simulates the callback from the worker after processing the query.
 @router.post("/callback", status_code=status.HTTP_200_OK)
 async def receive_callback(payload: Dict[str, Any]):
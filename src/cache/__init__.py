@@ -0,0 +1,3 @@
+from .lru_ttl import LRUTTLCache
+from .memory_answer_cache import InMemoryAnswerCache
+from .pg_answer_cache import PostgresAnswerCache
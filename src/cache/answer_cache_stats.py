@@ -0,0 +1,23 @@
+class AnswerCacheStats:
+    """Hit/miss counters and generation time saved by an answer cache."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def record_hit(self, generation_seconds: float):
+        self.hits += 1
+        self.saved_seconds += generation_seconds
+
+    def record_miss(self):
+        self.misses += 1
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+        }
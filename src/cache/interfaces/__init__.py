@@ -0,0 +1 @@
+from .answer_cache_interface import AnswerCacheInterface
@@ -0,0 +1,30 @@
+from abc import ABC, abstractmethod
+import numpy as np
+
+
+class AnswerCacheInterface(ABC):
+    """Defines the contract for the semantic answer cache used by the responder."""
+
+    @abstractmethod
+    async def lookup(self, embedding: np.ndarray, product_ids: list[int]) -> str | None:
+        """
+        Returns a stored answer whose query is within the configured cosine
+        distance of `embedding` and that was generated from the same products.
+        """
+        pass
+
+    @abstractmethod
+    async def store(
+        self,
+        embedding: np.ndarray,
+        product_ids: list[int],
+        answer: str,
+        generation_seconds: float,
+    ) -> None:
+        """Stores a generated answer along with how long it took to generate."""
+        pass
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Returns hit rate and generation time saved by the cache."""
+        pass
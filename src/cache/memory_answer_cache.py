@@ -0,0 +1,99 @@
+import time
+from collections import OrderedDict
+import numpy as np
+from .interfaces import AnswerCacheInterface
+from .answer_cache_stats import AnswerCacheStats
+
+
+class _Entry:
+    __slots__ = ("key", "embedding", "answer", "generation_seconds", "expires_at")
+
+    def __init__(self, key, embedding, answer, generation_seconds, expires_at):
+        self.key = key
+        self.embedding = embedding
+        self.answer = answer
+        self.generation_seconds = generation_seconds
+        self.expires_at = expires_at
+
+
+class InMemoryAnswerCache(AnswerCacheInterface):
+    """
+    In-process answer cache with LRU eviction and a TTL. Entries are grouped by
+    their product ids, so a lookup only compares against queries that
+    retrieved the same products.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, max_distance: float):
+        self._max_entries = max(1, max_entries)
+        self._ttl = ttl_seconds
+        self._max_distance = max_distance
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._by_products: dict[tuple[int, ...], set[int]] = {}
+        self._next_id = 0
+        self._stats = AnswerCacheStats()
+
+    async def lookup(self, embedding: np.ndarray, product_ids: list[int]) -> str | None:
+        key = self._products_key(product_ids)
+        query = self._normalize(embedding)
+        now = time.monotonic()
+
+        best_id, best_distance = None, self._max_distance
+        for entry_id in list(self._by_products.get(key, ())):
+            entry = self._entries[entry_id]
+            if entry.expires_at < now:
+                self._remove(entry_id)
+                continue
+            distance = 1.0 - float(np.dot(query, entry.embedding))
+            if distance <= best_distance:
+                best_id, best_distance = entry_id, distance
+
+        if best_id is None:
+            self._stats.record_miss()
+            return None
+
+        self._entries.move_to_end(best_id)
+        entry = self._entries[best_id]
+        self._stats.record_hit(entry.generation_seconds)
+        return entry.answer
+
+    async def store(
+        self,
+        embedding: np.ndarray,
+        product_ids: list[int],
+        answer: str,
+        generation_seconds: float,
+    ) -> None:
+        key = self._products_key(product_ids)
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = _Entry(
+            key,
+            self._normalize(embedding),
+            answer,
+            generation_seconds,
+            time.monotonic() + self._ttl,
+        )
+        self._by_products.setdefault(key, set()).add(entry_id)
+
+        while len(self._entries) > self._max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), **self._stats.as_dict()}
+
+    def _remove(self, entry_id: int):
+        entry = self._entries.pop(entry_id)
+        siblings = self._by_products[entry.key]
+        siblings.discard(entry_id)
+        if not siblings:
+            del self._by_products[entry.key]
+
+    @staticmethod
+    def _products_key(product_ids: list[int]) -> tuple[int, ...]:
+        return tuple(sorted(product_ids))
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
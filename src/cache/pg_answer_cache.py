@@ -0,0 +1,85 @@
+import logging
+import numpy as np
+from .interfaces import AnswerCacheInterface
+from .answer_cache_stats import AnswerCacheStats
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresAnswerCache(AnswerCacheInterface):
+    """
+    Answer cache stored in the `answer_cache` table, so it is shared by every
+    worker process. Query similarity is computed by pgvector.
+    """
+
+    def __init__(self, db, ttl_seconds: float, max_distance: float):
+        self._db = db
+        self._ttl = ttl_seconds
+        self._max_distance = max_distance
+        self._stats = AnswerCacheStats()
+
+    async def lookup(self, embedding: np.ndarray, product_ids: list[int]) -> str | None:
+        try:
+            async with self._db.acquire() as conn:
+                record = await conn.fetchrow(
+                    """
+                    SELECT answer, generation_ms
+                    FROM answer_cache
+                    WHERE product_ids = $2
+                      AND created_at > now() - make_interval(secs => $4)
+                      AND query_embedding <=> $1 <= $3
+                    ORDER BY query_embedding <=> $1
+                    LIMIT 1
+                    """,
+                    embedding,
+                    sorted(product_ids),
+                    self._max_distance,
+                    self._ttl,
+                )
+        except Exception as e:
+            logger.exception(f"Failed to look up cached answer: {e}")
+            self._stats.record_miss()
+            return None
+
+        if record is None:
+            self._stats.record_miss()
+            return None
+
+        self._stats.record_hit(record["generation_ms"] / 1000)
+        return record["answer"]
+
+    async def store(
+        self,
+        embedding: np.ndarray,
+        product_ids: list[int],
+        answer: str,
+        generation_seconds: float,
+    ) -> None:
+        ids = sorted(product_ids)
+        try:
+            async with self._db.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute(
+                        """
+                        DELETE FROM answer_cache
+                        WHERE product_ids = $1
+                          AND created_at <= now() - make_interval(secs => $2)
+                        """,
+                        ids,
+                        self._ttl,
+                    )
+                    await conn.execute(
+                        """
+                        INSERT INTO answer_cache (product_ids, query_embedding, answer, generation_ms)
+                        VALUES ($1, $2, $3, $4)
+                        """,
+                        ids,
+                        embedding,
+                        answer,
+                        generation_seconds * 1000,
+                    )
+        except Exception as e:
+            logger.exception(f"Failed to store cached answer: {e}")
+
+    def stats(self) -> dict:
+        return self._stats.as_dict()
@@ -1,5 +1,6 @@
 import logging
 import asyncpg
+from .secrets import secrets
 
 logger = logging.getLogger(__name__)
 db_pool: asyncpg.Pool | None = None
@@ -12,3 +13,19 @@ def get_db_pool() -> asyncpg.Pool:
     if db_pool is None:
         raise RuntimeError("Database connection pool is not initialized.")
     return db_pool
+
+
+def vector_search_settings() -> dict[str, str]:
+    """
+    Returns the pgvector query-time settings applied to every pooled
+    connection, so individual searches need no extra round trip. HNSW
+    returns at most ef_search rows, so with a compact vector storage it is
+    raised to the number of candidates re-ranked.
+    """
+    ef_search = secrets.HNSW_EF_SEARCH
+    if secrets.VECTOR_STORAGE != "full":
+        ef_search = max(ef_search, secrets.RERANK_CANDIDATES)
+    return {
+        "hnsw.ef_search": str(ef_search),
+        "ivfflat.probes": str(secrets.IVFFLAT_PROBES),
+    }
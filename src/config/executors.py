@@ -0,0 +1,18 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def init_embedding_executor(max_workers: int):
+    """
+    Provides the thread pool that runs embedding model calls, so that
+    CPU-bound encoding never blocks the event loop serving the API.
+    """
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="embedding"
+    )
+    logger.info(f"Embedding executor started with {max_workers} threads.")
+    yield executor
+    executor.shutdown(wait=True, cancel_futures=True)
+    logger.info("Embedding executor shut down.")
@@ -0,0 +1,30 @@
+import logging
+import httpx
+from .secrets import secrets
+
+logger = logging.getLogger(__name__)
+http_client: httpx.AsyncClient | None = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Creates the long-lived, pooled HTTP client used for webhook callbacks.
+    Connections are kept alive and reused across requests.
+    """
+    return httpx.AsyncClient(
+        http2=secrets.CALLBACK_HTTP2,
+        timeout=secrets.CALLBACK_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=secrets.CALLBACK_MAX_CONNECTIONS,
+            max_keepalive_connections=secrets.CALLBACK_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the active HTTP client.
+    """
+    if http_client is None:
+        raise RuntimeError("HTTP client is not initialized.")
+    return http_client
@@ -0,0 +1,60 @@
+import struct
+import asyncpg
+import numpy as np
+
+# pgvector's binary format: int16 dimension, int16 unused, then the values
+# in network byte order, float32 for `vector` and float16 for `halfvec`.
+_HEADER = struct.Struct(">HH")
+_ELEMENT_TYPES = {"vector": np.dtype(">f4"), "halfvec": np.dtype(">f2")}
+
+
+def _encoder(element_type: np.dtype):
+    def encode(value) -> bytes:
+        array = np.asarray(value, dtype=element_type)
+        if array.ndim != 1:
+            raise ValueError(f"Expected a 1-D embedding, got shape {array.shape}.")
+        return _HEADER.pack(len(array), 0) + array.tobytes()
+
+    return encode
+
+
+def _decoder(element_type: np.dtype):
+    def decode(data: bytes) -> np.ndarray:
+        dimension, _ = _HEADER.unpack_from(data)
+        return np.frombuffer(
+            data, dtype=element_type, count=dimension, offset=_HEADER.size
+        ).astype(np.float32)
+
+    return decode
+
+
+encode_vector = _encoder(_ELEMENT_TYPES["vector"])
+decode_vector = _decoder(_ELEMENT_TYPES["vector"])
+encode_halfvec = _encoder(_ELEMENT_TYPES["halfvec"])
+decode_halfvec = _decoder(_ELEMENT_TYPES["halfvec"])
+
+
+async def register_vector_codecs(conn: asyncpg.Connection):
+    """
+    Registers binary codecs for the pgvector types installed in the database,
+    so embeddings are sent from and returned as float32 NumPy arrays instead
+    of being formatted and parsed as text. Meant as the `init` of a pool;
+    types that do not exist yet (before `CREATE EXTENSION`) are skipped.
+    """
+    records = await conn.fetch(
+        """
+        SELECT t.typname, n.nspname FROM pg_type t
+        JOIN pg_namespace n ON n.oid = t.typnamespace
+        WHERE t.typname = ANY($1::text[])
+        """,
+        list(_ELEMENT_TYPES),
+    )
+    for record in records:
+        element_type = _ELEMENT_TYPES[record["typname"]]
+        await conn.set_type_codec(
+            record["typname"],
+            schema=record["nspname"],
+            encoder=_encoder(element_type),
+            decoder=_decoder(element_type),
+            format="binary",
+        )
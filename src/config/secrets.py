@@ -1,3 +1,4 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -13,8 +14,100 @@ class Secrets(BaseSettings):
     DATABASE_URL: str
     EMBEDDING_MODEL_NAME: str
     LOG_LEVEL: str = "INFO"
+    TRACING_ENABLED: bool = False
     CALLBACK_URL: str
+    CALLBACK_TIMEOUT_SECONDS: float = 10.0
+    CALLBACK_HTTP2: bool = True
+    CALLBACK_MAX_CONNECTIONS: int = 20
+    CALLBACK_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    CALLBACK_MAX_RETRIES: int = 3
+    CALLBACK_RETRY_BACKOFF_SECONDS: float = 0.5
+    CALLBACK_BATCH_SIZE: int = 1
+    CALLBACK_BATCH_WAIT_MS: float = 50.0
     TOP_K: int = 5
+    RETRIEVAL_MODE: str = "vector"
+    HYBRID_VECTOR_WEIGHT: float = 1.0
+    HYBRID_KEYWORD_WEIGHT: float = 1.0
+    HYBRID_CANDIDATES: int = 50
+    RETRIEVAL_BRANCHES: str = "vector"
+    RETRIEVAL_BRANCH_TIMEOUT_SECONDS: float = 2.0
+    RRF_K: int = 60
+    OPENAI_MODEL: str = "gpt-3.5-turbo"
+    CONTEXT_TOKEN_BUDGET: int = 1_500
+    CONTEXT_MMR_LAMBDA: float = 0.7
+    CONTEXT_DUPLICATE_THRESHOLD: float = 0.95
+    CONTEXT_TOKEN_CACHE_SIZE: int = 10_000
+    DB_RESET_ON_STARTUP: bool = False
+    EMBEDDING_SNAPSHOT_DIR: str = "data/embeddings"
+    PRODUCT_REPOSITORY: str = "postgres"
+
+    VECTOR_INDEX_TYPE: str = "hnsw"
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 64
+    HNSW_EF_SEARCH: int = 40
+    IVFFLAT_LISTS: int = 100
+    IVFFLAT_PROBES: int = 10
+    VECTOR_STORAGE: str = "full"
+    RERANK_CANDIDATES: int = 40
+    EMBEDDING_WARM_UP: bool = True
+    EMBEDDING_BACKEND: str = "torch"
+    EMBEDDING_MODEL_DIR: str = "data/models"
+    EMBEDDING_ONNX_QUANTIZATION: str = "avx2"
+    EMBEDDING_ONNX_THREADS: int = 0
+    EMBEDDING_MAX_WORKERS: int = 2
+    EMBEDDING_BATCH_MAX_SIZE: int = 32
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+    EMBEDDING_CACHE_SIZE: int = 10_000
+    EMBEDDING_CACHE_TTL_SECONDS: float = 3600.0
+    RESULT_CACHE_SIZE: int = 10_000
+    RESULT_CACHE_TTL_SECONDS: float = 300.0
+    ANSWER_CACHE_BACKEND: str = "none"
+    ANSWER_CACHE_SIZE: int = 1_000
+    ANSWER_CACHE_TTL_SECONDS: float = 86_400.0
+    ANSWER_CACHE_MAX_DISTANCE: float = 0.05
+    TOKEN_STREAM_BACKEND: str = "memory"
+    TOKEN_STREAM_MAX_JOBS: int = 1_000
+    TOKEN_STREAM_TTL_SECONDS: float = 300.0
+    TOKEN_STREAM_KEEPALIVE_SECONDS: float = 15.0
+
+    QUEUE_CAPACITY: int = 1_000
+    QUEUE_MAX_PER_USER: int = 20
+    QUEUE_BACKEND: str = "memory"
+    QUEUE_USER_PRIORITIES: str = ""
+    JOB_VISIBILITY_TIMEOUT_SECONDS: float = 120.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_POLL_INTERVAL_SECONDS: float = 5.0
+    JOB_RETENTION_SECONDS: float = 86_400.0
+    RUN_WORKERS: bool = True
+
+    WORKER_CONCURRENCY: int = 8
+    WORKER_SHUTDOWN_TIMEOUT: float = 30.0
+    RETRIEVAL_MAX_IN_FLIGHT: int = 8
+    GENERATION_MAX_IN_FLIGHT: int = 8
+    CALLBACK_MAX_IN_FLIGHT: int = 16
+    SYNC_RETRIEVAL_TIMEOUT_SECONDS: float = 2.0
+    QUERY_BATCH_MAX_SIZE: int = 256
+    SYNC_GENERATION_TIMEOUT_SECONDS: float = 20.0
+
+    @model_validator(mode="after")
+    def check_keyword_search_support(self):
+        """
+        The numpy repository only searches embeddings, so refuse to start
+        with a retrieval setup that needs keyword search instead of failing
+        on every query.
+        """
+        if self.PRODUCT_REPOSITORY == "numpy":
+            if self.RETRIEVAL_MODE == "hybrid":
+                raise ValueError(
+                    "RETRIEVAL_MODE=hybrid needs keyword search, which "
+                    "PRODUCT_REPOSITORY=numpy does not support."
+                )
+            if self.RETRIEVAL_BRANCHES != "vector":
+                raise ValueError(
+                    f"RETRIEVAL_BRANCHES={self.RETRIEVAL_BRANCHES} needs keyword "
+                    "search, which PRODUCT_REPOSITORY=numpy does not support."
+                )
+        return self
 
 
 secrets = Secrets()
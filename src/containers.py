@@ -1,12 +1,30 @@
 from dependency_injector import containers, providers
 from src.config.secrets import secrets
-from src.repositories import PostgresProductRepository
+from src.cache import LRUTTLCache, InMemoryAnswerCache, PostgresAnswerCache
+from src.queue import FairRequestQueue, PostgresJobQueue, parse_user_priorities
+from src.streaming import InMemoryTokenStream, PostgresTokenStream
+from src.repositories import (
+    PostgresProductRepository,
+    CachingProductRepository,
+    NumpyProductRepository,
+)
 from src.services import (
     ProductRetrievalService,
+    KeywordRetrievalService,
+    EmbeddingBatcher,
     OpenAIGenerationService,
     WebhookCallbackService,
+    ContextPacker,
+)
+from src.embeddings import (
+    ModelRegistry,
+    TorchEmbeddingBackend,
+    OnnxEmbeddingBackend,
 )
+from src.observability import StageTimings, Tracer
 from src.orchestration import LangGraphOrchestrator
+from src.workers import WorkerPool
+from src.config.executors import init_embedding_executor
 
 
 class AppContainer(containers.DeclarativeContainer):
@@ -16,20 +34,211 @@ class AppContainer(containers.DeclarativeContainer):
 
     config = providers.Configuration(pydantic_settings=[secrets])
     db_pool = providers.Singleton(object)
+    http_client = providers.Singleton(object)
+
+    stage_timings = providers.Singleton(StageTimings)
+    tracer = providers.Singleton(Tracer, enabled=config.TRACING_ENABLED)
+
+    result_cache = providers.Singleton(
+        LRUTTLCache,
+        max_size=config.RESULT_CACHE_SIZE,
+        ttl_seconds=config.RESULT_CACHE_TTL_SECONDS,
+    )
+
+    product_repo = providers.Singleton(
+        CachingProductRepository,
+        repository=providers.Selector(
+            config.PRODUCT_REPOSITORY,
+            postgres=providers.Singleton(
+                PostgresProductRepository,
+                db=db_pool,
+                vector_weight=config.HYBRID_VECTOR_WEIGHT,
+                keyword_weight=config.HYBRID_KEYWORD_WEIGHT,
+                hybrid_candidates=config.HYBRID_CANDIDATES,
+                rrf_k=config.RRF_K,
+                storage=config.VECTOR_STORAGE,
+                rerank_candidates=config.RERANK_CANDIDATES,
+            ),
+            numpy=providers.Singleton(
+                NumpyProductRepository,
+                db=db_pool,
+                snapshot_dir=config.EMBEDDING_SNAPSHOT_DIR,
+                model_name=config.EMBEDDING_MODEL_NAME,
+            ),
+        ),
+        cache=result_cache,
+        timings=stage_timings,
+    )
+
+    embedding_executor = providers.Resource(
+        init_embedding_executor, max_workers=config.EMBEDDING_MAX_WORKERS
+    )
 
-    product_repo = providers.Singleton(PostgresProductRepository, db=db_pool)
+    embedding_backend = providers.Selector(
+        config.EMBEDDING_BACKEND,
+        torch=providers.Singleton(TorchEmbeddingBackend),
+        onnx=providers.Singleton(
+            OnnxEmbeddingBackend,
+            model_dir=config.EMBEDDING_MODEL_DIR,
+            quantization=config.EMBEDDING_ONNX_QUANTIZATION,
+            threads=config.EMBEDDING_ONNX_THREADS,
+        ),
+    )
+
+    model_registry = providers.Singleton(ModelRegistry, backend=embedding_backend)
+
+    embedding_model = providers.Callable(
+        ModelRegistry.get, model_registry, config.EMBEDDING_MODEL_NAME
+    )
+
+    embedding_batcher = providers.Singleton(
+        EmbeddingBatcher,
+        model=embedding_model,
+        executor=embedding_executor,
+        max_batch_size=config.EMBEDDING_BATCH_MAX_SIZE,
+        max_wait_ms=config.EMBEDDING_BATCH_MAX_WAIT_MS,
+        timings=stage_timings,
+    )
+
+    embedding_cache = providers.Singleton(
+        LRUTTLCache,
+        max_size=config.EMBEDDING_CACHE_SIZE,
+        ttl_seconds=config.EMBEDDING_CACHE_TTL_SECONDS,
+    )
 
     retrieval_service = providers.Factory(
-        ProductRetrievalService, repository=product_repo
+        ProductRetrievalService,
+        repository=product_repo,
+        embedder=embedding_batcher,
+        embedding_cache=embedding_cache,
+        mode=config.RETRIEVAL_MODE,
+    )
+
+    keyword_retrieval_service = providers.Factory(
+        KeywordRetrievalService, repository=product_repo
+    )
+
+    retrieval_branches = providers.Selector(
+        config.RETRIEVAL_BRANCHES,
+        vector=providers.Dict(),
+        vector_keyword=providers.Dict(keyword=keyword_retrieval_service),
     )
 
     generation_service = providers.Factory(OpenAIGenerationService)
 
-    callback_service = providers.Factory(WebhookCallbackService)
+    callback_service = providers.Singleton(
+        WebhookCallbackService,
+        client=http_client,
+        url=config.CALLBACK_URL,
+        max_retries=config.CALLBACK_MAX_RETRIES,
+        retry_backoff_seconds=config.CALLBACK_RETRY_BACKOFF_SECONDS,
+        batch_size=config.CALLBACK_BATCH_SIZE,
+        batch_wait_ms=config.CALLBACK_BATCH_WAIT_MS,
+        max_in_flight=config.CALLBACK_MAX_IN_FLIGHT,
+        timings=stage_timings,
+    )
+
+    answer_cache = providers.Selector(
+        config.ANSWER_CACHE_BACKEND,
+        none=providers.Object(None),
+        memory=providers.Singleton(
+            InMemoryAnswerCache,
+            max_entries=config.ANSWER_CACHE_SIZE,
+            ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS,
+            max_distance=config.ANSWER_CACHE_MAX_DISTANCE,
+        ),
+        postgres=providers.Singleton(
+            PostgresAnswerCache,
+            db=db_pool,
+            ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS,
+            max_distance=config.ANSWER_CACHE_MAX_DISTANCE,
+        ),
+    )
+
+    token_stream = providers.Selector(
+        config.TOKEN_STREAM_BACKEND,
+        none=providers.Object(None),
+        memory=providers.Singleton(
+            InMemoryTokenStream,
+            max_jobs=config.TOKEN_STREAM_MAX_JOBS,
+            ttl_seconds=config.TOKEN_STREAM_TTL_SECONDS,
+            idle_timeout=config.TOKEN_STREAM_KEEPALIVE_SECONDS,
+        ),
+        postgres=providers.Singleton(
+            PostgresTokenStream,
+            db=db_pool,
+            max_jobs=config.TOKEN_STREAM_MAX_JOBS,
+            ttl_seconds=config.TOKEN_STREAM_TTL_SECONDS,
+            idle_timeout=config.TOKEN_STREAM_KEEPALIVE_SECONDS,
+        ),
+    )
 
-    rag_orchestrator = providers.Factory(
+    context_packer = providers.Singleton(
+        ContextPacker,
+        model_name=config.OPENAI_MODEL,
+        token_budget=config.CONTEXT_TOKEN_BUDGET,
+        mmr_lambda=config.CONTEXT_MMR_LAMBDA,
+        duplicate_threshold=config.CONTEXT_DUPLICATE_THRESHOLD,
+        token_cache=providers.Singleton(
+            LRUTTLCache, max_size=config.CONTEXT_TOKEN_CACHE_SIZE
+        ),
+        prompt=providers.Callable(OpenAIGenerationService.prompt_text),
+        separator=OpenAIGenerationService.CONTEXT_SEPARATOR,
+    )
+
+    rag_orchestrator = providers.Singleton(
         LangGraphOrchestrator,
         retrieval_service=retrieval_service,
         generation_service=generation_service,
         callback_service=callback_service,
+        stage_limits=providers.Dict(
+            retriever=config.RETRIEVAL_MAX_IN_FLIGHT,
+            responder=config.GENERATION_MAX_IN_FLIGHT,
+        ),
+        answer_cache=answer_cache,
+        token_stream=token_stream,
+        stage_deadlines=providers.Dict(
+            retriever=config.SYNC_RETRIEVAL_TIMEOUT_SECONDS,
+            responder=config.SYNC_GENERATION_TIMEOUT_SECONDS,
+        ),
+        retrieval_branches=retrieval_branches,
+        branch_timeout=config.RETRIEVAL_BRANCH_TIMEOUT_SECONDS,
+        fusion_k=config.RRF_K,
+        context_packer=context_packer,
+        timings=stage_timings,
+        tracer=tracer,
+    )
+
+    user_priorities = providers.Singleton(
+        parse_user_priorities, config.QUEUE_USER_PRIORITIES
+    )
+
+    request_queue = providers.Selector(
+        config.QUEUE_BACKEND,
+        memory=providers.Singleton(
+            FairRequestQueue,
+            capacity=config.QUEUE_CAPACITY,
+            per_user_capacity=config.QUEUE_MAX_PER_USER,
+            user_priorities=user_priorities,
+        ),
+        postgres=providers.Singleton(
+            PostgresJobQueue,
+            db=db_pool,
+            capacity=config.QUEUE_CAPACITY,
+            per_user_capacity=config.QUEUE_MAX_PER_USER,
+            visibility_timeout=config.JOB_VISIBILITY_TIMEOUT_SECONDS,
+            max_attempts=config.JOB_MAX_ATTEMPTS,
+            poll_interval=config.JOB_POLL_INTERVAL_SECONDS,
+            retention_seconds=config.JOB_RETENTION_SECONDS,
+            user_priorities=user_priorities,
+        ),
+    )
+
+    worker_pool = providers.Singleton(
+        WorkerPool,
+        orchestrator=rag_orchestrator,
+        queue=request_queue,
+        concurrency=config.WORKER_CONCURRENCY,
+        shutdown_timeout=config.WORKER_SHUTDOWN_TIMEOUT,
+        timings=stage_timings,
     )
@@ -0,0 +1,3 @@
+from .model_registry import ModelRegistry
+from .torch_backend import TorchEmbeddingBackend
+from .onnx_backend import OnnxEmbeddingBackend
@@ -0,0 +1 @@
+from .embedding_backend_interface import EmbeddingBackendInterface
@@ -0,0 +1,15 @@
+from abc import ABC, abstractmethod
+
+
+class EmbeddingBackendInterface(ABC):
+    """
+    Defines the contract for an embedding backend. A backend loads models
+    that encode texts with `encode(texts, batch_size=..., convert_to_numpy=True)`.
+    """
+
+    name: str
+
+    @abstractmethod
+    def load(self, model_name: str):
+        """Loads the model, preparing it first if needed."""
+        pass
@@ -0,0 +1,73 @@
+import logging
+import threading
+import time
+from typing import Any
+from .interfaces import EmbeddingBackendInterface
+from .torch_backend import TorchEmbeddingBackend
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_TEXTS = ("warm-up query", "a product description used to warm up the model")
+
+
+class ModelRegistry:
+    """
+    Loads each embedding model once per process, with the given backend
+    (PyTorch by default), and shares it.
+
+    Heavy libraries are imported on the first load rather than when the
+    application is imported. Load and warm-up times are reported by `stats`.
+    """
+
+    def __init__(self, backend: EmbeddingBackendInterface | None = None):
+        self._backend = backend or TorchEmbeddingBackend()
+        self._models: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._load_seconds: dict[str, float] = {}
+        self._warm_up_seconds: dict[str, float] = {}
+
+    def get(self, model_name: str):
+        """Returns the model, loading it on first use."""
+        model = self._models.get(model_name)
+        if model is not None:
+            return model
+        with self._lock:
+            if model_name not in self._models:
+                logger.info(
+                    f"Loading embedding model '{model_name}' ({self._backend.name})..."
+                )
+                started = time.perf_counter()
+                self._models[model_name] = self._backend.load(model_name)
+                self._load_seconds[model_name] = time.perf_counter() - started
+                logger.info(
+                    f"Loaded embedding model '{model_name}' "
+                    f"in {self._load_seconds[model_name]:.2f}s."
+                )
+            return self._models[model_name]
+
+    def warm_up(self, model_name: str, texts: tuple[str, ...] = WARM_UP_TEXTS) -> float:
+        """
+        Loads the model and runs one encode, so the first request does not pay
+        for lazy initialization. Returns the warm-up time in seconds.
+        """
+        model = self.get(model_name)
+        started = time.perf_counter()
+        model.encode(list(texts), batch_size=len(texts), convert_to_numpy=True)
+        elapsed = time.perf_counter() - started
+        self._warm_up_seconds[model_name] = elapsed
+        logger.info(f"Warmed up embedding model '{model_name}' in {elapsed:.2f}s.")
+        return elapsed
+
+    def stats(self) -> dict:
+        return {
+            model_name: {
+                "backend": self._backend.name,
+                "load_ms": 1000 * self._load_seconds[model_name],
+                "warm_up_ms": (
+                    1000 * self._warm_up_seconds[model_name]
+                    if model_name in self._warm_up_seconds
+                    else None
+                ),
+            }
+            for model_name in self._models
+        }
@@ -0,0 +1,84 @@
+import logging
+from pathlib import Path
+from .interfaces import EmbeddingBackendInterface
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_CONFIGS = ("arm64", "avx2", "avx512", "avx512_vnni")
+
+
+class OnnxEmbeddingBackend(EmbeddingBackendInterface):
+    """
+    Runs sentence-transformers models with ONNX Runtime on the CPU.
+
+    Models are kept in `model_dir`, one directory per model. On first use
+    the model is saved there, exported to ONNX, and, unless `quantization`
+    is "none", dynamically quantized to int8 for the given instruction set.
+    Later loads reuse the exported files. Needs `optimum[onnxruntime]`,
+    installed from requirements-onnx.txt.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_dir: str, quantization: str = "avx2", threads: int = 0):
+        if quantization not in ("none", *QUANTIZATION_CONFIGS):
+            raise ValueError(f"Unknown ONNX quantization: {quantization!r}")
+        self._model_dir = Path(model_dir)
+        self._quantization = quantization
+        self._threads = threads
+
+    def model_path(self, model_name: str) -> Path:
+        path = Path(model_name)
+        if (path / "modules.json").exists():
+            return path
+        return self._model_dir / model_name.replace("/", "__")
+
+    def file_name(self) -> str:
+        if self._quantization == "none":
+            return "onnx/model.onnx"
+        return f"onnx/model_qint8_{self._quantization}.onnx"
+
+    def load(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        path = self.model_path(model_name)
+        if not (path / "modules.json").exists():
+            logger.info(f"Saving embedding model '{model_name}' to {path}...")
+            SentenceTransformer(model_name, device="cpu").save(str(path))
+        if not (path / self.file_name()).exists():
+            self._export(path)
+
+        model_kwargs = {
+            "file_name": self.file_name(),
+            "provider": "CPUExecutionProvider",
+        }
+        if self._threads > 0:
+            import onnxruntime
+
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = self._threads
+            model_kwargs["session_options"] = options
+        return SentenceTransformer(
+            str(path), backend="onnx", device="cpu", model_kwargs=model_kwargs
+        )
+
+    def _export(self, path: Path):
+        """Exports the model in `path` to ONNX, then quantizes it."""
+        from sentence_transformers import (
+            SentenceTransformer,
+            export_dynamic_quantized_onnx_model,
+        )
+
+        if not (path / "onnx" / "model.onnx").exists():
+            logger.info(f"Exporting {path} to ONNX...")
+            model = SentenceTransformer(str(path), backend="onnx", device="cpu")
+            model.save(str(path))
+        if self._quantization != "none":
+            logger.info(f"Quantizing {path} to int8 for {self._quantization}...")
+            model = SentenceTransformer(
+                str(path),
+                backend="onnx",
+                device="cpu",
+                model_kwargs={"file_name": "onnx/model.onnx"},
+            )
+            export_dynamic_quantized_onnx_model(model, self._quantization, str(path))
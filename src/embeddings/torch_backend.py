@@ -0,0 +1,13 @@
+from .interfaces import EmbeddingBackendInterface
+
+
+class TorchEmbeddingBackend(EmbeddingBackendInterface):
+    """Runs sentence-transformers models with PyTorch."""
+
+    name = "torch"
+
+    def load(self, model_name: str):
+        # Imported here so that torch is only loaded with a model.
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(model_name)
@@ -1,2 +1,10 @@
-from .query import QueryRequest, ProductDocument
+from .query import (
+    QueryRequest,
+    QueryResponse,
+    ProductDocument,
+    BatchQueryRequest,
+    BatchQueryResult,
+    BatchQueryResponse,
+)
 from .orchestration import AgentState
+from .job import Job, JobStatus
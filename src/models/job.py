@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Literal
+from pydantic import BaseModel
+from src.models.query import QueryRequest
+
+
+class Job(BaseModel):
+    id: str
+    request: QueryRequest
+    priority: Literal["high", "normal", "low"] = "normal"
+    attempts: int = 0
+    # Attempts the queue makes before the job is failed for good.
+    max_attempts: int = 1
+    # Seconds between the job becoming visible and the latest dequeue.
+    waited_seconds: float = 0.0
+
+
+class JobStatus(BaseModel):
+    id: str
+    user_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    attempts: int = 0
+    created_at: datetime
+    updated_at: datetime
+    answer: str | None = None
+    error: str | None = None
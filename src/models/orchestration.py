@@ -1,10 +1,25 @@
+import operator
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Annotated, Any, List
 from src.models.query import ProductDocument
 
 
+def merge_candidates(
+    left: dict[str, List[ProductDocument]], right: dict[str, List[ProductDocument]]
+) -> dict[str, List[ProductDocument]]:
+    """Combines the results of retrieval branches that ran concurrently."""
+    return {**left, **right}
+
+
 class AgentState(BaseModel):
     user_id: str = ""
+    job_id: str | None = None
     query: str = ""
+    candidates: Annotated[dict[str, List[ProductDocument]], merge_candidates] = Field(
+        default_factory=dict
+    )
+    failed_branches: Annotated[List[str], operator.add] = Field(default_factory=list)
     documents: List[ProductDocument] = Field(default_factory=list)
     response: str = ""
+    query_embedding: Any = Field(None, exclude=True)
+    cache_hit: bool = False
@@ -1,4 +1,5 @@
-from pydantic import BaseModel, Field
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class QueryRequest(BaseModel):
@@ -6,7 +7,28 @@ class QueryRequest(BaseModel):
     query: str
 
 
+class QueryResponse(BaseModel):
+    user_id: str
+    answer: str
+
+
 class ProductDocument(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     id: int
     content: str
-    embeddings: list[float] = Field(None, exclude=True)
+    # Repositories return NumPy arrays, decoded straight from pgvector.
+    embeddings: list[float] | np.ndarray | None = Field(None, exclude=True)
+
+
+class BatchQueryRequest(BaseModel):
+    queries: list[str] = Field(min_length=1)
+
+
+class BatchQueryResult(BaseModel):
+    query: str
+    products: list[ProductDocument]
+
+
+class BatchQueryResponse(BaseModel):
+    results: list[BatchQueryResult]
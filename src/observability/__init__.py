@@ -0,0 +1,3 @@
+from .timings import StageTimings
+from .tracing import Tracer
+from .prometheus import MetricsWriter, collect_metrics, CONTENT_TYPE
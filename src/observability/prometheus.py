@@ -0,0 +1,183 @@
+import math
+import asyncpg
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds of the embedding batch size histogram buckets.
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+class MetricsWriter:
+    """Builds a page in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._families: dict[str, tuple[str, str, list[str]]] = {}
+
+    def _family(self, name: str, kind: str, help: str) -> list[str]:
+        if name not in self._families:
+            self._families[name] = (kind, help, [])
+        return self._families[name][2]
+
+    def counter(self, name: str, help: str, value: float, **labels):
+        self._family(name, "counter", help).append(
+            f"{name}{_format_labels(labels)} {_format_value(value)}"
+        )
+
+    def gauge(self, name: str, help: str, value: float, **labels):
+        self._family(name, "gauge", help).append(
+            f"{name}{_format_labels(labels)} {_format_value(value)}"
+        )
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        buckets: list[tuple[float, int]],
+        sum: float,
+        count: int,
+        **labels,
+    ):
+        """Adds a histogram from cumulative (upper bound, count) buckets."""
+        lines = self._family(name, "histogram", help)
+        for bound, cumulative in [*buckets, (math.inf, count)]:
+            bucket_labels = {**labels, "le": _format_value(float(bound))}
+            lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(float(sum))}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    def render(self) -> str:
+        lines = []
+        for name, (kind, help, samples) in self._families.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def _batch_size_buckets(batch_sizes: dict[int, int]) -> list[tuple[float, int]]:
+    return [
+        (bound, sum(n for size, n in batch_sizes.items() if size <= bound))
+        for bound in BATCH_SIZE_BUCKETS
+    ]
+
+
+async def collect_metrics(container) -> str:
+    """Renders the pipeline's metrics from the services of the container."""
+    writer = MetricsWriter()
+
+    for stage, (buckets, total, count) in (
+        container.stage_timings().histograms().items()
+    ):
+        writer.histogram(
+            "rag_stage_duration_seconds",
+            "Run time of each pipeline stage.",
+            buckets,
+            total,
+            count,
+            stage=stage,
+        )
+
+    batcher = container.embedding_batcher().stats()
+    writer.histogram(
+        "rag_embedding_batch_size",
+        "Number of texts encoded per embedding batch.",
+        _batch_size_buckets(batcher["batch_sizes"]),
+        batcher["items"],
+        batcher["batches"],
+    )
+
+    caches = {
+        "embedding": container.embedding_cache().stats(),
+        "result": container.result_cache().stats(),
+        "context_tokens": container.context_packer().stats()["token_cache"],
+    }
+    answer_cache = container.answer_cache()
+    if answer_cache is not None:
+        caches["answer"] = answer_cache.stats()
+    for cache, stats in caches.items():
+        writer.counter(
+            "rag_cache_hits_total",
+            "Cache lookups that hit.",
+            stats["hits"],
+            cache=cache,
+        )
+        writer.counter(
+            "rag_cache_misses_total",
+            "Cache lookups that missed.",
+            stats["misses"],
+            cache=cache,
+        )
+        if "size" in stats:
+            writer.gauge(
+                "rag_cache_entries",
+                "Entries held by a cache.",
+                stats["size"],
+                cache=cache,
+            )
+
+    queue = await container.request_queue().stats()
+    writer.gauge("rag_queue_depth", "Jobs waiting in the queue.", queue["depth"])
+    writer.gauge(
+        "rag_queue_in_flight",
+        "Jobs taken from the queue and not finished.",
+        queue["in_flight"],
+    )
+    for reason, rejected in queue["rejected"].items():
+        writer.counter(
+            "rag_queue_rejected_total",
+            "Requests rejected because the queue was full.",
+            rejected,
+            reason=reason,
+        )
+    writer.gauge(
+        "rag_workers_busy",
+        "Workers of this process processing a job.",
+        container.worker_pool().in_flight,
+    )
+
+    callbacks = container.callback_service().stats()
+    writer.counter(
+        "rag_callbacks_delivered_total", "Answers delivered.", callbacks["delivered"]
+    )
+    writer.counter(
+        "rag_callbacks_failed_total",
+        "Answers that could not be delivered.",
+        callbacks["failed"],
+    )
+    writer.counter(
+        "rag_callback_retries_total", "Callback POSTs retried.", callbacks["retries"]
+    )
+    writer.gauge(
+        "rag_callbacks_pending",
+        "Answers waiting to be delivered.",
+        callbacks["pending"],
+    )
+
+    pool = container.db_pool()
+    if isinstance(pool, asyncpg.Pool):
+        size, idle = pool.get_size(), pool.get_idle_size()
+        writer.gauge("rag_db_pool_size", "Open database connections.", size)
+        writer.gauge("rag_db_pool_in_use", "Database connections in use.", size - idle)
+        writer.gauge(
+            "rag_db_pool_max_size",
+            "Maximum database connections in the pool.",
+            pool.get_max_size(),
+        )
+
+    return writer.render()
@@ -0,0 +1,73 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class StageTimings:
+    """
+    Records the run times of the pipeline stages: graph nodes, repository
+    calls, embedding batches, callbacks and queue wait.
+
+    The most recent samples of each stage are kept to report percentiles,
+    and every sample is counted in a cumulative histogram for Prometheus.
+    """
+
+    def __init__(self, max_samples: int = 10_000):
+        self._max_samples = max_samples
+        self._samples: dict[str, deque] = {}
+        self._buckets: dict[str, list[int]] = {}
+        self._counts: dict[str, int] = {}
+        self._sums: dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float):
+        if stage not in self._samples:
+            self._samples[stage] = deque(maxlen=self._max_samples)
+            self._buckets[stage] = [0] * len(LATENCY_BUCKETS)
+            self._counts[stage] = 0
+            self._sums[stage] = 0.0
+        self._samples[stage].append(seconds)
+        self._counts[stage] += 1
+        self._sums[stage] += seconds
+        buckets = self._buckets[stage]
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                buckets[i] += 1
+
+    @contextmanager
+    def measure(self, stage: str):
+        """Records how long the block takes, whether or not it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def stats(self) -> dict:
+        """Returns the count and latency percentiles, in ms, of every stage."""
+        stats = {}
+        for stage, samples in self._samples.items():
+            ms = np.asarray(samples) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            stats[stage] = {
+                "count": self._counts[stage],
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+            }
+        return stats
+
+    def histograms(self) -> dict[str, tuple[list[tuple[float, int]], float, int]]:
+        """Returns the cumulative (bound, count) buckets, sum and count of every stage."""
+        return {
+            stage: (
+                list(zip(LATENCY_BUCKETS, self._buckets[stage])),
+                self._sums[stage],
+                self._counts[stage],
+            )
+            for stage in self._samples
+        }
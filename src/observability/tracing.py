@@ -0,0 +1,50 @@
+import logging
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger(__name__)
+
+
+class Tracer:
+    """
+    Opens OpenTelemetry spans when tracing is enabled and the
+    `opentelemetry-api` package is installed; otherwise spans are no-ops.
+
+    Spans go to the globally configured tracer provider, e.g. the one set
+    up by `opentelemetry-instrument` from the OTEL_* environment variables.
+    """
+
+    def __init__(self, enabled: bool, name: str = "product-query-bot"):
+        self._name = name
+        self._tracer = None
+        if not enabled:
+            return
+        try:
+            from opentelemetry import trace
+
+            self._tracer = trace.get_tracer(name)
+        except ImportError:
+            logger.warning(
+                "Tracing is enabled but opentelemetry-api is not installed; "
+                "no spans will be recorded."
+            )
+
+    @property
+    def enabled(self) -> bool:
+        return self._tracer is not None
+
+    def span(self, name: str, **attributes):
+        """
+        Returns a context manager for a span named `name`. Attributes that are
+        None are left out.
+        """
+        if self._tracer is None:
+            return nullcontext()
+        return self._span(name, attributes)
+
+    @contextmanager
+    def _span(self, name: str, attributes: dict):
+        with self._tracer.start_as_current_span(
+            name,
+            attributes={k: v for k, v in attributes.items() if v is not None},
+        ) as span:
+            yield span
@@ -1 +1,2 @@
+from .errors import RetrievalFailedError, StageTimeoutError
 from .langgraph_orchestrator import LangGraphOrchestrator
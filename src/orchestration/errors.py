@@ -0,0 +1,15 @@
+class StageTimeoutError(Exception):
+    """Raised when a stage of a synchronous query exceeds its deadline."""
+
+    def __init__(self, stage: str, timeout: float):
+        super().__init__(f"The {stage} stage exceeded its {timeout}s deadline.")
+        self.stage = stage
+        self.timeout = timeout
+
+
+class RetrievalFailedError(Exception):
+    """Raised when every retrieval branch of a query failed or timed out."""
+
+    def __init__(self, branches: list[str]):
+        super().__init__(f"Every retrieval branch failed: {', '.join(branches)}.")
+        self.branches = branches
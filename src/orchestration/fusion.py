@@ -0,0 +1,25 @@
+from src.models.query import ProductDocument
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[ProductDocument]], k: int = 60, limit: int | None = None
+) -> list[ProductDocument]:
+    """
+    Merges ranked lists by reciprocal-rank fusion: each document scores
+    1 / (k + rank) in every list it appears in. A single list is returned
+    unchanged. By default, as many documents are kept as the longest list.
+    """
+    rankings = [ranking for ranking in rankings if ranking]
+    if len(rankings) <= 1:
+        return list(rankings[0]) if rankings else []
+
+    scores: dict[int, float] = {}
+    documents: dict[int, ProductDocument] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            scores[document.id] = scores.get(document.id, 0.0) + 1 / (k + rank)
+            documents.setdefault(document.id, document)
+
+    limit = limit or max(len(ranking) for ranking in rankings)
+    ranked = sorted(scores, key=lambda id_: scores[id_], reverse=True)
+    return [documents[id_] for id_ in ranked[:limit]]
@@ -1,15 +1,32 @@
-from langgraph.graph import StateGraph, END
+import asyncio
+import logging
+import time
+from contextlib import nullcontext
+from langgraph.graph import StateGraph, START, END
 from src.services.interfaces import (
+    ProductSearchInterface,
     RetrievalServiceInterface,
     GenerationServiceInterface,
     CallbackServiceInterface,
 )
+from src.cache.interfaces import AnswerCacheInterface
+from src.streaming.interfaces import TokenStreamInterface
+from src.services.context_packer import ContextPacker
 from src.models.orchestration import AgentState
+from src.observability import StageTimings, Tracer
+from .errors import RetrievalFailedError, StageTimeoutError
+from .fusion import reciprocal_rank_fusion
+
+logger = logging.getLogger(__name__)
 
 
 class LangGraphOrchestrator:
     """
     Orchestrates the RAG flow using LangGraph to define a multi-agent system.
+
+    Retrieval fans out into one branch per strategy: the vector search of
+    `retrieval_service`, plus any `retrieval_branches`. Branches run
+    concurrently and their results are merged by reciprocal-rank fusion.
     """
 
     def __init__(
@@ -17,52 +34,277 @@ class LangGraphOrchestrator:
         retrieval_service: RetrievalServiceInterface,
         generation_service: GenerationServiceInterface,
         callback_service: CallbackServiceInterface,
+        stage_limits: dict[str, int] | None = None,
+        answer_cache: AnswerCacheInterface | None = None,
+        token_stream: TokenStreamInterface | None = None,
+        stage_deadlines: dict[str, float] | None = None,
+        retrieval_branches: dict[str, ProductSearchInterface] | None = None,
+        branch_timeout: float | None = None,
+        fusion_k: int = 60,
+        context_packer: ContextPacker | None = None,
+        timings: StageTimings | None = None,
+        tracer: Tracer | None = None,
     ):
         self.retrieval_service = retrieval_service
         self.generation_service = generation_service
         self.callback_service = callback_service
+        self.answer_cache = answer_cache
+        self.token_stream = token_stream
+        self.context_packer = context_packer
+        self.timings = timings or StageTimings()
+        self.tracer = tracer or Tracer(enabled=False)
+        self.retrieval_branches = {
+            "vector": retrieval_service,
+            **(retrieval_branches or {}),
+        }
+        self._branch_timeout = branch_timeout if branch_timeout else None
+        self._fusion_k = fusion_k
+        self._stage_limits = {
+            stage: asyncio.Semaphore(limit)
+            for stage, limit in (stage_limits or {}).items()
+            if limit and limit > 0
+        }
+        self._stage_deadlines = {
+            stage: deadline
+            for stage, deadline in (stage_deadlines or {}).items()
+            if deadline and deadline > 0
+        }
         self.workflow = self._build_graph()
+        self.sync_workflow = self._build_graph(deadlines=self._stage_deadlines)
 
-    async def _retriever_node(self, state: AgentState):
-        """Takes the query and finds relevant documents."""
-        documents = await self.retrieval_service.find_similar_products(state.query)
-        return {"documents": documents}
+    def _stage(self, name: str):
+        """
+        Bounds how many requests may be inside a stage at once, so concurrent
+        workers overlap across stages instead of piling up on one of them.
+        """
+        return self._stage_limits.get(name) or nullcontext()
 
-    def _responder_node(self, state: AgentState):
-        """Takes documents and the query to generate a response."""
-        response = self.generation_service.generate_response(
-            state.documents, state.query
+    def _branch_node(self, name: str, search: ProductSearchInterface):
+        """Creates the node running one retrieval strategy."""
+
+        async def retrieve(state: AgentState):
+            async with self._stage("retriever"):
+                documents = await search.find_similar_products(state.query)
+            return {"candidates": {name: documents}}
+
+        return retrieve
+
+    async def _merge_node(self, state: AgentState):
+        """
+        Fuses the documents found by every branch and packs them into the
+        context budget. Raises RetrievalFailedError when no branch succeeded,
+        so an outage is not answered as if nothing matched. When an answer cache is configured, it also looks up
+        an answer to a similar query that was generated from the same
+        documents.
+        """
+        if set(state.failed_branches) >= set(self.retrieval_branches):
+            raise RetrievalFailedError(state.failed_branches)
+        documents = reciprocal_rank_fusion(
+            [state.candidates.get(name, []) for name in self.retrieval_branches],
+            k=self._fusion_k,
         )
+        packing = self.context_packer is not None and self.context_packer.enabled
+        if not documents or (self.answer_cache is None and not packing):
+            return {"documents": documents}
+
+        async with self._stage("retriever"):
+            embedding = await self.retrieval_service.embed_query(state.query)
+        if packing:
+            await self.context_packer.load_encoding()
+            documents = self.context_packer.pack(documents, embedding, state.query)
+        if self.answer_cache is None:
+            return {"documents": documents}
+
+        cached = await self.answer_cache.lookup(embedding, [d.id for d in documents])
+        if cached is not None and self._streaming(state):
+            self.token_stream.publish(state.job_id, cached)
+            await self.token_stream.finish(state.job_id)
+        return {
+            "documents": documents,
+            "query_embedding": embedding,
+            "response": cached or "",
+            "cache_hit": cached is not None,
+        }
+
+    async def _responder_node(self, state: AgentState):
+        """Takes documents and the query to generate a response."""
+        async with self._stage("responder"):
+            started = time.perf_counter()
+            if self._streaming(state):
+                response = await self._stream_response(state)
+            else:
+                response = await self.generation_service.generate_response(
+                    state.documents, state.query
+                )
+            elapsed = time.perf_counter() - started
+
+        if (
+            self.answer_cache is not None
+            and state.query_embedding is not None
+            and response != self.generation_service.ERROR_RESPONSE
+        ):
+            await self.answer_cache.store(
+                state.query_embedding,
+                [d.id for d in state.documents],
+                response,
+                elapsed,
+            )
         return {"response": response}
 
-    async def _callback_node(self, state: AgentState):
-        """Takes the final response and sends it to the callback URL."""
-        await self.callback_service.send_response(
-            user_id=state.user_id, answer=state.response
-        )
-        return {}
+    def _streaming(self, state: AgentState) -> bool:
+        return self.token_stream is not None and state.job_id is not None
+
+    async def _stream_response(self, state: AgentState) -> str:
+        """
+        Forwards tokens to the job's stream as they are generated, and
+        returns the full response.
+        """
+        tokens = []
+        async for token in self.generation_service.stream_response(
+            state.documents, state.query
+        ):
+            self.token_stream.publish(state.job_id, token)
+            tokens.append(token)
+        await self.token_stream.finish(state.job_id)
+        return "".join(tokens)
 
-    def _build_graph(self):
+    def _timed(self, name: str, node):
+        """Records the run time of a node, in a span of the query's trace."""
+
+        async def timed(state: AgentState):
+            with self.tracer.span(
+                f"rag.{name}", user_id=state.user_id, job_id=state.job_id
+            ), self.timings.measure(name):
+                return await node(state)
+
+        return timed
+
+    @staticmethod
+    def _with_fallback(name: str, node, timeout: float | None, fallback: dict):
+        """
+        Bounds a node's run time. On timeout or error the node returns
+        `fallback` instead, so the rest of the graph can go on without it.
+        """
+
+        async def guarded(state: AgentState):
+            try:
+                return await asyncio.wait_for(node(state), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Node '{name}' timed out after {timeout}s.")
+            except Exception:
+                logger.warning(f"Node '{name}' failed:", exc_info=True)
+            return fallback
+
+        return guarded
+
+    @staticmethod
+    def _with_deadline(stage: str, node, deadline: float | None):
+        """Bounds a node's run time, waiting for the stage included."""
+        if deadline is None:
+            return node
+
+        async def bounded(state: AgentState):
+            try:
+                return await asyncio.wait_for(node(state), timeout=deadline)
+            except asyncio.TimeoutError:
+                raise StageTimeoutError(stage, deadline) from None
+
+        return bounded
+
+    def _build_graph(self, deadlines: dict[str, float] | None = None):
         """
-        Defines the flow of agents.
+        Defines the flow of agents: the retrieval branches run concurrently
+        and are merged, then the responder runs unless the answer was cached.
+        With `deadlines`, a stage that exceeds its deadline fails the query.
         """
+        deadlines = deadlines or {}
         graph = StateGraph(AgentState)
 
-        graph.add_node("retriever", self._retriever_node)
-        graph.add_node("responder", self._responder_node)
-        graph.add_node("callback", self._callback_node)
+        # With a single branch there is nothing to fall back on, so its
+        # errors fail the query as before.
+        fan_out = len(self.retrieval_branches) > 1
+        branch_nodes = []
+        for name, search in self.retrieval_branches.items():
+            node = self._branch_node(name, search)
+            if fan_out:
+                node = self._with_fallback(
+                    f"retrieve_{name}",
+                    node,
+                    self._branch_timeout,
+                    {"candidates": {name: []}, "failed_branches": [name]},
+                )
+            node = self._with_deadline("retriever", node, deadlines.get("retriever"))
+            graph.add_node(f"retrieve_{name}", self._timed(f"retrieve_{name}", node))
+            graph.add_edge(START, f"retrieve_{name}")
+            branch_nodes.append(f"retrieve_{name}")
 
-        graph.set_entry_point("retriever")
-        graph.add_edge("retriever", "responder")
-        graph.add_edge("responder", "callback")
-        graph.add_edge("callback", END)
+        graph.add_node("merge", self._timed("merge", self._merge_node))
+        graph.add_node(
+            "responder",
+            self._timed(
+                "responder",
+                self._with_deadline(
+                    "responder", self._responder_node, deadlines.get("responder")
+                ),
+            ),
+        )
+
+        graph.add_edge(branch_nodes, "merge")
+        graph.add_conditional_edges(
+            "merge",
+            lambda state: END if state.cache_hit else "responder",
+            ["responder", END],
+        )
+        graph.add_edge("responder", END)
 
         return graph.compile()
 
-    async def process_query(self, user_id: str, query: str):
+    async def _deliver(self, user_id: str, answer: str):
+        """Sends the final response to the callback URL."""
+        with self.tracer.span("rag.callback", user_id=user_id), self.timings.measure(
+            "callback"
+        ):
+            await self.callback_service.send_response(user_id=user_id, answer=answer)
+
+    async def process_query(
+        self,
+        user_id: str,
+        query: str,
+        job_id: str | None = None,
+        attempt: int = 1,
+        max_attempts: int = 1,
+    ) -> str:
+        """
+        Executes the RAG workflow, delivers the answer to the callback once
+        the graph returns, and returns it. With a job id and a token stream,
+        the answer is also streamed: a retry restarts the stream, and only a
+        failure of the last attempt ends it with an error.
+        """
+        inputs = {"user_id": user_id, "query": query, "job_id": job_id}
+        streaming = self.token_stream is not None and job_id is not None
+        if streaming and attempt > 1:
+            await self.token_stream.reset(job_id)
+        try:
+            with self.tracer.span(
+                "rag.query", user_id=user_id, job_id=job_id
+            ), self.timings.measure("workflow"):
+                result = await self.workflow.ainvoke(inputs)
+                await self._deliver(user_id, result["response"])
+        except Exception as e:
+            if streaming and attempt >= max_attempts:
+                await self.token_stream.finish(job_id, error=str(e))
+            raise
+        print(f"Workflow complete for user {user_id}.")
+        return result["response"]
+
+    async def answer_query(self, user_id: str, query: str) -> str:
         """
-        Executes the full RAG and callback workflow.
+        Runs retrieval and generation inline and returns the answer, without
+        a callback. Raises StageTimeoutError when a stage misses its deadline.
         """
         inputs = {"user_id": user_id, "query": query}
-        await self.workflow.ainvoke(inputs)
-        print(f"Workflow complete for user {user_id}.")
+        with self.tracer.span("rag.query_sync", user_id=user_id), self.timings.measure(
+            "sync_workflow"
+        ):
+            result = await self.sync_workflow.ainvoke(inputs)
+        return result["response"]
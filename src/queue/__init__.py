@@ -0,0 +1,4 @@
+from .errors import QueueFullError
+from .fair_queue import FairRequestQueue
+from .pg_job_queue import PostgresJobQueue
+from .priorities import parse_user_priorities
@@ -0,0 +1,7 @@
+class QueueFullError(Exception):
+    """Raised when a request is not admitted to the queue."""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
@@ -0,0 +1,193 @@
+import asyncio
+import math
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from src.cache import LRUTTLCache
+from src.models.job import Job, JobStatus
+from src.models.query import QueryRequest
+from .errors import QueueFullError
+from .interfaces import RequestQueueInterface
+from .priorities import PRIORITIES
+
+
+class FairRequestQueue(RequestQueueInterface):
+    """
+    A bounded, in-process request queue with priority lanes and per-user fairness.
+
+    Lanes are served in strict priority order; a user's lane comes from
+    `user_priorities`, set by the server, and defaults to "normal". Within a
+    lane, users are
+    served round-robin, so a user with many queued requests only gets one
+    turn per round. Requests beyond the total `capacity` are rejected with
+    503, and requests beyond `per_user_capacity` for one user with 429.
+    Job statuses are kept for `status_ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        per_user_capacity: int,
+        status_capacity: int = 10_000,
+        status_ttl_seconds: float = 3600.0,
+        user_priorities: dict[str, str] | None = None,
+    ):
+        self._capacity = max(1, capacity)
+        self._user_priorities = user_priorities or {}
+        self._per_user_capacity = max(1, per_user_capacity)
+        self._lanes: dict[str, OrderedDict[str, deque]] = {
+            priority: OrderedDict() for priority in PRIORITIES
+        }
+        self._per_user: dict[str, int] = {}
+        self._statuses: LRUTTLCache[str, JobStatus] = LRUTTLCache(
+            status_capacity, status_ttl_seconds
+        )
+        self._size = 0
+        self._unfinished = 0
+        self._not_empty = asyncio.Event()
+        self._finished = asyncio.Event()
+        self._finished.set()
+
+        self._enqueued = 0
+        self._rejected = {"queue_full": 0, "user_limit": 0}
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._dequeued = 0
+        self._completed = 0
+        self._started = time.monotonic()
+
+    def qsize(self) -> int:
+        return self._size
+
+    async def enqueue(self, request: QueryRequest) -> str:
+        if self._size >= self._capacity:
+            self._rejected["queue_full"] += 1
+            raise QueueFullError(
+                "The service is at capacity, please retry later.",
+                status_code=503,
+                retry_after=self.retry_after(),
+            )
+        if self._per_user.get(request.user_id, 0) >= self._per_user_capacity:
+            self._rejected["user_limit"] += 1
+            raise QueueFullError(
+                "Too many pending requests for this user, please retry later.",
+                status_code=429,
+                retry_after=self.retry_after(),
+            )
+
+        job = Job(
+            id=str(uuid.uuid4()),
+            request=request,
+            priority=self._user_priorities.get(request.user_id, "normal"),
+        )
+        lane = self._lanes[job.priority]
+        lane.setdefault(request.user_id, deque()).append((time.monotonic(), job))
+        self._per_user[request.user_id] = self._per_user.get(request.user_id, 0) + 1
+        self._size += 1
+        self._unfinished += 1
+        self._enqueued += 1
+        self._finished.clear()
+        self._not_empty.set()
+
+        now = datetime.now(timezone.utc)
+        self._statuses.set(
+            job.id,
+            JobStatus(
+                id=job.id,
+                user_id=request.user_id,
+                status="queued",
+                created_at=now,
+                updated_at=now,
+            ),
+        )
+        return job.id
+
+    async def dequeue(self) -> Job:
+        """Waits for the next job, by priority and then round-robin by user."""
+        while self._size == 0:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+
+        for lane in self._lanes.values():
+            if lane:
+                break
+        user_id, jobs = next(iter(lane.items()))
+        enqueued_at, job = jobs.popleft()
+        if jobs:
+            lane.move_to_end(user_id)
+        else:
+            del lane[user_id]
+
+        self._per_user[user_id] -= 1
+        if not self._per_user[user_id]:
+            del self._per_user[user_id]
+        self._size -= 1
+
+        wait = time.monotonic() - enqueued_at
+        self._dequeued += 1
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+
+        job.attempts += 1
+        job.waited_seconds = wait
+        self._update_status(job, status="running", attempts=job.attempts)
+        return job
+
+    async def complete(self, job: Job, answer: str | None = None) -> None:
+        self._update_status(job, status="done", answer=answer)
+        self._task_done()
+
+    async def fail(self, job: Job, error: str) -> None:
+        self._update_status(job, status="failed", error=error)
+        self._task_done()
+
+    async def get_status(self, job_id: str) -> JobStatus | None:
+        return self._statuses.get(job_id)
+
+    async def drain(self) -> None:
+        """Waits until every queued job is processed, since none survive a restart."""
+        await self._finished.wait()
+
+    def retry_after(self) -> int:
+        """Estimates in seconds how long the current backlog takes to drain."""
+        elapsed = time.monotonic() - self._started
+        throughput = self._completed / elapsed if elapsed > 0 else 0.0
+        if throughput <= 0:
+            return 5
+        return min(60, max(1, math.ceil(self._size / throughput)))
+
+    async def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "depth": self._size,
+            "capacity": self._capacity,
+            "depth_by_priority": {
+                priority: sum(len(jobs) for jobs in lane.values())
+                for priority, lane in self._lanes.items()
+            },
+            "in_flight": self._unfinished - self._size,
+            "enqueued": self._enqueued,
+            "rejected": dict(self._rejected),
+            "mean_wait_ms": (
+                1000 * self._total_wait / self._dequeued if self._dequeued else 0.0
+            ),
+            "max_wait_ms": 1000 * self._max_wait,
+        }
+
+    def _task_done(self):
+        self._unfinished -= 1
+        self._completed += 1
+        if self._unfinished == 0:
+            self._finished.set()
+
+    def _update_status(self, job: Job, **changes):
+        status = self._statuses.get(job.id)
+        if status is None:
+            return
+        self._statuses.set(
+            job.id,
+            status.model_copy(
+                update={**changes, "updated_at": datetime.now(timezone.utc)}
+            ),
+        )
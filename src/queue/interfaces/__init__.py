@@ -0,0 +1 @@
+from .request_queue_interface import RequestQueueInterface
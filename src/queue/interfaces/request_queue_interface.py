@@ -0,0 +1,60 @@
+from abc import ABC, abstractmethod
+from contextlib import AbstractAsyncContextManager, nullcontext
+from src.models.job import Job, JobStatus
+from src.models.query import QueryRequest
+
+
+class RequestQueueInterface(ABC):
+    """Defines the contract for the queue between the API and the workers."""
+
+    @abstractmethod
+    async def enqueue(self, request: QueryRequest) -> str:
+        """
+        Admits a request and returns its job id. Raises QueueFullError when
+        the queue or the user is at capacity.
+        """
+        pass
+
+    @abstractmethod
+    async def dequeue(self) -> Job:
+        """Waits for the next job and marks it as running."""
+        pass
+
+    @abstractmethod
+    async def complete(self, job: Job, answer: str | None = None) -> None:
+        """Marks a job as done."""
+        pass
+
+    @abstractmethod
+    async def fail(self, job: Job, error: str) -> None:
+        """Marks a job as failed, or schedules it for another attempt."""
+        pass
+
+    @abstractmethod
+    async def get_status(self, job_id: str) -> JobStatus | None:
+        """Returns the status of a job, or None if it is unknown."""
+        pass
+
+    @abstractmethod
+    async def stats(self) -> dict:
+        """Returns queue depth, wait time and admission counters."""
+        pass
+
+    def lease(self, job: Job) -> AbstractAsyncContextManager:
+        """
+        Keeps a running job claimed for as long as the block runs, so it is
+        not handed to another worker. No-op by default, for queues that never
+        take jobs back.
+        """
+        return nullcontext()
+
+    async def drain(self) -> None:
+        """
+        Waits until queued jobs that would be lost on shutdown are processed.
+        No-op by default, for queues that persist their jobs.
+        """
+        pass
+
+    async def close(self) -> None:
+        """Releases the resources held by the queue. No-op by default."""
+        pass
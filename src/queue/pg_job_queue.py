@@ -0,0 +1,310 @@
+import asyncio
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from src.models.job import Job, JobStatus
+from src.models.query import QueryRequest
+from .errors import QueueFullError
+from .interfaces import RequestQueueInterface
+from .priorities import PRIORITY_RANKS
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "jobs"
+# Advisory lock key serializing admission, so concurrent enqueues cannot
+# all pass the capacity check.
+ENQUEUE_LOCK = 0x6A6F6273
+PRIORITY_NAMES = {rank: name for name, rank in PRIORITY_RANKS.items()}
+
+
+class PostgresJobQueue(RequestQueueInterface):
+    """
+    A durable job queue stored in the `jobs` table, shared by every API
+    replica and worker process.
+
+    Workers claim jobs with `SELECT ... FOR UPDATE SKIP LOCKED`, so each job
+    is handed to one worker at a time. A claimed job stays invisible for
+    `visibility_timeout` seconds, and its lease is extended while the worker
+    runs it; if the worker dies it becomes claimable again, which gives
+    at-least-once processing. Results are only recorded for the latest
+    attempt, so a worker that lost its lease cannot overwrite them. New jobs
+    are announced with NOTIFY so idle workers wake up without waiting for the
+    next poll. Priorities come from `user_priorities`, set by the server.
+    """
+
+    def __init__(
+        self,
+        db,
+        capacity: int,
+        per_user_capacity: int,
+        visibility_timeout: float,
+        max_attempts: int,
+        poll_interval: float,
+        retention_seconds: float,
+        user_priorities: dict[str, str] | None = None,
+    ):
+        self._db = db
+        self._capacity = capacity
+        self._per_user_capacity = per_user_capacity
+        self._visibility_timeout = visibility_timeout
+        self._max_attempts = max(1, max_attempts)
+        self._poll_interval = poll_interval
+        self._retention = retention_seconds
+        self._user_priorities = user_priorities or {}
+        self._wakeup = asyncio.Event()
+        self._listener = None
+        self._listener_lock = asyncio.Lock()
+        self._rejected = {"queue_full": 0, "user_limit": 0}
+
+    async def enqueue(self, request: QueryRequest) -> str:
+        job_id = str(uuid.uuid4())
+        async with self._db.acquire() as conn, conn.transaction():
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", ENQUEUE_LOCK)
+            inserted = await conn.fetchval(
+                """
+                WITH queued AS (
+                    SELECT count(*) AS total, count(*) FILTER (WHERE user_id = $2) AS mine
+                    FROM jobs WHERE status = 'queued'
+                )
+                INSERT INTO jobs (id, user_id, query, priority)
+                SELECT $1, $2, $3, $4 FROM queued
+                WHERE queued.total < $5 AND queued.mine < $6
+                RETURNING pg_notify($7, '') IS NOT NULL
+                """,
+                uuid.UUID(job_id),
+                request.user_id,
+                request.query,
+                PRIORITY_RANKS[self._user_priorities.get(request.user_id, "normal")],
+                self._capacity,
+                self._per_user_capacity,
+                CHANNEL,
+            )
+            if inserted:
+                return job_id
+
+            total = await conn.fetchval(
+                "SELECT count(*) FROM jobs WHERE status = 'queued'"
+            )
+        if total >= self._capacity:
+            self._rejected["queue_full"] += 1
+            raise QueueFullError(
+                "The service is at capacity, please retry later.",
+                status_code=503,
+                retry_after=5,
+            )
+        self._rejected["user_limit"] += 1
+        raise QueueFullError(
+            "Too many pending requests for this user, please retry later.",
+            status_code=429,
+            retry_after=5,
+        )
+
+    async def dequeue(self) -> Job:
+        await self._listen()
+        while True:
+            self._wakeup.clear()
+            job = await self._claim()
+            if job is not None:
+                return job
+
+            await self._expire()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self) -> Job | None:
+        async with self._db.acquire() as conn:
+            # The wait is measured from when the job last became visible, so
+            # earlier attempts and their back-off are not counted.
+            record = await conn.fetchrow(
+                """
+                WITH next AS (
+                    SELECT id, visible_at FROM jobs
+                    WHERE status IN ('queued', 'running')
+                      AND visible_at <= now()
+                      AND attempts < $2
+                    ORDER BY priority, visible_at
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+                )
+                UPDATE jobs
+                SET status = 'running',
+                    attempts = attempts + 1,
+                    visible_at = now() + make_interval(secs => $1),
+                    updated_at = now()
+                FROM next
+                WHERE jobs.id = next.id
+                RETURNING jobs.id, user_id, query, priority, attempts,
+                          greatest(extract(epoch FROM now() - next.visible_at), 0)
+                            AS waited_seconds
+                """,
+                self._visibility_timeout,
+                self._max_attempts,
+            )
+        if record is None:
+            return None
+        return Job(
+            id=str(record["id"]),
+            attempts=record["attempts"],
+            max_attempts=self._max_attempts,
+            waited_seconds=float(record["waited_seconds"]),
+            priority=PRIORITY_NAMES[record["priority"]],
+            request=QueryRequest(user_id=record["user_id"], query=record["query"]),
+        )
+
+    async def _expire(self):
+        """
+        Fails jobs whose last attempt timed out, and deletes finished jobs
+        older than the retention period.
+        """
+        async with self._db.acquire() as conn:
+            await conn.execute(
+                """
+                UPDATE jobs
+                SET status = 'failed', error = 'Exceeded maximum attempts.', updated_at = now()
+                WHERE status = 'running' AND visible_at <= now() AND attempts >= $1;
+                """,
+                self._max_attempts,
+            )
+            await conn.execute(
+                """
+                DELETE FROM jobs
+                WHERE status IN ('done', 'failed')
+                  AND updated_at < now() - make_interval(secs => $1)
+                """,
+                self._retention,
+            )
+
+    @asynccontextmanager
+    async def lease(self, job: Job):
+        """Pushes the job's visibility forward every third of the timeout."""
+        task = asyncio.create_task(self._heartbeat(job))
+        try:
+            yield
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _heartbeat(self, job: Job):
+        interval = max(0.1, self._visibility_timeout / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with self._db.acquire() as conn:
+                    result = await conn.execute(
+                        """
+                        UPDATE jobs
+                        SET visible_at = now() + make_interval(secs => $3),
+                            updated_at = now()
+                        WHERE id = $1 AND attempts = $2 AND status = 'running'
+                        """,
+                        uuid.UUID(job.id),
+                        job.attempts,
+                        self._visibility_timeout,
+                    )
+            except Exception as e:
+                logger.warning(f"Failed to extend the lease of job {job.id}: {e}")
+                continue
+            if result == "UPDATE 0":
+                logger.warning(f"Job {job.id} (attempt {job.attempts}) lost its lease.")
+                return
+
+    async def complete(self, job: Job, answer: str | None = None) -> None:
+        async with self._db.acquire() as conn:
+            result = await conn.execute(
+                """
+                UPDATE jobs SET status = 'done', answer = $3, error = NULL, updated_at = now()
+                WHERE id = $1 AND attempts = $2 AND status = 'running'
+                """,
+                uuid.UUID(job.id),
+                job.attempts,
+                answer,
+            )
+        if result == "UPDATE 0":
+            logger.warning(
+                f"Discarded the result of job {job.id} (attempt {job.attempts}); "
+                "a later attempt owns it."
+            )
+
+    async def fail(self, job: Job, error: str) -> None:
+        """Puts the job back with exponential backoff until attempts run out."""
+        async with self._db.acquire() as conn:
+            result = await conn.execute(
+                """
+                UPDATE jobs
+                SET status = CASE WHEN attempts >= $3 THEN 'failed' ELSE 'queued' END,
+                    visible_at = now() + make_interval(secs => power(2, attempts)),
+                    error = $2,
+                    updated_at = now()
+                WHERE id = $1 AND attempts = $4 AND status = 'running'
+                """,
+                uuid.UUID(job.id),
+                error,
+                self._max_attempts,
+                job.attempts,
+            )
+        if result == "UPDATE 0":
+            logger.warning(
+                f"Discarded the failure of job {job.id} (attempt {job.attempts}); "
+                "a later attempt owns it."
+            )
+
+    async def get_status(self, job_id: str) -> JobStatus | None:
+        try:
+            key = uuid.UUID(job_id)
+        except ValueError:
+            return None
+        async with self._db.acquire() as conn:
+            record = await conn.fetchrow(
+                """
+                SELECT id::text AS id, user_id, status, attempts, created_at, updated_at, answer, error
+                FROM jobs WHERE id = $1
+                """,
+                key,
+            )
+        return JobStatus(**dict(record)) if record else None
+
+    async def stats(self) -> dict:
+        async with self._db.acquire() as conn:
+            records = await conn.fetch(
+                """
+                SELECT status, priority, count(*) AS jobs,
+                       extract(epoch FROM now() - min(created_at)) AS oldest_seconds
+                FROM jobs WHERE status IN ('queued', 'running')
+                GROUP BY status, priority
+                """
+            )
+        queued = [r for r in records if r["status"] == "queued"]
+        return {
+            "backend": "postgres",
+            "depth": sum(r["jobs"] for r in queued),
+            "capacity": self._capacity,
+            "depth_by_priority": {
+                PRIORITY_NAMES[r["priority"]]: r["jobs"] for r in queued
+            },
+            "in_flight": sum(r["jobs"] for r in records if r["status"] == "running"),
+            "rejected": dict(self._rejected),
+            "oldest_queued_seconds": max(
+                (float(r["oldest_seconds"]) for r in queued), default=0.0
+            ),
+        }
+
+    async def _listen(self):
+        """Holds a dedicated connection that LISTENs for new jobs."""
+        if self._listener is not None:
+            return
+        async with self._listener_lock:
+            if self._listener is None:
+                listener = await self._db.acquire()
+                await listener.add_listener(CHANNEL, self._on_notify)
+                self._listener = listener
+
+    def _on_notify(self, connection, pid, channel, payload):
+        self._wakeup.set()
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            listener, self._listener = self._listener, None
+            await listener.remove_listener(CHANNEL, self._on_notify)
+            await self._db.release(listener)
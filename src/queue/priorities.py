@@ -0,0 +1,19 @@
+PRIORITIES = ("high", "normal", "low")
+PRIORITY_RANKS = {priority: rank for rank, priority in enumerate(PRIORITIES)}
+
+
+def parse_user_priorities(value: str) -> dict[str, str]:
+    """
+    Parses `user=priority` pairs separated by commas, e.g. "ops=high,bulk=low".
+    Priorities are assigned by the server, never taken from a request, so a
+    client cannot jump the queue. Unlisted users get "normal".
+    """
+    priorities = {}
+    for pair in filter(None, (p.strip() for p in value.split(","))):
+        user_id, _, priority = pair.partition("=")
+        if priority.strip() not in PRIORITIES:
+            raise ValueError(
+                f"Invalid priority in {pair!r}; expected one of {', '.join(PRIORITIES)}."
+            )
+        priorities[user_id.strip()] = priority.strip()
+    return priorities
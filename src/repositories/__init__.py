@@ -1 +1,3 @@
 from .product_repo import PostgresProductRepository
+from .caching_product_repo import CachingProductRepository
+from .numpy_product_repo import NumpyProductRepository
@@ -0,0 +1,159 @@
+import hashlib
+from contextlib import nullcontext
+import numpy as np
+from src.cache import LRUTTLCache
+from src.models.query import ProductDocument
+from src.observability import StageTimings
+from .interfaces import ProductRepositoryInterface
+
+
+class CachingProductRepository(ProductRepositoryInterface):
+    """
+    Caches top-k search results of another repository, keyed on hashes of the
+    query embedding and text and on top_k. Every write through
+    `index_documents` invalidates it. With `timings`, the run time of the
+    underlying searches is recorded.
+    """
+
+    def __init__(
+        self,
+        repository: ProductRepositoryInterface,
+        cache: LRUTTLCache[tuple[str, int], list[ProductDocument]],
+        timings: StageTimings | None = None,
+    ):
+        self._repository = repository
+        self._cache = cache
+        self._timings = timings
+        self._generation = 0
+
+    async def initialize(self):
+        await self._repository.initialize()
+
+    async def index_documents(self, documents: list[ProductDocument]):
+        # Searches that overlap the write, on either side of it, must not
+        # store their results.
+        self._generation += 1
+        try:
+            await self._repository.index_documents(documents)
+        finally:
+            self._generation += 1
+            self._cache.clear()
+
+    async def semantic_search(
+        self, embedding: list[float], top_k: int
+    ) -> list[ProductDocument]:
+        return await self._cached(
+            (self._embedding_hash(embedding), top_k),
+            self._repository.semantic_search,
+            embedding,
+            top_k,
+        )
+
+    async def semantic_search_many(
+        self, embeddings: list[list[float]], top_k: int
+    ) -> list[list[ProductDocument]]:
+        """
+        Serves the cached embeddings and runs one batch search for the rest.
+        """
+        return await self._cached_many(
+            [(self._embedding_hash(e), top_k) for e in embeddings],
+            self._repository.semantic_search_many,
+            top_k,
+            embeddings,
+        )
+
+    async def keyword_search(self, query: str, top_k: int) -> list[ProductDocument]:
+        return await self._cached(
+            (f"keyword:{self._text_hash(query)}", top_k),
+            self._repository.keyword_search,
+            query,
+            top_k,
+        )
+
+    async def hybrid_search(
+        self, embedding: list[float], query: str, top_k: int
+    ) -> list[ProductDocument]:
+        return await self._cached(
+            self._hybrid_key(embedding, query, top_k),
+            self._repository.hybrid_search,
+            embedding,
+            query,
+            top_k,
+        )
+
+    async def hybrid_search_many(
+        self, embeddings: list[list[float]], queries: list[str], top_k: int
+    ) -> list[list[ProductDocument]]:
+        """Serves the cached pairs and runs one batch search for the rest."""
+        return await self._cached_many(
+            [self._hybrid_key(e, q, top_k) for e, q in zip(embeddings, queries)],
+            self._repository.hybrid_search_many,
+            top_k,
+            embeddings,
+            queries,
+        )
+
+    async def _cached(self, key, search, *args) -> list[ProductDocument]:
+        cached = self._cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        generation = self._generation
+        with (
+            self._timings.measure(f"repository.{search.__name__}")
+            if self._timings is not None
+            else nullcontext()
+        ):
+            results = await search(*args)
+        # Skip storing results that raced with a write, they may be stale.
+        if generation == self._generation:
+            self._cache.set(key, list(results))
+        return results
+
+    async def _cached_many(
+        self, keys, search, top_k: int, *columns: list
+    ) -> list[list[ProductDocument]]:
+        """
+        Looks up each key, then passes the rows of `columns` whose key was
+        missing to one call of the batch `search`.
+        """
+        results = [self._cache.get(key) for key in keys]
+        missing = [i for i, cached in enumerate(results) if cached is None]
+        if not missing:
+            return [list(cached) for cached in results]
+
+        generation = self._generation
+        with (
+            self._timings.measure(f"repository.{search.__name__}")
+            if self._timings is not None
+            else nullcontext()
+        ):
+            found = await search(
+                *([column[i] for i in missing] for column in columns), top_k
+            )
+        for i, documents in zip(missing, found):
+            results[i] = documents
+            if generation == self._generation:
+                self._cache.set(keys[i], list(documents))
+        return [list(documents) for documents in results]
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+    @classmethod
+    def _hybrid_key(cls, embedding: list[float], query: str, top_k: int):
+        return (
+            f"hybrid:{cls._embedding_hash(embedding)}:{cls._text_hash(query)}",
+            top_k,
+        )
+
+    @staticmethod
+    def _embedding_hash(embedding: list[float]) -> str:
+        data = np.asarray(embedding, dtype=np.float32).tobytes()
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    @staticmethod
+    def _text_hash(query: str) -> str:
+        # Full-text search ignores case and spacing, so the key does too.
+        data = " ".join(query.casefold().split()).encode()
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
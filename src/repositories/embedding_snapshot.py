@@ -0,0 +1,148 @@
+import hashlib
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+
+def content_hash(content: str) -> str:
+    """Returns the hash that identifies a product description."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class EmbeddingSnapshot:
+    """
+    An on-disk snapshot of product embeddings.
+
+    Embeddings are stored L2-normalized in a float32 `.npy` file that is opened
+    memory-mapped, so every process on the host shares the same pages. A JSON
+    manifest records the model, the dimension, the embeddings file and the
+    content hash of each row.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        model_name: str,
+        hashes: list[str],
+        embeddings: np.ndarray,
+    ):
+        self.directory = directory
+        self.model_name = model_name
+        self.hashes = hashes
+        self.embeddings = embeddings
+        self._positions = {h: i for i, h in enumerate(hashes)}
+
+    @property
+    def dimension(self) -> int:
+        return self.embeddings.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def position(self, hash_: str) -> int | None:
+        """Returns the row of the given content hash, if it is in the snapshot."""
+        return self._positions.get(hash_)
+
+    @classmethod
+    def load(cls, directory: str | Path, model_name: str) -> "EmbeddingSnapshot | None":
+        """
+        Opens the snapshot in `directory`. Returns None when there is none, or
+        when it was built with a different model.
+        """
+        directory = Path(directory)
+        manifest_path = directory / MANIFEST_FILE
+        if not manifest_path.exists():
+            return None
+
+        try:
+            manifest = json.loads(manifest_path.read_text())
+            if manifest["model"] != model_name:
+                logger.info(
+                    f"Embedding snapshot was built with '{manifest['model']}', not '{model_name}'; ignoring it."
+                )
+                return None
+            embeddings = np.load(directory / manifest["embeddings"], mmap_mode="r")
+        except Exception as e:
+            logger.warning(f"Could not read the embedding snapshot in {directory}: {e}")
+            return None
+
+        if embeddings.shape != (len(manifest["hashes"]), manifest["dimension"]):
+            logger.warning(
+                "Embedding snapshot does not match its manifest; ignoring it."
+            )
+            return None
+        return cls(directory, model_name, manifest["hashes"], embeddings)
+
+    @classmethod
+    def write(
+        cls,
+        directory: str | Path,
+        model_name: str,
+        hashes: list[str],
+        embeddings: np.ndarray,
+    ) -> "EmbeddingSnapshot":
+        """
+        Writes a new snapshot and returns it memory-mapped. The manifest is
+        swapped in atomically, so readers see either the old or new snapshot.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+        # Name the file after its contents so concurrent writers agree on it.
+        digest = hashlib.sha256(
+            "\n".join([model_name, *hashes]).encode("utf-8")
+        ).hexdigest()[:16]
+        embeddings_file = f"embeddings-{digest}.npy"
+        tmp_suffix = f".{uuid.uuid4().hex}.tmp"
+
+        tmp_embeddings = directory / f"{embeddings_file}{tmp_suffix}"
+        with open(tmp_embeddings, "wb") as f:
+            np.save(f, embeddings)
+        os.replace(tmp_embeddings, directory / embeddings_file)
+
+        manifest = {
+            "model": model_name,
+            "dimension": int(embeddings.shape[1]),
+            "count": len(hashes),
+            "embeddings": embeddings_file,
+            "hashes": hashes,
+        }
+        tmp_manifest = directory / f"{MANIFEST_FILE}{tmp_suffix}"
+        tmp_manifest.write_text(json.dumps(manifest))
+        os.replace(tmp_manifest, directory / MANIFEST_FILE)
+
+        cls._remove_stale_files(directory)
+        logger.info(
+            f"Wrote embedding snapshot of {len(hashes)} products to {directory}."
+        )
+        return cls.load(directory, model_name)
+
+    @staticmethod
+    def _remove_stale_files(directory: Path):
+        """
+        Deletes embedding files the current manifest no longer points to.
+        Processes that still map an old file keep its pages until they exit.
+        """
+        try:
+            current = json.loads((directory / MANIFEST_FILE).read_text())["embeddings"]
+        except Exception:
+            return
+        for old_file in directory.glob("embeddings-*.npy"):
+            if old_file.name != current:
+                old_file.unlink(missing_ok=True)
+
+
+def normalize(embeddings: np.ndarray) -> np.ndarray:
+    """L2-normalizes each row, which leaves cosine distances unchanged."""
+    embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
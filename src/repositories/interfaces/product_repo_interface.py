@@ -1,8 +1,13 @@
+import asyncio
 from abc import ABC, abstractmethod
 from src.models.query import ProductDocument
 
 
 class ProductRepositoryInterface(ABC):
+    async def initialize(self) -> None:
+        """Prepares the repository once the database is ready. No-op by default."""
+        pass
+
     @abstractmethod
     async def index_documents(self, documents: list[ProductDocument]):
         """Saves product documents, including their embeddings, to the database."""
@@ -14,3 +19,43 @@ class ProductRepositoryInterface(ABC):
     ) -> list[ProductDocument]:
         """Performs a semantic search to find the top_k most similar documents."""
         pass
+
+    async def semantic_search_many(
+        self, embeddings: list[list[float]], top_k: int
+    ) -> list[list[ProductDocument]]:
+        """
+        Runs a semantic search for each embedding, returning the results in
+        order. Searches one by one by default.
+        """
+        return list(
+            await asyncio.gather(*(self.semantic_search(e, top_k) for e in embeddings))
+        )
+
+    async def keyword_search(self, query: str, top_k: int) -> list[ProductDocument]:
+        """
+        Performs a lexical search for the top_k documents best matching the
+        query terms. Not supported by default.
+        """
+        raise NotImplementedError(f"{type(self).__name__} has no keyword search.")
+
+    async def hybrid_search(
+        self, embedding: list[float], query: str, top_k: int
+    ) -> list[ProductDocument]:
+        """
+        Combines semantic and lexical search into one ranking of the top_k
+        documents. Not supported by default.
+        """
+        raise NotImplementedError(f"{type(self).__name__} has no hybrid search.")
+
+    async def hybrid_search_many(
+        self, embeddings: list[list[float]], queries: list[str], top_k: int
+    ) -> list[list[ProductDocument]]:
+        """
+        Runs a hybrid search for each embedding and query text pair, returning
+        the results in order. Searches one by one by default.
+        """
+        return list(
+            await asyncio.gather(
+                *(self.hybrid_search(e, q, top_k) for e, q in zip(embeddings, queries))
+            )
+        )
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import numpy as np
+from src.models.query import ProductDocument
+from .interfaces import ProductRepositoryInterface
+from .embedding_snapshot import EmbeddingSnapshot, normalize
+
+logger = logging.getLogger(__name__)
+
+# Above this many products a search is moved off the event loop.
+INLINE_SEARCH_LIMIT = 50_000
+
+
+class NumpyProductRepository(ProductRepositoryInterface):
+    """
+    In-process implementation of Product Repository.
+
+    Embeddings are kept L2-normalized in contiguous float32 matrices, so a
+    cosine search is a matrix-vector product plus `argpartition`. Appended
+    products go to an in-RAM matrix that grows geometrically, so appends
+    never rebuild the whole index.
+
+    When a database pool is given, `initialize` loads the `products` table.
+    If an embedding snapshot is also available, its memory-mapped matrix is
+    used as-is, so processes on the same host share the embedding pages;
+    products appended later are kept apart from it and searched alongside.
+    """
+
+    def __init__(
+        self,
+        db=None,
+        snapshot_dir: str | None = None,
+        model_name: str | None = None,
+        initial_capacity: int = 1024,
+    ):
+        self._db = db
+        self._snapshot_dir = snapshot_dir
+        self._model_name = model_name
+        self._initial_capacity = max(1, initial_capacity)
+        # A snapshot or bulk-loaded matrix, used as-is and never written to.
+        self._base: np.ndarray | None = None
+        # Appended rows, after those of `_base`.
+        self._matrix: np.ndarray | None = None
+        self._ids = np.empty(0, dtype=np.int64)
+        self._contents: list[str] = []
+        self._positions: dict[str, int] = {}
+        self._size = 0
+        # Snapshot rows with no matching product; they never match a search.
+        self._excluded: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    async def initialize(self):
+        if self._db is None:
+            return
+
+        snapshot = None
+        if self._snapshot_dir and self._model_name:
+            snapshot = EmbeddingSnapshot.load(self._snapshot_dir, self._model_name)
+
+        async with self._db.acquire() as conn:
+            if snapshot is None:
+                records = await conn.fetch(
+                    "SELECT id, content, embedding FROM products ORDER BY id"
+                )
+            else:
+                records = await conn.fetch(
+                    "SELECT id, content, content_hash FROM products ORDER BY id"
+                )
+                records = self._load_snapshot(snapshot, records)
+                if records:
+                    records = await conn.fetch(
+                        "SELECT id, content, embedding FROM products WHERE id = ANY($1) ORDER BY id",
+                        [r["id"] for r in records],
+                    )
+
+        self._append(
+            [r["id"] for r in records],
+            [r["content"] for r in records],
+            [r["embedding"] for r in records],
+        )
+        logger.info(f"Loaded {self._size} products into the in-process vector index.")
+
+    def _load_snapshot(self, snapshot: EmbeddingSnapshot, records: list) -> list:
+        """
+        Uses the memory-mapped snapshot as the index and returns the products
+        that are not in it, which still have to be loaded from the table.
+        """
+        size = len(snapshot)
+        ids = np.full(size, -1, dtype=np.int64)
+        contents = [""] * size
+        missing = []
+        for record in records:
+            position = snapshot.position(record["content_hash"])
+            if position is None:
+                missing.append(record)
+            else:
+                ids[position] = record["id"]
+                contents[position] = record["content"]
+
+        self._base = snapshot.embeddings
+        self._matrix = None
+        self._ids = ids
+        self._contents = contents
+        self._positions = {c: i for i, c in enumerate(contents) if ids[i] >= 0}
+        self._size = size
+        excluded = np.flatnonzero(ids < 0)
+        self._excluded = excluded if len(excluded) else None
+        logger.info(
+            f"Mapped {size - len(excluded)} products from the embedding snapshot in {snapshot.directory}."
+        )
+        return missing
+
+    def load_embeddings(
+        self, ids: np.ndarray, contents: list[str], embeddings: np.ndarray
+    ):
+        """
+        Replaces the index with an L2-normalized float32 matrix, used as-is so
+        it can be memory-mapped. Avoids building one document per product
+        when bulk-loading large catalogues.
+        """
+        if len(ids) != len(contents) or len(ids) != len(embeddings):
+            raise ValueError("ids, contents and embeddings must have the same length.")
+        self._base = embeddings
+        self._matrix = None
+        self._ids = np.asarray(ids, dtype=np.int64)
+        self._contents = list(contents)
+        self._positions = {c: i for i, c in enumerate(self._contents)}
+        self._size = len(ids)
+        self._excluded = None
+
+    async def index_documents(self, documents: list[ProductDocument]):
+        new_documents = [d for d in documents if d.content not in self._positions]
+        self._append(
+            [d.id for d in new_documents],
+            [d.content for d in new_documents],
+            [d.embeddings for d in new_documents],
+        )
+
+    async def semantic_search(
+        self, embedding: list[float], top_k: int
+    ) -> list[ProductDocument]:
+        results = await self.semantic_search_many([embedding], top_k)
+        return results[0]
+
+    async def semantic_search_many(
+        self, embeddings: list[list[float]], top_k: int
+    ) -> list[list[ProductDocument]]:
+        """Searches for many query embeddings with a single matrix product."""
+        if self._size == 0 or top_k <= 0:
+            return [[] for _ in embeddings]
+
+        if self._size > INLINE_SEARCH_LIMIT:
+            rows = await asyncio.to_thread(self._search, embeddings, top_k)
+        else:
+            rows = self._search(embeddings, top_k)
+        return [
+            [
+                ProductDocument(
+                    id=int(self._ids[i]),
+                    content=self._contents[i],
+                    embeddings=self._row(i),
+                )
+                for i in row
+            ]
+            for row in rows
+        ]
+
+    @property
+    def _base_size(self) -> int:
+        return 0 if self._base is None else len(self._base)
+
+    def _row(self, position: int) -> np.ndarray:
+        base_size = self._base_size
+        if position < base_size:
+            return self._base[position]
+        return self._matrix[position - base_size]
+
+    def _search(self, embeddings: list[list[float]], top_k: int) -> list[np.ndarray]:
+        size = self._size
+        queries = normalize(np.asarray(embeddings, dtype=np.float32))
+        appended = size - self._base_size
+        parts = []
+        if self._base is not None:
+            parts.append(queries @ self._base.T)
+        if appended:
+            parts.append(queries @ self._matrix[:appended].T)
+        scores = parts[0] if len(parts) == 1 else np.concatenate(parts, axis=1)
+
+        excluded = 0
+        if self._excluded is not None:
+            scores[:, self._excluded] = -np.inf
+            excluded = len(self._excluded)
+
+        # Excluded rows are dropped after ranking, so rank enough to keep top_k.
+        k = min(top_k + excluded, size)
+        if k < size:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(size), (len(queries), size))
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind="stable")
+        ranked = np.take_along_axis(candidates, order, axis=1)
+        if not excluded:
+            return list(ranked)
+        return [row[self._ids[row] >= 0][:top_k] for row in ranked]
+
+    def _append(self, ids: list[int], contents: list[str], embeddings: list):
+        if not ids:
+            return
+        vectors = normalize(np.asarray(embeddings, dtype=np.float32))
+        self._reserve(self._size + len(ids), vectors.shape[1])
+
+        start, end = self._size, self._size + len(ids)
+        base_size = self._base_size
+        self._matrix[start - base_size : end - base_size] = vectors
+        self._ids[start:end] = ids
+        for position, content in enumerate(contents, start):
+            self._positions[content] = position
+        self._contents.extend(contents)
+        self._size = end
+
+    def _reserve(self, size: int, dimension: int):
+        """
+        Grows the appended rows geometrically so appends stay amortized O(1).
+        The base matrix is left as it is.
+        """
+        indexed = self._base if self._matrix is None else self._matrix
+        if indexed is not None and indexed.shape[1] != dimension:
+            raise ValueError(
+                f"Embedding dimension {dimension} does not match the index ({indexed.shape[1]})."
+            )
+        if len(self._ids) < size:
+            ids = np.empty(max(size, 2 * len(self._ids)), dtype=np.int64)
+            ids[: self._size] = self._ids[: self._size]
+            self._ids = ids
+
+        rows = size - self._base_size
+        if self._matrix is None:
+            capacity = max(self._initial_capacity, rows)
+            self._matrix = np.empty((capacity, dimension), dtype=np.float32)
+            return
+        if rows <= len(self._matrix):
+            return
+
+        appended = self._size - self._base_size
+        matrix = np.empty(
+            (max(rows, 2 * len(self._matrix)), dimension), dtype=np.float32
+        )
+        matrix[:appended] = self._matrix[:appended]
+        self._matrix = matrix
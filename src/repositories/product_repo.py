@@ -1,41 +1,358 @@
+import numpy as np
 from src.models.query import ProductDocument
 from .interfaces import ProductRepositoryInterface
+from .embedding_snapshot import content_hash
+from .vector_storage import candidates_source, validate_storage
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _query_terms(param: str) -> str:
+    """
+    Returns a `q` CTE holding a tsquery that matches any of the terms of the
+    text in `param`, so natural-language questions still match on keywords.
+    """
+    return (
+        "q AS (SELECT nullif(replace("
+        f"plainto_tsquery('english', {param})::text, '&', '|'), '')::tsquery AS terms)"
+    )
+
+
 class PostgresProductRepository(ProductRepositoryInterface):
-    """PostgreSQL implementation of Product Repository."""
+    """
+    PostgreSQL implementation of Product Repository.
 
-    def __init__(self, db):
+    With a compact `storage` ("halfvec" or "binary"), vector searches first
+    take `rerank_candidates` products from the compact index, then re-rank
+    them on the full-precision embeddings.
+    """
+
+    def __init__(
+        self,
+        db,
+        vector_weight: float = 1.0,
+        keyword_weight: float = 1.0,
+        hybrid_candidates: int = 50,
+        rrf_k: int = 60,
+        storage: str = "full",
+        rerank_candidates: int = 40,
+    ):
+        validate_storage(storage)
         self._db = db
+        self._vector_weight = vector_weight
+        self._keyword_weight = keyword_weight
+        self._hybrid_candidates = hybrid_candidates
+        self._rrf_k = rrf_k
+        self._storage = storage
+        self._rerank_candidates = rerank_candidates
 
     async def index_documents(self, documents: list[ProductDocument]):
         try:
-            async with self._db.acquire() as conn:
-                await conn.executemany(
-                    "INSERT INTO products (content, embedding) VALUES ($1, $2) ON CONFLICT (content) DO NOTHING",
-                    [(doc.content, doc.embedding) for doc in documents],
-                )
+            await self.upsert_products(
+                [
+                    (doc.content, content_hash(doc.content), doc.embeddings)
+                    for doc in documents
+                ]
+            )
         except Exception as e:
             logger.exception(f"Failed to index documents: {e}")
             raise
 
+    async def existing_hashes(self, hashes: list[str]) -> set[str]:
+        """Returns which of the given content hashes are already stored."""
+        async with self._db.acquire() as conn:
+            records = await conn.fetch(
+                "SELECT content_hash FROM products WHERE content_hash = ANY($1)",
+                hashes,
+            )
+        return {r["content_hash"] for r in records}
+
+    async def upsert_products(self, records: list[tuple[str, str, np.ndarray]]) -> int:
+        """
+        Bulk-loads (content, content_hash, embedding) records with COPY into a
+        staging table, then merges them into `products` by content hash in
+        the same transaction. Returns the number of rows written.
+        """
+        if not records:
+            return 0
+        async with self._db.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    """
+                    CREATE TEMP TABLE IF NOT EXISTS products_staging (
+                        content TEXT NOT NULL,
+                        content_hash TEXT NOT NULL,
+                        embedding VECTOR NOT NULL
+                    ) ON COMMIT DELETE ROWS
+                    """
+                )
+                await conn.copy_records_to_table(
+                    "products_staging",
+                    records=records,
+                    columns=["content", "content_hash", "embedding"],
+                )
+                result = await conn.execute(
+                    """
+                    INSERT INTO products (content, content_hash, embedding)
+                    SELECT DISTINCT ON (content_hash) content, content_hash, embedding
+                    FROM products_staging
+                    ON CONFLICT (content_hash) DO UPDATE SET embedding = EXCLUDED.embedding
+                    """
+                )
+        return int(result.split()[-1])
+
     async def semantic_search(
-        self, embedding: list[float], top_k: int
+        self,
+        embedding: list[float],
+        top_k: int,
+        ef_search: int | None = None,
+        probes: int | None = None,
+    ) -> list[ProductDocument]:
+        """
+        Searches by cosine distance. `ef_search` and `probes` override the
+        pool-wide HNSW/IVFFlat settings for this query only.
+        """
+        try:
+            async with self._db.acquire() as conn:
+                candidates = candidates_source(
+                    self._storage, len(embedding), "$2", self._rerank_candidates
+                )
+                query = (
+                    "SELECT id, content, embedding "
+                    f"FROM {candidates} ORDER BY embedding <=> $1 LIMIT $2"
+                )
+                if ef_search is None and probes is None:
+                    records = await conn.fetch(query, embedding, top_k)
+                else:
+                    async with conn.transaction():
+                        if ef_search is not None:
+                            await conn.execute(
+                                f"SET LOCAL hnsw.ef_search = {int(ef_search)}"
+                            )
+                        if probes is not None:
+                            await conn.execute(
+                                f"SET LOCAL ivfflat.probes = {int(probes)}"
+                            )
+                        records = await conn.fetch(query, embedding, top_k)
+                return [
+                    ProductDocument(
+                        id=r["id"], content=r["content"], embeddings=r["embedding"]
+                    )
+                    for r in records
+                ]
+        except Exception as e:
+            logger.exception(f"Failed to perform semantic search: {e}")
+            raise
+
+    async def semantic_search_many(
+        self, embeddings: list[list[float]], top_k: int
+    ) -> list[list[ProductDocument]]:
+        """
+        Searches for many query embeddings in one statement: the queries are
+        unnested and each one runs the ANN search in a LATERAL subquery, so a
+        batch takes one connection and one round trip.
+        """
+        if not embeddings:
+            return []
+        try:
+            async with self._db.acquire() as conn:
+                candidates = candidates_source(
+                    self._storage,
+                    len(embeddings[0]),
+                    "$2",
+                    self._rerank_candidates,
+                    query="q.query_embedding",
+                )
+                records = await conn.fetch(
+                    f"""
+                    SELECT q.position, p.id, p.content, p.embedding
+                    FROM unnest($1::vector[]) WITH ORDINALITY AS q(query_embedding, position)
+                    CROSS JOIN LATERAL (
+                        SELECT id, content, embedding,
+                               embedding <=> q.query_embedding AS distance
+                        FROM {candidates}
+                        ORDER BY distance LIMIT $2
+                    ) p
+                    ORDER BY q.position, p.distance
+                    """,
+                    # asyncpg would unpack arrays into a nested SQL array;
+                    # memoryviews reach the vector codec whole.
+                    [memoryview(np.asarray(e, dtype=np.float32)) for e in embeddings],
+                    top_k,
+                )
+        except Exception as e:
+            logger.exception(f"Failed to perform batch semantic search: {e}")
+            raise
+
+        results: list[list[ProductDocument]] = [[] for _ in embeddings]
+        for r in records:
+            results[r["position"] - 1].append(
+                ProductDocument(
+                    id=r["id"], content=r["content"], embeddings=r["embedding"]
+                )
+            )
+        return results
+
+    async def keyword_search(self, query: str, top_k: int) -> list[ProductDocument]:
+        """Ranks products by full-text match with any of the query terms."""
+        try:
+            async with self._db.acquire() as conn:
+                records = await conn.fetch(
+                    f"""
+                    WITH {_query_terms("$1")}
+                    SELECT id, content, embedding FROM products, q
+                    WHERE content_tsv @@ q.terms
+                    ORDER BY ts_rank_cd(content_tsv, q.terms) DESC, id
+                    LIMIT $2
+                    """,
+                    query,
+                    top_k,
+                )
+                return [
+                    ProductDocument(
+                        id=r["id"], content=r["content"], embeddings=r["embedding"]
+                    )
+                    for r in records
+                ]
+        except Exception as e:
+            logger.exception(f"Failed to perform keyword search: {e}")
+            raise
+
+    async def hybrid_search(
+        self, embedding: list[float], query: str, top_k: int
     ) -> list[ProductDocument]:
+        """
+        Fetches the ANN and the full-text candidate lists in one round trip
+        and fuses them with weighted reciprocal-rank fusion, so exact
+        matches such as SKUs or brand names rank high even at small k.
+        """
         try:
             async with self._db.acquire() as conn:
-                embedding_str = "[" + ",".join(str(x) for x in embedding) + "]"
+                candidates = candidates_source(
+                    self._storage, len(embedding), "$3", self._rerank_candidates
+                )
                 records = await conn.fetch(
-                    "SELECT id, content FROM products ORDER BY embedding <=> $1 LIMIT $2",
-                    embedding_str,
+                    f"""
+                    WITH {_query_terms("$7")},
+                    vector AS (
+                        SELECT id, row_number() OVER (ORDER BY distance) AS rank
+                        FROM (
+                            SELECT id, embedding <=> $1 AS distance
+                            FROM {candidates}
+                            ORDER BY distance LIMIT $3
+                        ) nearest
+                    ),
+                    lexical AS (
+                        SELECT id, row_number() OVER (ORDER BY score DESC, id) AS rank
+                        FROM (
+                            SELECT id, ts_rank_cd(content_tsv, q.terms) AS score
+                            FROM products, q
+                            WHERE content_tsv @@ q.terms
+                            ORDER BY score DESC, id LIMIT $3
+                        ) matches
+                    ),
+                    fused AS (
+                        SELECT coalesce(v.id, l.id) AS id,
+                               coalesce($4::float8 / ($6::int + v.rank), 0)
+                                 + coalesce($5::float8 / ($6::int + l.rank), 0) AS score
+                        FROM vector v FULL OUTER JOIN lexical l ON v.id = l.id
+                    )
+                    SELECT p.id, p.content, p.embedding
+                    FROM fused JOIN products p USING (id)
+                    ORDER BY fused.score DESC, p.id
+                    LIMIT $2
+                    """,
+                    embedding,
                     top_k,
+                    max(top_k, self._hybrid_candidates),
+                    self._vector_weight,
+                    self._keyword_weight,
+                    self._rrf_k,
+                    query,
                 )
                 return [
-                    ProductDocument(id=r["id"], content=r["content"]) for r in records
+                    ProductDocument(
+                        id=r["id"], content=r["content"], embeddings=r["embedding"]
+                    )
+                    for r in records
                 ]
         except Exception as e:
-            logger.exception(f"Failed to perform semantic search: {e}")
+            logger.exception(f"Failed to perform hybrid search: {e}")
+            raise
+
+    async def hybrid_search_many(
+        self, embeddings: list[list[float]], queries: list[str], top_k: int
+    ) -> list[list[ProductDocument]]:
+        """
+        Runs the hybrid search of `hybrid_search` for many embedding and query
+        text pairs in one statement, each pair in a LATERAL subquery.
+        """
+        if not embeddings:
+            return []
+        try:
+            async with self._db.acquire() as conn:
+                candidates = candidates_source(
+                    self._storage,
+                    len(embeddings[0]),
+                    "$3",
+                    self._rerank_candidates,
+                    query="batch.query_embedding",
+                )
+                records = await conn.fetch(
+                    f"""
+                    SELECT batch.position, p.id, p.content, p.embedding
+                    FROM unnest($1::vector[], $7::text[]) WITH ORDINALITY
+                        AS batch(query_embedding, query_text, position)
+                    CROSS JOIN LATERAL (
+                        WITH {_query_terms("batch.query_text")},
+                        vector AS (
+                            SELECT id, row_number() OVER (ORDER BY distance) AS rank
+                            FROM (
+                                SELECT id, embedding <=> batch.query_embedding AS distance
+                                FROM {candidates}
+                                ORDER BY distance LIMIT $3
+                            ) nearest
+                        ),
+                        lexical AS (
+                            SELECT id, row_number() OVER (ORDER BY score DESC, id) AS rank
+                            FROM (
+                                SELECT id, ts_rank_cd(content_tsv, q.terms) AS score
+                                FROM products, q
+                                WHERE content_tsv @@ q.terms
+                                ORDER BY score DESC, id LIMIT $3
+                            ) matches
+                        ),
+                        fused AS (
+                            SELECT coalesce(v.id, l.id) AS id,
+                                   coalesce($4::float8 / ($6::int + v.rank), 0)
+                                     + coalesce($5::float8 / ($6::int + l.rank), 0) AS score
+                            FROM vector v FULL OUTER JOIN lexical l ON v.id = l.id
+                        )
+                        SELECT p.id, p.content, p.embedding, fused.score
+                        FROM fused JOIN products p USING (id)
+                        ORDER BY fused.score DESC, p.id
+                        LIMIT $2
+                    ) p
+                    ORDER BY batch.position, p.score DESC, p.id
+                    """,
+                    [memoryview(np.asarray(e, dtype=np.float32)) for e in embeddings],
+                    top_k,
+                    max(top_k, self._hybrid_candidates),
+                    self._vector_weight,
+                    self._keyword_weight,
+                    self._rrf_k,
+                    queries,
+                )
+        except Exception as e:
+            logger.exception(f"Failed to perform batch hybrid search: {e}")
             raise
+
+        results: list[list[ProductDocument]] = [[] for _ in embeddings]
+        for r in records:
+            results[r["position"] - 1].append(
+                ProductDocument(
+                    id=r["id"], content=r["content"], embeddings=r["embedding"]
+                )
+            )
+        return results
@@ -0,0 +1,75 @@
+import asyncpg
+
+# "full" searches the float32 `embedding` column directly. The compact modes
+# index a half-precision or binary-quantized expression of it instead, and
+# re-rank the candidates they find on the float32 column.
+VECTOR_STORAGES = ("full", "halfvec", "binary")
+
+# halfvec and binary_quantize were added in pgvector 0.7.0.
+COMPACT_STORAGE_MIN_VERSION = (0, 7, 0)
+
+
+def validate_storage(storage: str):
+    if storage not in VECTOR_STORAGES:
+        raise ValueError(f"Unknown vector storage: {storage!r}")
+
+
+def index_expression(storage: str, dimension: int) -> tuple[str, str]:
+    """Returns the indexed expression and its operator class."""
+    validate_storage(storage)
+    if storage == "halfvec":
+        return f"(embedding::halfvec({dimension}))", "halfvec_cosine_ops"
+    if storage == "binary":
+        return f"(binary_quantize(embedding)::bit({dimension}))", "bit_hamming_ops"
+    return "embedding", "vector_cosine_ops"
+
+
+def coarse_distance(storage: str, dimension: int, param: str) -> str:
+    """
+    Returns the distance between the stored embeddings and the query in
+    `param`, written so that the index of `index_expression` can serve it.
+    """
+    validate_storage(storage)
+    if storage == "halfvec":
+        return (
+            f"embedding::halfvec({dimension}) <=> {param}::vector::halfvec({dimension})"
+        )
+    if storage == "binary":
+        return (
+            f"binary_quantize(embedding)::bit({dimension}) "
+            f"<~> binary_quantize({param}::vector)"
+        )
+    return f"embedding <=> {param}"
+
+
+def candidates_source(
+    storage: str, dimension: int, limit: str, candidates: int, query: str = "$1"
+) -> str:
+    """
+    Returns the FROM item a vector search ranks on full precision: the whole
+    `products` table, or the `candidates` (at least `limit`) products nearest
+    by the compact representation to the query vector in `query`.
+    """
+    if storage == "full":
+        return "products"
+    distance = coarse_distance(storage, dimension, query)
+    return (
+        f"(SELECT id, content, embedding FROM products ORDER BY {distance} "
+        f"LIMIT greatest({limit}, {int(candidates)})) candidates"
+    )
+
+
+async def check_storage_support(conn: asyncpg.Connection, storage: str):
+    """Fails early if the installed pgvector cannot serve a compact storage."""
+    validate_storage(storage)
+    if storage == "full":
+        return
+    version = await conn.fetchval(
+        "SELECT extversion FROM pg_extension WHERE extname = 'vector'"
+    )
+    parsed = tuple(int(part) for part in (version or "0").split(".")[:3])
+    if parsed < COMPACT_STORAGE_MIN_VERSION:
+        raise RuntimeError(
+            f"VECTOR_STORAGE={storage} needs pgvector 0.7.0 or later, "
+            f"but version {version} is installed."
+        )
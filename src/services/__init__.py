@@ -1,3 +1,6 @@
 from .callback import WebhookCallbackService
 from .openai_generation import OpenAIGenerationService
 from .retrieval import ProductRetrievalService
+from .keyword_retrieval import KeywordRetrievalService
+from .embedding_batcher import EmbeddingBatcher
+from .context_packer import ContextPacker
@@ -1,22 +1,152 @@
 from .interfaces import CallbackServiceInterface
+import asyncio
 import logging
+import time
+from contextlib import nullcontext
 import httpx
-from src.config.secrets import secrets
+from src.observability import StageTimings
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def _is_transient(error: BaseException) -> bool:
+    """Network errors, 429 and 5xx responses are worth retrying."""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+
 class WebhookCallbackService(CallbackServiceInterface):
-    """Service to send the final answer to a webhook."""
+    """
+    Service to send the final answer to a webhook.
+
+    Deliveries run in the background on a shared, pooled HTTP client, so
+    `send_response` returns as soon as the answer is queued. Transient
+    failures are retried with exponential backoff. With `batch_size` > 1,
+    answers are coalesced into a single POST of `{"batch": [...]}`. At most
+    `max_in_flight` deliveries run at once (no limit when 0).
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        max_retries: int,
+        retry_backoff_seconds: float,
+        batch_size: int,
+        batch_wait_ms: float,
+        max_in_flight: int = 0,
+        timings: StageTimings | None = None,
+    ):
+        self._client = client
+        self._timings = timings
+        self._url = url
+        self._max_retries = max(0, max_retries)
+        self._retry_backoff = retry_backoff_seconds
+        self._batch_size = max(1, batch_size)
+        self._batch_wait = max(0.0, batch_wait_ms) / 1000
+        self._pending: list[dict] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._deliveries: set[asyncio.Task] = set()
+        self._limit = (
+            asyncio.Semaphore(max_in_flight) if max_in_flight > 0 else nullcontext()
+        )
+
+        self._delivered = 0
+        self._failed = 0
+        self._requests = 0
+        self._retries = 0
+        self._successful_posts = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
 
     async def send_response(self, user_id: str, answer: str):
+        self._pending.append({"user_id": user_id, "answer": answer})
+        if len(self._pending) >= self._batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                self._batch_wait, self._flush
+            )
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        payloads, self._pending = self._pending, []
+        if not payloads:
+            return
+
+        task = asyncio.create_task(self._deliver(payloads))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def _deliver(self, payloads: list[dict]):
+        body = payloads[0] if len(payloads) == 1 else {"batch": payloads}
+        users = ", ".join(p["user_id"] for p in payloads)
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    secrets.CALLBACK_URL,
-                    json={"user_id": user_id, "answer": answer},
-                    timeout=10.0,
-                )
-                response.raise_for_status()
-        except httpx.RequestError as e:
-            logger.error(f"Failed to send callback for user {user_id}: {e}")
+            async with self._limit:
+                started = time.perf_counter()
+                async for attempt in AsyncRetrying(
+                    stop=stop_after_attempt(self._max_retries + 1),
+                    wait=wait_exponential(multiplier=self._retry_backoff),
+                    retry=retry_if_exception(_is_transient),
+                    reraise=True,
+                ):
+                    with attempt:
+                        if attempt.retry_state.attempt_number > 1:
+                            self._retries += 1
+                        self._requests += 1
+                        response = await self._client.post(self._url, json=body)
+                        response.raise_for_status()
+                latency = time.perf_counter() - started
+        except httpx.HTTPError as e:
+            self._failed += len(payloads)
+            logger.error(f"Failed to send callback for user {users}: {e}")
+            return
+        except Exception:
+            self._failed += len(payloads)
+            logger.error(
+                f"Unexpected error sending callback for user {users}:", exc_info=True
+            )
+            return
+
+        self._delivered += len(payloads)
+        self._successful_posts += 1
+        self._total_latency += latency
+        self._max_latency = max(self._max_latency, latency)
+        if self._timings is not None:
+            self._timings.record("callback.delivery", latency)
+
+    async def drain(self):
+        """Delivers any buffered answers and waits for in-flight deliveries."""
+        self._flush()
+        if self._deliveries:
+            await asyncio.gather(*self._deliveries, return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Returns delivery counters and latency since startup."""
+        return {
+            "delivered": self._delivered,
+            "failed": self._failed,
+            "requests": self._requests,
+            "retries": self._retries,
+            "pending": len(self._pending),
+            "in_flight": len(self._deliveries),
+            "mean_latency_ms": (
+                1000 * self._total_latency / self._successful_posts
+                if self._successful_posts
+                else 0.0
+            ),
+            "max_latency_ms": 1000 * self._max_latency,
+        }
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import numpy as np
+from src.cache import LRUTTLCache
+from src.models.query import ProductDocument
+
+logger = logging.getLogger(__name__)
+
+# A truncated document shorter than this is more noise than context.
+MIN_TRUNCATED_TOKENS = 32
+
+
+class _ApproximateEncoding:
+    """Counts roughly four characters per token, when tiktoken is unavailable."""
+
+    def encode(self, text: str) -> list[str]:
+        return [text[i : i + 4] for i in range(0, len(text), 4)]
+
+    def decode(self, tokens: list[str]) -> str:
+        return "".join(tokens)
+
+
+class ContextPacker:
+    """
+    Fits retrieved documents into a prompt token budget.
+
+    Documents are ordered by maximal marginal relevance (MMR) to the query,
+    near-duplicates of an already selected document are dropped, and the
+    documents are added until `token_budget` is spent, truncating the last
+    one. The budget covers the whole prompt: `prompt` (with the query in
+    place of `{query}`) and one `separator` per document are counted
+    against it. Tokenized documents are cached by product id. A budget of 0
+    disables packing.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        token_budget: int,
+        mmr_lambda: float,
+        duplicate_threshold: float,
+        token_cache: LRUTTLCache[int, list],
+        encoding=None,
+        prompt: str = "",
+        separator: str = "",
+    ):
+        self._model_name = model_name
+        self._token_budget = max(0, token_budget)
+        self._mmr_lambda = mmr_lambda
+        self._duplicate_threshold = duplicate_threshold
+        self._token_cache = token_cache
+        self._encoding = encoding
+        self._prompt = prompt.replace("{query}", "")
+        self._separator = separator
+        self._prompt_tokens: int | None = None
+        self._separator_tokens = 0
+
+        self._packed = 0
+        self._tokens_before = 0
+        self._tokens_after = 0
+        self._duplicates = 0
+        self._truncated = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._token_budget > 0
+
+    @property
+    def encoding(self):
+        """Loads the model's tiktoken encoding on first use."""
+        if self._encoding is None:
+            try:
+                import tiktoken
+
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self._model_name)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                logger.warning(
+                    f"Could not load a tiktoken encoding ({e}); estimating token counts."
+                )
+                self._encoding = _ApproximateEncoding()
+        return self._encoding
+
+    async def load_encoding(self):
+        """
+        Loads the encoding off the event loop, since tiktoken may download
+        it on first use.
+        """
+        if self._encoding is None:
+            await asyncio.to_thread(lambda: self.encoding)
+
+    def _tokens(self, document: ProductDocument) -> list:
+        tokens = self._token_cache.get(document.id)
+        if tokens is None:
+            tokens = self.encoding.encode(document.content)
+            self._token_cache.set(document.id, tokens)
+        return tokens
+
+    def _reserved_tokens(self, query: str) -> int:
+        """Counts the prompt and query tokens that surround the documents."""
+        if self._prompt_tokens is None:
+            self._prompt_tokens = self._count(self._prompt)
+            self._separator_tokens = self._count(self._separator)
+        return self._prompt_tokens + self._count(query)
+
+    def _count(self, text: str) -> int:
+        return len(self.encoding.encode(text)) if text else 0
+
+    def pack(
+        self,
+        documents: list[ProductDocument],
+        query_embedding: np.ndarray | None = None,
+        query: str = "",
+    ) -> list[ProductDocument]:
+        """Returns the documents to put in the prompt, in order of use."""
+        if not self.enabled or not documents:
+            return documents
+
+        tokens = {document.id: self._tokens(document) for document in documents}
+        reserved = self._reserved_tokens(query)
+        # Both counts are of the whole prompt: reserved tokens, documents and
+        # their separators.
+        before = reserved + sum(
+            len(t) + self._separator_tokens for t in tokens.values()
+        )
+
+        budget = self._token_budget - reserved
+        if budget <= 0:
+            logger.warning(
+                f"The prompt alone takes the whole context budget of "
+                f"{self._token_budget} tokens."
+            )
+        packed, remaining = [], max(0, budget)
+        for document in self._select(documents, query_embedding):
+            document_tokens = tokens[document.id]
+            cost = len(document_tokens) + self._separator_tokens
+            if cost <= remaining:
+                packed.append(document)
+                remaining -= cost
+                continue
+            available = remaining - self._separator_tokens
+            if available >= MIN_TRUNCATED_TOKENS:
+                content = self.encoding.decode(document_tokens[:available])
+                packed.append(ProductDocument(id=document.id, content=content))
+                remaining = 0
+                self._truncated += 1
+            break
+
+        after = reserved + max(0, budget) - remaining
+        self._packed += 1
+        self._tokens_before += before
+        self._tokens_after += after
+        logger.info(
+            f"Packed the prompt from {before} to {after} tokens "
+            f"({len(documents)} -> {len(packed)} documents)."
+        )
+        return packed
+
+    def _select(
+        self, documents: list[ProductDocument], query_embedding: np.ndarray | None
+    ) -> list[ProductDocument]:
+        """
+        Orders documents by MMR and drops near-duplicates. Without
+        embeddings the retrieval order is kept.
+        """
+        if query_embedding is None or any(
+            d.embeddings is None or len(d.embeddings) == 0 for d in documents
+        ):
+            return documents
+
+        vectors = np.asarray([d.embeddings for d in documents], dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+        query = np.asarray(query_embedding, dtype=np.float32)
+        relevance = vectors @ (query / (np.linalg.norm(query) + 1e-12))
+        similarity = vectors @ vectors.T
+
+        selected: list[int] = []
+        candidates = list(range(len(documents)))
+        redundancy = np.zeros(len(documents), dtype=np.float32)
+        while candidates:
+            scores = [
+                self._mmr_lambda * relevance[i] - (1 - self._mmr_lambda) * redundancy[i]
+                for i in candidates
+            ]
+            best = candidates.pop(int(np.argmax(scores)))
+            if redundancy[best] >= self._duplicate_threshold:
+                self._duplicates += 1
+                continue
+            selected.append(best)
+            redundancy = np.maximum(redundancy, similarity[best])
+        return [documents[i] for i in selected]
+
+    def stats(self) -> dict:
+        """Returns mean prompt token counts before and after packing."""
+        return {
+            "packed": self._packed,
+            "token_budget": self._token_budget,
+            "mean_tokens_before": (
+                self._tokens_before / self._packed if self._packed else 0.0
+            ),
+            "mean_tokens_after": (
+                self._tokens_after / self._packed if self._packed else 0.0
+            ),
+            "duplicates_dropped": self._duplicates,
+            "truncated": self._truncated,
+            "token_cache": self._token_cache.stats(),
+        }
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor
+import numpy as np
+from src.observability import StageTimings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embedding requests into a single vectorized encode call.
+
+    Requests are collected until either `max_batch_size` texts are pending or
+    `max_wait_ms` has elapsed since the first one arrived. The batch is then
+    encoded on the executor and each caller receives its own row.
+    """
+
+    def __init__(
+        self,
+        model,
+        executor: Executor,
+        max_batch_size: int,
+        max_wait_ms: float,
+        timings: StageTimings | None = None,
+    ):
+        self._model = model
+        self._timings = timings
+        self._executor = executor
+        self._max_batch_size = max(1, max_batch_size)
+        self._max_wait = max(0.0, max_wait_ms) / 1000
+        self._pending: list[tuple[str, asyncio.Future, float]] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._running: set[asyncio.Task] = set()
+
+        self._batches = 0
+        self._items = 0
+        self._max_seen_batch = 0
+        self._batch_sizes: dict[int, int] = {}
+        self._total_wait = 0.0
+        self._max_seen_wait = 0.0
+        self._total_encode = 0.0
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Returns the embedding of a single text, encoded as part of a batch."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._max_wait, self._flush)
+
+        return await future
+
+    async def embed_many(self, texts: list[str]) -> np.ndarray:
+        """
+        Encodes texts that arrive together in one call, without waiting for
+        the batching window. Returns one row per text.
+        """
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        embeddings = await loop.run_in_executor(self._executor, self._encode, texts)
+        self._record(
+            [(text, None, started) for text in texts], started, time.perf_counter()
+        )
+        return embeddings
+
+    def _flush(self):
+        """Hands the pending requests over to a batch encode task."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._encode_batch(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _encode_batch(self, batch: list[tuple[str, asyncio.Future, float]]):
+        texts = [text for text, _, _ in batch]
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        try:
+            embeddings = await loop.run_in_executor(self._executor, self._encode, texts)
+        except Exception as e:
+            logger.exception(f"Failed to encode a batch of {len(texts)} texts: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self._record(batch, started, time.perf_counter())
+        for (_, future, _), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        return self._model.encode(texts, batch_size=len(texts), convert_to_numpy=True)
+
+    def _record(self, batch, started: float, finished: float):
+        size = len(batch)
+        self._batches += 1
+        self._items += size
+        self._max_seen_batch = max(self._max_seen_batch, size)
+        self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+        for _, _, enqueued in batch:
+            wait = started - enqueued
+            self._total_wait += wait
+            self._max_seen_wait = max(self._max_seen_wait, wait)
+        self._total_encode += finished - started
+        if self._timings is not None:
+            self._timings.record("embedding.encode", finished - started)
+
+    def stats(self) -> dict:
+        """Returns batch size and wait time statistics since startup."""
+        return {
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": self._items / self._batches if self._batches else 0.0,
+            "max_batch_size": self._max_seen_batch,
+            "batch_sizes": dict(sorted(self._batch_sizes.items())),
+            "mean_wait_ms": (
+                1000 * self._total_wait / self._items if self._items else 0.0
+            ),
+            "max_wait_ms": 1000 * self._max_seen_wait,
+            "mean_encode_ms": (
+                1000 * self._total_encode / self._batches if self._batches else 0.0
+            ),
+        }
@@ -1,3 +1,4 @@
 from .callback_service_interface import CallbackServiceInterface
 from .generation_service_interface import GenerationServiceInterface
+from .product_search_interface import ProductSearchInterface
 from .retrieval_service_interface import RetrievalServiceInterface
@@ -9,3 +9,7 @@ class CallbackServiceInterface(ABC):
     async def send_response(self, user_id: str, answer: str) -> None:
         """Sends a response to the user."""
         pass
+
+    async def drain(self) -> None:
+        """Waits for responses that are still being delivered. No-op by default."""
+        pass
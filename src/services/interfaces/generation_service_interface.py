@@ -1,12 +1,28 @@
 from abc import abstractmethod, ABC
-from typing import Protocol
+from typing import AsyncIterator, Protocol
 from src.models.query import ProductDocument
 
 
 class GenerationServiceInterface(ABC):
     """Defines the contract for the Generation Service (Responder Agent)."""
 
+    NO_PRODUCTS_RESPONSE = (
+        "I'm sorry, I couldn't find any relevant products for your query."
+    )
+    ERROR_RESPONSE = "Sorry, I'm having trouble generating a response right now."
+
     @abstractmethod
-    def generate_response(self, context_docs: list[ProductDocument], query: str) -> str:
+    async def generate_response(
+        self, context_docs: list[ProductDocument], query: str
+    ) -> str:
         """Generates a response based on the provided context documents and user query."""
         pass
+
+    async def stream_response(
+        self, context_docs: list[ProductDocument], query: str
+    ) -> AsyncIterator[str]:
+        """
+        Yields the response in chunks as it is generated. By default the
+        whole response is yielded at once.
+        """
+        yield await self.generate_response(context_docs, query)
@@ -0,0 +1,11 @@
+from abc import abstractmethod, ABC
+from src.models.query import ProductDocument
+
+
+class ProductSearchInterface(ABC):
+    """Defines the contract for a retrieval strategy, one branch of the retriever."""
+
+    @abstractmethod
+    async def find_similar_products(self, query: str) -> list[ProductDocument]:
+        """Finds and returns a list of products relevant to the user query."""
+        pass
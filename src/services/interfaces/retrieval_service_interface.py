@@ -1,12 +1,28 @@
-from abc import abstractmethod, ABC
+import asyncio
+from abc import abstractmethod
 from typing import Protocol
+import numpy as np
 from src.models.query import ProductDocument
+from .product_search_interface import ProductSearchInterface
 
 
-class RetrievalServiceInterface(ABC):
+class RetrievalServiceInterface(ProductSearchInterface):
     """Defines the contract for the Retrieval Service (Retriever Agent)."""
 
     @abstractmethod
-    def find_similar_products(self, query: str) -> list[ProductDocument]:
+    async def embed_query(self, query: str) -> np.ndarray:
+        """Returns the vector embedding of the user query."""
+        pass
+
+    @abstractmethod
+    async def find_similar_products(self, query: str) -> list[ProductDocument]:
         """Finds and returns a list of products similar to the user query."""
         pass
+
+    async def find_similar_products_many(
+        self, queries: list[str]
+    ) -> list[list[ProductDocument]]:
+        """Finds the products similar to each query. Searches one by one by default."""
+        return list(
+            await asyncio.gather(*(self.find_similar_products(q) for q in queries))
+        )
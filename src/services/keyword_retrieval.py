@@ -0,0 +1,16 @@
+from .interfaces import ProductSearchInterface
+from src.models.query import ProductDocument
+from src.repositories.interfaces.product_repo_interface import (
+    ProductRepositoryInterface,
+)
+from src.config.secrets import secrets
+
+
+class KeywordRetrievalService(ProductSearchInterface):
+    """Service to retrieve products matching the query terms with full-text search."""
+
+    def __init__(self, repository: ProductRepositoryInterface):
+        self._repository = repository
+
+    async def find_similar_products(self, query: str) -> list[ProductDocument]:
+        return await self._repository.keyword_search(query=query, top_k=secrets.TOP_K)
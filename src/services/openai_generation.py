@@ -1,48 +1,81 @@
+import logging
 import os
+from typing import AsyncIterator
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from src.services.interfaces import GenerationServiceInterface
 from src.models.query import ProductDocument
 
+logger = logging.getLogger(__name__)
+
 
 class OpenAIGenerationService(GenerationServiceInterface):
     """Service to generate answers using the OpenAI API with LangChain."""
 
+    SYSTEM_PROMPT = "You are an expert product recommendation assistant. Use the provided product catalog to answer user queries accurately and helpfully."
+    USER_PROMPT = [
+        "Product catalog:",
+        "{context}",
+        "\nWhat the user asked for: {query}",
+        "\nProvide an answer based on the Product Catalog and what the user asked for.",
+    ]
+    CONTEXT_SEPARATOR = "\n- "
+
     def __init__(self):
         self.model = ChatOpenAI(model=os.environ.get("OPENAI_MODEL", "gpt-3.5-turbo"))
         prompt_template = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    "You are an expert product recommendation assistant. Use the provided product catalog to answer user queries accurately and helpfully.",
-                ),
-                (
-                    "user",
-                    [
-                        "Product catalog:",
-                        "{context}",
-                        "\nWhat the user asked for: {query}",
-                        "\nProvide an answer based on the Product Catalog and what the user asked for.",
-                    ],
-                ),
-            ]
+            [("system", self.SYSTEM_PROMPT), ("user", self.USER_PROMPT)]
         )
         output_parser = StrOutputParser()
         self.chain = prompt_template | self.model | output_parser
 
-    def generate_response(self, context_docs: list[ProductDocument], query: str) -> str:
+    async def generate_response(
+        self, context_docs: list[ProductDocument], query: str
+    ) -> str:
         """
-        Generates a response by invoking the LangChain chain.
+        Generates a response by invoking the LangChain chain asynchronously.
         """
         if not context_docs:
-            return "I'm sorry, I couldn't find any relevant products for your query."
-
-        formatted_context = "\n- ".join([doc.content for doc in context_docs])
+            return self.NO_PRODUCTS_RESPONSE
 
         try:
-            response = self.chain.invoke({"context": formatted_context, "query": query})
+            response = await self.chain.ainvoke(self._inputs(context_docs, query))
             return response
         except Exception as e:
             print(f"Error calling LangChain chain: {e}")
-            return "Sorry, I'm having trouble generating a response right now."
+            return self.ERROR_RESPONSE
+
+    async def stream_response(
+        self, context_docs: list[ProductDocument], query: str
+    ) -> AsyncIterator[str]:
+        """
+        Streams the response token by token from the LangChain chain. Errors
+        are raised, so the job fails instead of recording an apology as its
+        answer.
+        """
+        if not context_docs:
+            yield self.NO_PRODUCTS_RESPONSE
+            return
+
+        try:
+            async for token in self.chain.astream(self._inputs(context_docs, query)):
+                yield token
+        except Exception as e:
+            logger.error(f"Error streaming from LangChain chain: {e}")
+            raise
+
+    @classmethod
+    def prompt_text(cls) -> str:
+        """
+        Returns the prompt around the product catalog, with a `{query}`
+        placeholder, so the context budget can leave room for it.
+        """
+        return "\n".join([cls.SYSTEM_PROMPT, *cls.USER_PROMPT]).replace("{context}", "")
+
+    @classmethod
+    def _inputs(cls, context_docs: list[ProductDocument], query: str) -> dict:
+        formatted_context = cls.CONTEXT_SEPARATOR.join(
+            [doc.content for doc in context_docs]
+        )
+        return {"context": formatted_context, "query": query}
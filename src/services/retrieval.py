@@ -1,26 +1,92 @@
 from .interfaces import RetrievalServiceInterface
 import logging
-from sentence_transformers import SentenceTransformer
+import numpy as np
+from src.cache import LRUTTLCache
 from src.models.query import ProductDocument
 from src.repositories.interfaces.product_repo_interface import (
     ProductRepositoryInterface,
 )
+from src.services.embedding_batcher import EmbeddingBatcher
 from src.config.secrets import secrets
 
 logger = logging.getLogger(__name__)
 
 
 class ProductRetrievalService(RetrievalServiceInterface):
-    """Service to retrieve similar products based on a query using semantic search."""
+    """
+    Service to retrieve similar products based on a query using semantic
+    search, or hybrid semantic and full-text search when `mode` is "hybrid".
+    """
 
-    def __init__(self, repository: ProductRepositoryInterface):
+    def __init__(
+        self,
+        repository: ProductRepositoryInterface,
+        embedder: EmbeddingBatcher,
+        embedding_cache: LRUTTLCache[str, np.ndarray],
+        mode: str = "vector",
+    ):
         self._repository = repository
-        self._model = SentenceTransformer(secrets.EMBEDDING_MODEL_NAME)
+        self._embedder = embedder
+        self._embedding_cache = embedding_cache
+        self._mode = mode
+
+    async def embed_query(self, query: str) -> np.ndarray:
+        """
+        Returns the query embedding, reusing a cached one for queries that
+        only differ in case or whitespace.
+        """
+        key = self._normalize(query)
+        embedding = self._embedding_cache.get(key)
+        if embedding is None:
+            embedding = await self._embedder.embed(query)
+            embedding.setflags(write=False)
+            self._embedding_cache.set(key, embedding)
+        return embedding
 
     async def find_similar_products(self, query: str) -> list[ProductDocument]:
-        logger.info(f"Embedding Model for RetrievalService: {self._model}")
-        query_embedding = self._model.encode(query).tolist()
+        query_embedding = await self.embed_query(query)
+        if self._mode == "hybrid":
+            return await self._repository.hybrid_search(
+                embedding=query_embedding, query=query, top_k=secrets.TOP_K
+            )
         similar_products = await self._repository.semantic_search(
             embedding=query_embedding, top_k=secrets.TOP_K
         )
         return similar_products
+
+    async def find_similar_products_many(
+        self, queries: list[str]
+    ) -> list[list[ProductDocument]]:
+        """
+        Embeds the queries missing from the embedding cache in one encode
+        call, then retrieves every top-k list with one batch search.
+        """
+        keys = [self._normalize(query) for query in queries]
+        embeddings = {}
+        missing = {}
+        for key, query in zip(keys, queries):
+            if key in embeddings or key in missing:
+                continue
+            embedding = self._embedding_cache.get(key)
+            if embedding is None:
+                missing[key] = query
+            else:
+                embeddings[key] = embedding
+        if missing:
+            encoded = await self._embedder.embed_many(list(missing.values()))
+            for key, embedding in zip(missing, encoded):
+                embedding.setflags(write=False)
+                self._embedding_cache.set(key, embedding)
+                embeddings[key] = embedding
+
+        if self._mode == "hybrid":
+            return await self._repository.hybrid_search_many(
+                [embeddings[key] for key in keys], queries, secrets.TOP_K
+            )
+        return await self._repository.semantic_search_many(
+            [embeddings[key] for key in keys], secrets.TOP_K
+        )
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        return " ".join(query.lower().split())
@@ -0,0 +1,3 @@
+from .errors import TokenStreamError, TokenStreamReset
+from .memory_token_stream import InMemoryTokenStream
+from .pg_token_stream import PostgresTokenStream
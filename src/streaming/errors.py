@@ -0,0 +1,9 @@
+class TokenStreamError(Exception):
+    """Raised to a subscriber when the job it follows failed."""
+
+
+class TokenStreamReset(Exception):
+    """
+    Raised to a subscriber when the job it follows is retried: the tokens
+    sent so far are void, and the stream restarts from offset 0.
+    """
@@ -0,0 +1 @@
+from .token_stream_interface import TokenStreamInterface
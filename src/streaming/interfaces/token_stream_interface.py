@@ -0,0 +1,54 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+
+class TokenStreamInterface(ABC):
+    """
+    Defines the contract for forwarding generated tokens from the responder
+    to the clients following a job.
+    """
+
+    @abstractmethod
+    def publish(self, job_id: str, token: str) -> None:
+        """Appends a token to the job's stream."""
+        pass
+
+    @abstractmethod
+    async def finish(self, job_id: str, error: str | None = None) -> None:
+        """Ends the job's stream, optionally with an error."""
+        pass
+
+    @abstractmethod
+    async def reset(self, job_id: str) -> None:
+        """
+        Drops the job's tokens so a retry streams its answer from scratch.
+        Subscribers get TokenStreamReset.
+        """
+        pass
+
+    @abstractmethod
+    def subscribe(self, job_id: str, offset: int = 0) -> AsyncIterator[str]:
+        """
+        Yields the job's tokens from `offset`, replaying those already
+        published, until the stream ends. Raises TokenStreamError if the job
+        failed, TokenStreamReset if it is retried, and TimeoutError if no
+        token arrives for a while.
+        """
+        pass
+
+    def has(self, job_id: str) -> bool:
+        """Whether tokens of the job are still held. False by default."""
+        return False
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Returns stream and subscriber counters."""
+        pass
+
+    async def initialize(self) -> None:
+        """Prepares the stream for use. No-op by default."""
+        pass
+
+    async def close(self) -> None:
+        """Releases the resources held by the stream. No-op by default."""
+        pass
@@ -0,0 +1,103 @@
+import asyncio
+from typing import AsyncIterator
+from src.cache import LRUTTLCache
+from .errors import TokenStreamError, TokenStreamReset
+from .interfaces import TokenStreamInterface
+
+
+class _JobStream:
+    """Tokens of one job, and an event that is replaced on every change."""
+
+    def __init__(self):
+        self.tokens: list[str] = []
+        self.done = False
+        self.error: str | None = None
+        # Bumped on every reset, so subscribers notice their offset is void.
+        self.generation = 0
+        self.changed = asyncio.Event()
+
+    def notify(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class InMemoryTokenStream(TokenStreamInterface):
+    """
+    Token stream held in process memory. Streams are kept for `ttl_seconds`
+    after they start, so clients that connect late get the tokens replayed.
+    Only clients of the process running the job see its tokens.
+    """
+
+    def __init__(self, max_jobs: int, ttl_seconds: float, idle_timeout: float):
+        self._streams: LRUTTLCache[str, _JobStream] = LRUTTLCache(max_jobs, ttl_seconds)
+        self._idle_timeout = idle_timeout
+        self._published = 0
+        self._subscribers = 0
+
+    def _stream(self, job_id: str) -> _JobStream:
+        stream = self._streams.get(job_id)
+        if stream is None:
+            stream = _JobStream()
+            self._streams.set(job_id, stream)
+        return stream
+
+    def publish(self, job_id: str, token: str) -> None:
+        stream = self._stream(job_id)
+        if stream.done:
+            return
+        stream.tokens.append(token)
+        self._published += 1
+        stream.notify()
+
+    async def finish(self, job_id: str, error: str | None = None) -> None:
+        self._end(job_id, error)
+
+    async def reset(self, job_id: str) -> None:
+        self._restart(job_id)
+
+    def _restart(self, job_id: str):
+        stream = self._stream(job_id)
+        stream.tokens = []
+        stream.done = False
+        stream.error = None
+        stream.generation += 1
+        stream.notify()
+
+    def _end(self, job_id: str, error: str | None):
+        stream = self._stream(job_id)
+        if stream.done:
+            return
+        stream.done = True
+        stream.error = error
+        stream.notify()
+
+    async def subscribe(self, job_id: str, offset: int = 0) -> AsyncIterator[str]:
+        stream = self._stream(job_id)
+        generation = stream.generation
+        self._subscribers += 1
+        try:
+            while True:
+                if stream.generation != generation:
+                    raise TokenStreamReset()
+                while offset < len(stream.tokens):
+                    yield stream.tokens[offset]
+                    offset += 1
+                if stream.done:
+                    if stream.error is not None:
+                        raise TokenStreamError(stream.error)
+                    return
+                await asyncio.wait_for(
+                    stream.changed.wait(), timeout=self._idle_timeout
+                )
+        finally:
+            self._subscribers -= 1
+
+    def has(self, job_id: str) -> bool:
+        return self._streams.get(job_id) is not None
+
+    def stats(self) -> dict:
+        return {
+            "streams": len(self._streams),
+            "subscribers": self._subscribers,
+            "published_tokens": self._published,
+        }
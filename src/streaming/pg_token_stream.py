@@ -0,0 +1,102 @@
+import asyncio
+import json
+import logging
+import uuid
+from .memory_token_stream import InMemoryTokenStream
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "job_tokens"
+# NOTIFY payloads are limited to 8000 bytes; this leaves room for 4-byte
+# UTF-8 characters and the JSON envelope.
+MAX_CHUNK_CHARS = 1_500
+
+
+class PostgresTokenStream(InMemoryTokenStream):
+    """
+    Token stream shared across processes through Postgres NOTIFY, for when
+    jobs are run by separate worker processes.
+
+    Every process LISTENs on one channel and mirrors all streams into its
+    in-memory buffer, so a client can follow a job from any API replica.
+    Tokens published while a NOTIFY is in flight are coalesced into the next
+    one, keeping to a single round trip at a time per job.
+    """
+
+    def __init__(self, db, max_jobs: int, ttl_seconds: float, idle_timeout: float):
+        super().__init__(max_jobs, ttl_seconds, idle_timeout)
+        self._db = db
+        self._origin = uuid.uuid4().hex
+        self._pending: dict[str, list[str]] = {}
+        self._flushers: dict[str, asyncio.Task] = {}
+        self._listener = None
+
+    async def initialize(self) -> None:
+        if self._listener is None:
+            listener = await self._db.acquire()
+            await listener.add_listener(CHANNEL, self._on_notify)
+            self._listener = listener
+
+    def publish(self, job_id: str, token: str) -> None:
+        super().publish(job_id, token)
+        self._pending.setdefault(job_id, []).append(token)
+        if job_id not in self._flushers:
+            self._flushers[job_id] = asyncio.create_task(self._flush(job_id))
+
+    async def finish(self, job_id: str, error: str | None = None) -> None:
+        flusher = self._flushers.get(job_id)
+        if flusher is not None:
+            await flusher
+        self._end(job_id, error)
+        await self._notify({"job_id": job_id, "done": True, "error": error})
+
+    async def reset(self, job_id: str) -> None:
+        flusher = self._flushers.get(job_id)
+        if flusher is not None:
+            await flusher
+        self._restart(job_id)
+        await self._notify({"job_id": job_id, "reset": True})
+
+    async def _flush(self, job_id: str):
+        """Sends the job's pending tokens until none are left."""
+        try:
+            while self._pending.get(job_id):
+                text = "".join(self._pending.pop(job_id))
+                for start in range(0, len(text), MAX_CHUNK_CHARS):
+                    await self._notify(
+                        {
+                            "job_id": job_id,
+                            "token": text[start : start + MAX_CHUNK_CHARS],
+                        }
+                    )
+        finally:
+            del self._flushers[job_id]
+
+    async def _notify(self, message: dict):
+        message["origin"] = self._origin
+        try:
+            async with self._db.acquire() as conn:
+                await conn.execute(
+                    "SELECT pg_notify($1, $2)", CHANNEL, json.dumps(message)
+                )
+        except Exception as e:
+            logger.error(f"Failed to relay tokens of job {message['job_id']}: {e}")
+
+    def _on_notify(self, connection, pid, channel, payload):
+        message = json.loads(payload)
+        if message["origin"] == self._origin:
+            return
+        if message.get("done"):
+            self._end(message["job_id"], message["error"])
+        elif message.get("reset"):
+            self._restart(message["job_id"])
+        else:
+            super().publish(message["job_id"], message["token"])
+
+    async def close(self) -> None:
+        if self._flushers:
+            await asyncio.gather(*self._flushers.values(), return_exceptions=True)
+        if self._listener is not None:
+            listener, self._listener = self._listener, None
+            await listener.remove_listener(CHANNEL, self._on_notify)
+            await self._db.release(listener)
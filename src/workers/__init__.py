@@ -0,0 +1 @@
+from .pool import WorkerPool
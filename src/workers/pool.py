@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import time
+from src.observability import StageTimings
+from src.orchestration import LangGraphOrchestrator
+from src.queue.interfaces import RequestQueueInterface
+
+logger = logging.getLogger(__name__)
+
+DEQUEUE_RETRY_SECONDS = 1.0
+# Tries at recording a job's answer or failure before giving up on it.
+RECORD_ATTEMPTS = 3
+
+
+class WorkerPool:
+    """
+    Runs a fixed number of concurrent consumers over the request queue.
+    All consumers share a single orchestrator, and with it the loaded models.
+    """
+
+    def __init__(
+        self,
+        orchestrator: LangGraphOrchestrator,
+        queue: RequestQueueInterface,
+        concurrency: int,
+        shutdown_timeout: float,
+        timings: StageTimings | None = None,
+    ):
+        self._orchestrator = orchestrator
+        self._queue = queue
+        self._concurrency = max(1, concurrency)
+        self._shutdown_timeout = shutdown_timeout
+        self._timings = timings
+        self._tasks: list[asyncio.Task] = []
+        self._busy: set[asyncio.Task] = set()
+        self._closing = False
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently being processed."""
+        return len(self._busy)
+
+    def start(self):
+        """Spawns the consumer tasks on the running event loop."""
+        if self._tasks:
+            return
+        self._closing = False
+        for worker_id in range(self._concurrency):
+            self._tasks.append(
+                asyncio.create_task(
+                    self._consume(worker_id), name=f"worker-{worker_id}"
+                )
+            )
+        logger.info(f"Worker pool started with {self._concurrency} consumers.")
+
+    async def _consume(self, worker_id: int):
+        """
+        Takes jobs from the queue, runs them through the orchestrator and
+        records the outcome.
+        """
+        logger.info(f"Worker {worker_id} started.")
+        task = asyncio.current_task()
+        while not self._closing:
+            try:
+                job = await self._queue.dequeue()
+            except Exception:
+                logger.error(
+                    f"Worker {worker_id} could not take a job from the queue:",
+                    exc_info=True,
+                )
+                await asyncio.sleep(DEQUEUE_RETRY_SECONDS)
+                continue
+
+            self._busy.add(task)
+            if self._timings is not None:
+                self._timings.record("queue.wait", job.waited_seconds)
+            try:
+                logger.info(
+                    f"Worker {worker_id} picked up job {job.id} for user: {job.request.user_id} "
+                    f"(attempt {job.attempts})"
+                )
+                async with self._queue.lease(job):
+                    answer = await self._orchestrator.process_query(
+                        user_id=job.request.user_id,
+                        query=job.request.query,
+                        job_id=job.id,
+                        attempt=job.attempts,
+                        max_attempts=job.max_attempts,
+                    )
+            except Exception as e:
+                logger.error("An error occurred in the worker:", exc_info=True)
+                await self._record(worker_id, job, self._queue.fail, str(e))
+            else:
+                await self._record(worker_id, job, self._queue.complete, answer)
+            finally:
+                self._busy.discard(task)
+
+    async def _record(self, worker_id: int, job, outcome, *args):
+        """
+        Records a job's outcome, retrying briefly: a job whose answer was not
+        recorded is processed again, and its user gets a second callback.
+        Errors are logged so the worker keeps consuming.
+        """
+        for attempt in range(1, RECORD_ATTEMPTS + 1):
+            try:
+                await outcome(job, *args)
+                return
+            except Exception:
+                logger.error(
+                    f"Worker {worker_id} could not record the outcome of job {job.id} "
+                    f"(try {attempt} of {RECORD_ATTEMPTS}):",
+                    exc_info=True,
+                )
+                if attempt < RECORD_ATTEMPTS:
+                    await asyncio.sleep(DEQUEUE_RETRY_SECONDS)
+
+    async def stop(self):
+        """
+        Drains the queue if its jobs do not survive a restart, lets in-flight
+        jobs finish, waiting at most the configured shutdown timeout in total,
+        then cancels the consumers.
+        """
+        if not self._tasks:
+            return
+
+        deadline = time.monotonic() + self._shutdown_timeout
+        logger.info(f"Draining worker pool ({self.in_flight} in flight)...")
+        try:
+            await asyncio.wait_for(self._queue.drain(), timeout=self._shutdown_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Queue did not drain within {self._shutdown_timeout}s; "
+                "abandoning queued requests."
+            )
+
+        self._closing = True
+        for task in self._tasks:
+            if task not in self._busy:
+                task.cancel()
+
+        busy = list(self._busy)
+        if busy:
+            _, pending = await asyncio.wait(
+                busy, timeout=max(0.0, deadline - time.monotonic())
+            )
+            if pending:
+                logger.warning(f"Abandoning {len(pending)} in-flight requests.")
+            for task in pending:
+                task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._busy.clear()
+        logger.info("Worker pool stopped.")
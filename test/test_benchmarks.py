@@ -0,0 +1,64 @@
+import json
+import numpy as np
+from fastapi.testclient import TestClient
+from benchmarks import retrieval_bench
+from benchmarks.callback_sink import CallbackSink
+from benchmarks.fake_openai import create_app
+
+
+def test_fake_openai_streams_and_completes():
+    client = TestClient(create_app(ttft_ms=0, tokens=3, token_interval_ms=0))
+    request = {
+        "model": "gpt-3.5-turbo",
+        "messages": [{"role": "user", "content": "hi"}],
+    }
+
+    response = client.post("/v1/chat/completions", json=request)
+    assert response.json()["choices"][0]["message"]["content"] == "word0 word1 word2 "
+
+    with client.stream(
+        "POST", "/v1/chat/completions", json={**request, "stream": True}
+    ) as response:
+        events = [
+            line[6:] for line in response.iter_lines() if line.startswith("data: ")
+        ]
+    assert events[-1] == "[DONE]"
+    content = "".join(
+        json.loads(e)["choices"][0]["delta"].get("content", "") for e in events[:-1]
+    )
+    assert content == "word0 word1 word2 "
+
+
+def test_callback_sink_resolves_single_and_batched_answers():
+    sink = CallbackSink()
+    with TestClient(sink.app) as client:
+        waiters = client.portal.call(lambda: _expect(sink, ["u1", "u2", "u3"]))
+        client.post("/callback", json={"user_id": "u1", "answer": "a"})
+        client.post(
+            "/callback",
+            json={
+                "batch": [
+                    {"user_id": "u2", "answer": "b"},
+                    {"user_id": "u3", "answer": "c"},
+                ]
+            },
+        )
+    assert all(w.done() for w in waiters)
+    assert sink.received == 3
+
+
+async def _expect(sink: CallbackSink, user_ids: list[str]):
+    return [sink.expect(user_id) for user_id in user_ids]
+
+
+def test_retrieval_bench_brute_force_matches_a_full_scan(tmp_path, monkeypatch):
+    monkeypatch.setattr(retrieval_bench, "GENERATION_CHUNK", 64)
+    dataset = retrieval_bench.generate_dataset(
+        tmp_path, size=300, dimension=16, clusters=5, seed=0
+    )
+    queries = retrieval_bench.sample_queries(dataset, count=10, seed=0)
+
+    exact = retrieval_bench.brute_force(dataset, queries, top_k=5)
+
+    expected = np.argsort(-(queries @ np.asarray(dataset).T), axis=1)[:, :5]
+    assert (exact == expected).all()
@@ -0,0 +1,217 @@
+import asyncio
+import pytest
+import numpy as np
+from unittest.mock import AsyncMock
+from src.cache import LRUTTLCache, InMemoryAnswerCache
+from src.models.query import ProductDocument
+from src.repositories import CachingProductRepository
+from src.services import ProductRetrievalService
+
+
+def test_lru_ttl_cache_evicts_least_recently_used():
+    cache = LRUTTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_ttl_cache_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.cache.lru_ttl.time.monotonic", lambda: now[0])
+    cache = LRUTTLCache(max_size=10, ttl_seconds=5)
+    cache.set("a", 1)
+
+    now[0] += 4
+    assert cache.get("a") == 1
+    now[0] += 2
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_caching_repository_serves_hits_and_invalidates_on_write():
+    inner = AsyncMock()
+    inner.semantic_search.return_value = [ProductDocument(id=1, content="mock")]
+    repo = CachingProductRepository(inner, LRUTTLCache(max_size=10))
+
+    await repo.semantic_search([0.1, 0.2], top_k=3)
+    await repo.semantic_search([0.1, 0.2], top_k=3)
+    assert inner.semantic_search.await_count == 1
+
+    await repo.semantic_search([0.1, 0.2], top_k=5)
+    assert inner.semantic_search.await_count == 2
+
+    await repo.index_documents([ProductDocument(id=2, content="new")])
+    await repo.semantic_search([0.1, 0.2], top_k=3)
+    assert inner.semantic_search.await_count == 3
+    assert repo.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_caching_repository_skips_results_of_searches_racing_a_write():
+    release = asyncio.Event()
+    written = asyncio.Event()
+    inner = AsyncMock()
+
+    async def write(documents):
+        await release.wait()
+        written.set()
+
+    async def search(embedding, top_k):
+        # Reads the catalogue before the write lands, returns after it.
+        await written.wait()
+        return [ProductDocument(id=1, content="stale")]
+
+    inner.index_documents.side_effect = write
+    inner.semantic_search.side_effect = search
+    cache = LRUTTLCache(max_size=10)
+    repo = CachingProductRepository(inner, cache)
+
+    writing = asyncio.create_task(
+        repo.index_documents([ProductDocument(id=2, content="new")])
+    )
+    await asyncio.sleep(0)
+    searching = asyncio.create_task(repo.semantic_search([0.1, 0.2], top_k=3))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(writing, searching)
+
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_caching_repository_normalizes_keyword_queries():
+    inner = AsyncMock()
+    inner.keyword_search.return_value = [ProductDocument(id=1, content="SKU-42")]
+    repo = CachingProductRepository(inner, LRUTTLCache(max_size=10))
+
+    await repo.keyword_search("Red  Kettle", top_k=3)
+    await repo.keyword_search("red kettle", top_k=3)
+
+    assert inner.keyword_search.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_hybrid_retrieval_searches_with_embedding_and_query_text():
+    inner = AsyncMock()
+    inner.hybrid_search.return_value = [ProductDocument(id=1, content="SKU-42")]
+    embedder = AsyncMock()
+    embedder.embed.return_value = np.array([0.5, 0.5], dtype=np.float32)
+    service = ProductRetrievalService(
+        CachingProductRepository(inner, LRUTTLCache(max_size=10)),
+        embedder,
+        LRUTTLCache(max_size=10),
+        mode="hybrid",
+    )
+
+    await service.find_similar_products("SKU-42")
+    documents = await service.find_similar_products("SKU-42")
+
+    assert documents == inner.hybrid_search.return_value
+    inner.hybrid_search.assert_awaited_once()
+    embedding, query, top_k = inner.hybrid_search.await_args.args
+    np.testing.assert_array_equal(embedding, [0.5, 0.5])
+    assert (query, top_k) == ("SKU-42", 5)
+    inner.semantic_search.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_hybrid_batch_retrieval_searches_only_uncached_queries_at_once():
+    inner = AsyncMock()
+    inner.hybrid_search.return_value = [ProductDocument(id=1, content="SKU-42")]
+    inner.hybrid_search_many.return_value = [[ProductDocument(id=2, content="mug")]]
+    embedder = AsyncMock()
+    embedder.embed.return_value = np.array([0.5, 0.5], dtype=np.float32)
+    embedder.embed_many.return_value = [np.array([0.25, 0.75], dtype=np.float32)]
+    service = ProductRetrievalService(
+        CachingProductRepository(inner, LRUTTLCache(max_size=10)),
+        embedder,
+        LRUTTLCache(max_size=10),
+        mode="hybrid",
+    )
+
+    await service.find_similar_products("SKU-42")
+    results = await service.find_similar_products_many(["SKU-42", "mug"])
+
+    assert [[d.id for d in r] for r in results] == [[1], [2]]
+    inner.hybrid_search_many.assert_awaited_once()
+    embeddings, queries, top_k = inner.hybrid_search_many.await_args.args
+    np.testing.assert_array_equal(embeddings, [[0.25, 0.75]])
+    assert (queries, top_k) == (["mug"], 5)
+
+
+@pytest.mark.asyncio
+async def test_answer_cache_matches_similar_queries_with_same_products():
+    cache = InMemoryAnswerCache(max_entries=10, ttl_seconds=60, max_distance=0.05)
+    await cache.store(np.array([1.0, 0.0]), [2, 1], "cached answer", 1.5)
+
+    assert await cache.lookup(np.array([0.99, 0.05]), [1, 2]) == "cached answer"
+    assert await cache.lookup(np.array([0.0, 1.0]), [1, 2]) is None
+    assert await cache.lookup(np.array([1.0, 0.0]), [1, 3]) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert stats["saved_seconds"] == 1.5
+
+
+@pytest.mark.asyncio
+async def test_answer_cache_evicts_least_recently_used_entry():
+    cache = InMemoryAnswerCache(max_entries=1, ttl_seconds=60, max_distance=0.05)
+    await cache.store(np.array([1.0, 0.0]), [1], "first", 1.0)
+    await cache.store(np.array([1.0, 0.0]), [2], "second", 1.0)
+
+    assert await cache.lookup(np.array([1.0, 0.0]), [1]) is None
+    assert await cache.lookup(np.array([1.0, 0.0]), [2]) == "second"
+
+
+@pytest.mark.asyncio
+async def test_caching_repository_batch_searches_only_uncached_embeddings():
+    inner = AsyncMock()
+    inner.semantic_search.return_value = [ProductDocument(id=1, content="cached")]
+    inner.semantic_search_many.return_value = [
+        [ProductDocument(id=2, content="a")],
+        [ProductDocument(id=3, content="b")],
+    ]
+    repo = CachingProductRepository(inner, LRUTTLCache(max_size=10))
+    await repo.semantic_search([0.1, 0.2], top_k=3)
+
+    results = await repo.semantic_search_many(
+        [[0.3, 0.4], [0.1, 0.2], [0.5, 0.6]], top_k=3
+    )
+
+    assert [[d.id for d in r] for r in results] == [[2], [1], [3]]
+    inner.semantic_search_many.assert_awaited_once_with([[0.3, 0.4], [0.5, 0.6]], 3)
+    assert [d.id for d in await repo.semantic_search([0.5, 0.6], top_k=3)] == [3]
+
+
+@pytest.mark.asyncio
+async def test_batch_retrieval_embeds_missing_queries_in_one_call():
+    inner = AsyncMock()
+    inner.semantic_search_many.side_effect = lambda embeddings, top_k: [
+        [ProductDocument(id=int(e[0]), content="p")] for e in embeddings
+    ]
+    embedder = AsyncMock()
+    embedder.embed.return_value = np.array([1.0, 0.0], dtype=np.float32)
+    embedder.embed_many.return_value = np.array([[2.0, 0.0], [3.0, 0.0]])
+    service = ProductRetrievalService(
+        CachingProductRepository(inner, LRUTTLCache(max_size=10)),
+        embedder,
+        LRUTTLCache(max_size=10),
+    )
+    await service.embed_query("kettle")
+
+    results = await service.find_similar_products_many(
+        ["mug", "Kettle", "teapot", "MUG "]
+    )
+
+    assert [[d.id for d in r] for r in results] == [[2], [1], [3], [2]]
+    embedder.embed_many.assert_awaited_once_with(["mug", "teapot"])
+    inner.semantic_search_many.assert_awaited_once()
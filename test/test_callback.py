@@ -0,0 +1,82 @@
+import json
+import httpx
+import pytest
+from src.services import WebhookCallbackService
+
+CALLBACK_URL = "http://callback.test/callback"
+
+
+def _service(handler, batch_size: int = 1) -> WebhookCallbackService:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return WebhookCallbackService(
+        client=client,
+        url=CALLBACK_URL,
+        max_retries=2,
+        retry_backoff_seconds=0,
+        batch_size=batch_size,
+        batch_wait_ms=10,
+    )
+
+
+@pytest.mark.asyncio
+async def test_callback_retries_transient_errors():
+    statuses = iter([503, 200])
+    bodies = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        return httpx.Response(next(statuses))
+
+    service = _service(handler)
+    await service.send_response(user_id="u1", answer="an answer")
+    await service.drain()
+
+    assert bodies == [{"user_id": "u1", "answer": "an answer"}] * 2
+    stats = service.stats()
+    assert (stats["delivered"], stats["failed"], stats["retries"]) == (1, 0, 1)
+
+
+@pytest.mark.asyncio
+async def test_callback_does_not_retry_client_errors():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(400)
+
+    service = _service(handler)
+    await service.send_response(user_id="u1", answer="an answer")
+    await service.drain()
+
+    assert len(requests) == 1
+    assert service.stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_callback_batches_answers_into_one_request():
+    bodies = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200)
+
+    service = _service(handler, batch_size=3)
+    for user_id in ("u1", "u2", "u3", "u4"):
+        await service.send_response(user_id=user_id, answer=f"answer {user_id}")
+    assert service.stats()["pending"] == 1
+    await service.drain()
+
+    assert [len(b["batch"]) if "batch" in b else 1 for b in bodies] == [3, 1]
+    assert service.stats()["delivered"] == 4
+
+
+@pytest.mark.asyncio
+async def test_callback_counts_unexpected_errors_as_failed():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise RuntimeError("boom")
+
+    service = _service(handler)
+    await service.send_response(user_id="u1", answer="an answer")
+    await service.drain()
+
+    assert service.stats()["failed"] == 1
@@ -0,0 +1,103 @@
+import threading
+import pytest
+import numpy as np
+from src.cache import LRUTTLCache
+from src.models.query import ProductDocument
+from src.services import ContextPacker
+
+
+class WordEncoding:
+    """Fake encoding with one token per word."""
+
+    def __init__(self):
+        self.encoded = 0
+
+    def encode(self, text: str) -> list[str]:
+        self.encoded += 1
+        return text.split()
+
+    def decode(self, tokens: list[str]) -> str:
+        return " ".join(tokens)
+
+
+def _packer(token_budget: int, encoding: WordEncoding) -> ContextPacker:
+    return ContextPacker(
+        model_name="gpt-3.5-turbo",
+        token_budget=token_budget,
+        mmr_lambda=0.7,
+        duplicate_threshold=0.95,
+        token_cache=LRUTTLCache(max_size=10),
+        encoding=encoding,
+    )
+
+
+def test_packer_drops_near_duplicates_and_truncates_to_budget():
+    words = " ".join(f"w{i}" for i in range(40))
+    documents = [
+        ProductDocument(id=1, content="red kettle", embeddings=[1.0, 0.0]),
+        ProductDocument(id=2, content="red kettle!", embeddings=[0.99, 0.01]),
+        ProductDocument(id=3, content=words, embeddings=[0.6, 0.8]),
+    ]
+    encoding = WordEncoding()
+    packer = _packer(token_budget=36, encoding=encoding)
+
+    packed = packer.pack(documents, query_embedding=np.array([1.0, 0.0]))
+
+    assert [d.id for d in packed] == [1, 3]
+    assert packed[1].content.split() == [f"w{i}" for i in range(34)]
+    stats = packer.stats()
+    assert (stats["mean_tokens_before"], stats["mean_tokens_after"]) == (44, 36)
+    assert stats["duplicates_dropped"] == 1
+
+    packer.pack(documents, query_embedding=np.array([1.0, 0.0]))
+    assert encoding.encoded == 3
+
+
+def test_packer_keeps_retrieval_order_without_embeddings():
+    documents = [
+        ProductDocument(id=1, content="first product"),
+        ProductDocument(id=2, content="second product"),
+    ]
+    packer = _packer(token_budget=100, encoding=WordEncoding())
+
+    assert packer.pack(documents) == documents
+
+
+def test_packer_leaves_room_for_the_prompt_query_and_separators():
+    documents = [
+        ProductDocument(id=1, content="red steel kettle"),
+        ProductDocument(id=2, content="blue kettle"),
+    ]
+    packer = ContextPacker(
+        model_name="gpt-3.5-turbo",
+        token_budget=10,
+        mmr_lambda=0.7,
+        duplicate_threshold=0.95,
+        token_cache=LRUTTLCache(max_size=10),
+        encoding=WordEncoding(),
+        prompt="Catalog: Question: {query}",
+        separator="-",
+    )
+
+    packed = packer.pack(documents, query="a kettle")
+
+    # 2 prompt and 2 query tokens leave 6: 3 words and a separator fit,
+    # 2 words and a separator do not.
+    assert [d.id for d in packed] == [1]
+    stats = packer.stats()
+    assert (stats["mean_tokens_before"], stats["mean_tokens_after"]) == (11, 8)
+
+
+@pytest.mark.asyncio
+async def test_packer_loads_the_encoding_off_the_event_loop(monkeypatch):
+    threads = []
+    monkeypatch.setattr(
+        ContextPacker,
+        "encoding",
+        property(lambda self: threads.append(threading.get_ident())),
+    )
+    packer = _packer(token_budget=10, encoding=None)
+
+    await packer.load_encoding()
+
+    assert threads and threads[0] != threading.get_ident()
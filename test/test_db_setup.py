@@ -0,0 +1,120 @@
+import pytest
+from script import db_setup
+from script.db_setup import (
+    _ensure_vector_index,
+    _needs_rebuild,
+    _vector_index_options,
+    vector_index_name,
+)
+from script.index_report import _neighbours
+
+
+class FakeConnection:
+    """Records the statements run, and reports the given index states."""
+
+    def __init__(self, indexes: dict[str, dict]):
+        self.indexes = indexes
+        self.statements: list[str] = []
+
+    async def fetchrow(self, query: str, name: str):
+        return self.indexes.get(name)
+
+    async def execute(self, statement: str):
+        self.statements.append(statement)
+
+
+def _hnsw_options(monkeypatch):
+    monkeypatch.setattr(db_setup.secrets, "HNSW_M", 16)
+    monkeypatch.setattr(db_setup.secrets, "HNSW_EF_CONSTRUCTION", 64)
+    return ["m=16", "ef_construction=64"]
+
+
+def test_vector_index_name_keeps_storages_apart():
+    assert vector_index_name("hnsw") == "products_embedding_hnsw_idx"
+    assert vector_index_name("ivfflat", "full") == "products_embedding_ivfflat_idx"
+    assert vector_index_name("hnsw", "halfvec") == "products_embedding_halfvec_hnsw_idx"
+    assert (
+        vector_index_name("ivfflat", "binary")
+        == "products_embedding_binary_ivfflat_idx"
+    )
+
+
+def test_vector_index_options_follow_the_settings(monkeypatch):
+    monkeypatch.setattr(db_setup.secrets, "HNSW_M", 32)
+    monkeypatch.setattr(db_setup.secrets, "HNSW_EF_CONSTRUCTION", 128)
+    assert _vector_index_options("hnsw") == ["m=32", "ef_construction=128"]
+    monkeypatch.setattr(db_setup.secrets, "IVFFLAT_LISTS", 200)
+    assert _vector_index_options("ivfflat") == ["lists=200"]
+
+
+def test_index_is_rebuilt_only_when_missing_invalid_or_changed():
+    options = ["m=16", "ef_construction=64"]
+    valid = {"reloptions": ["ef_construction=64", "m=16"], "indisvalid": True}
+
+    assert not _needs_rebuild(valid, options)
+    assert _needs_rebuild(None, options)
+    assert _needs_rebuild({**valid, "indisvalid": False}, options)
+    assert _needs_rebuild({**valid, "reloptions": ["m=32"]}, options)
+    assert _needs_rebuild({**valid, "reloptions": None}, options)
+
+
+@pytest.mark.asyncio
+async def test_up_to_date_index_drops_only_the_replaced_type(monkeypatch):
+    options = _hnsw_options(monkeypatch)
+    conn = FakeConnection(
+        {
+            "products_embedding_hnsw_idx": {
+                "reloptions": options,
+                "indisvalid": True,
+            }
+        }
+    )
+
+    await _ensure_vector_index(conn, "hnsw", "full", 384)
+
+    assert conn.statements == [
+        "DROP INDEX CONCURRENTLY IF EXISTS products_embedding_ivfflat_idx;"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_keeps_the_indexes_of_other_storages(monkeypatch):
+    _hnsw_options(monkeypatch)
+    conn = FakeConnection(
+        {
+            "products_embedding_hnsw_idx": {
+                "reloptions": ["m=8", "ef_construction=64"],
+                "indisvalid": True,
+            }
+        }
+    )
+
+    await _ensure_vector_index(conn, "hnsw", "full", 384)
+
+    assert conn.statements[2:] == [
+        "DROP INDEX CONCURRENTLY IF EXISTS products_embedding_hnsw_idx;",
+        "ALTER INDEX products_embedding_hnsw_idx_new "
+        "RENAME TO products_embedding_hnsw_idx;",
+        "DROP INDEX CONCURRENTLY IF EXISTS products_embedding_ivfflat_idx;",
+    ]
+    assert conn.statements[1].startswith(
+        "CREATE INDEX CONCURRENTLY products_embedding_hnsw_idx_new"
+    )
+    assert not any("halfvec" in s or "binary" in s for s in conn.statements)
+
+
+@pytest.mark.asyncio
+async def test_disabling_the_index_drops_only_its_storage():
+    conn = FakeConnection({})
+
+    await _ensure_vector_index(conn, "none", "halfvec", 384)
+
+    assert conn.statements == [
+        "DROP INDEX CONCURRENTLY IF EXISTS products_embedding_halfvec_hnsw_idx;",
+        "DROP INDEX CONCURRENTLY IF EXISTS products_embedding_halfvec_ivfflat_idx;",
+    ]
+
+
+def test_index_report_excludes_the_source_product_from_neighbours():
+    assert _neighbours([7, 3, 5, 9], source_id=7, top_k=3) == [3, 5, 9]
+    assert _neighbours([3, 5, 9, 7], source_id=7, top_k=3) == [3, 5, 9]
@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from src.services import EmbeddingBatcher
+
+
+class FakeModel:
+    """Encodes each text as [len(text), 1] and records the batch sizes it saw."""
+
+    def __init__(self, fail: bool = False):
+        self.batches: list[list[str]] = []
+        self.fail = fail
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("encode failed")
+        return np.array([[len(t), 1.0] for t in texts], dtype=np.float32)
+
+
+@pytest.mark.asyncio
+async def test_batcher_coalesces_concurrent_requests():
+    model = FakeModel()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        batcher = EmbeddingBatcher(model, executor, max_batch_size=4, max_wait_ms=50)
+        texts = ["a", "bb", "ccc", "dddd", "eeeee", "ffffff"]
+        results = await asyncio.gather(*(batcher.embed(t) for t in texts))
+
+    assert [len(b) for b in model.batches] == [4, 2]
+    assert [r[0] for r in results] == [1, 2, 3, 4, 5, 6]
+
+    stats = batcher.stats()
+    assert stats["batches"] == 2
+    assert stats["items"] == 6
+    assert stats["max_batch_size"] == 4
+    assert stats["batch_sizes"] == {2: 1, 4: 1}
+
+
+@pytest.mark.asyncio
+async def test_batcher_propagates_encode_errors_to_every_caller():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        batcher = EmbeddingBatcher(
+            FakeModel(fail=True), executor, max_batch_size=8, max_wait_ms=1
+        )
+        results = await asyncio.gather(
+            batcher.embed("a"), batcher.embed("b"), return_exceptions=True
+        )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
@@ -0,0 +1,60 @@
+import numpy as np
+import script.db_setup as db_setup
+from src.config.secrets import secrets
+from src.embeddings import ModelRegistry
+from src.embeddings.interfaces import EmbeddingBackendInterface
+from src.repositories.embedding_snapshot import EmbeddingSnapshot, content_hash
+
+
+class FakeModel:
+    """Stands in for SentenceTransformer and records which texts it encoded."""
+
+    encoded: list[str] = []
+
+    def __init__(self, model_name):
+        pass
+
+    def encode(self, texts, show_progress_bar=False):
+        FakeModel.encoded.extend(texts)
+        return np.array([[len(t), 1.0, 0.0] for t in texts], dtype=np.float32)
+
+
+class FakeBackend(EmbeddingBackendInterface):
+    name = "fake"
+
+    def load(self, model_name: str):
+        return FakeModel(model_name)
+
+
+def test_snapshot_round_trip_is_memory_mapped(tmp_path):
+    embeddings = np.arange(6, dtype=np.float32).reshape(2, 3)
+    EmbeddingSnapshot.write(tmp_path, "model-a", ["h1", "h2"], embeddings)
+
+    snapshot = EmbeddingSnapshot.load(tmp_path, "model-a")
+
+    assert isinstance(snapshot.embeddings, np.memmap)
+    assert snapshot.position("h2") == 1
+    np.testing.assert_array_equal(snapshot.embeddings, embeddings)
+    assert EmbeddingSnapshot.load(tmp_path, "model-b") is None
+    assert len(list(tmp_path.glob("embeddings-*.npy"))) == 1
+
+
+def test_startup_only_embeds_new_or_changed_products(tmp_path, monkeypatch):
+    monkeypatch.setattr(secrets, "EMBEDDING_SNAPSHOT_DIR", str(tmp_path))
+    registry = ModelRegistry(FakeBackend())
+    monkeypatch.setattr(db_setup, "PRODUCT_DESCRIPTIONS", ["a", "bb"])
+    FakeModel.encoded = []
+
+    snapshot, embedded = db_setup.load_product_embeddings(registry)
+    assert FakeModel.encoded == ["a", "bb"]
+    assert embedded == {content_hash("a"), content_hash("bb")}
+
+    monkeypatch.setattr(db_setup, "PRODUCT_DESCRIPTIONS", ["a", "ccc"])
+    snapshot, embedded = db_setup.load_product_embeddings(registry)
+    assert FakeModel.encoded == ["a", "bb", "ccc"]
+    assert embedded == {content_hash("ccc")}
+    assert snapshot.hashes == [content_hash("a"), content_hash("ccc")]
+
+    _, embedded = db_setup.load_product_embeddings(registry)
+    assert FakeModel.encoded == ["a", "bb", "ccc"]
+    assert embedded == set()
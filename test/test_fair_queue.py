@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from src.models.query import QueryRequest
+from src.queue import FairRequestQueue, QueueFullError, parse_user_priorities
+
+
+def _request(user_id: str, query: str = "q"):
+    return QueryRequest(user_id=user_id, query=query)
+
+
+@pytest.mark.asyncio
+async def test_queue_serves_priorities_first_then_users_round_robin():
+    queue = FairRequestQueue(
+        capacity=10,
+        per_user_capacity=10,
+        user_priorities=parse_user_priorities("vip=high"),
+    )
+    for i in range(3):
+        await queue.enqueue(_request("noisy", f"noisy-{i}"))
+    await queue.enqueue(_request("quiet", "quiet-0"))
+    await queue.enqueue(_request("vip", "vip-0"))
+
+    served = [(await queue.dequeue()).request.query for _ in range(5)]
+
+    assert served == ["vip-0", "noisy-0", "quiet-0", "noisy-1", "noisy-2"]
+
+
+@pytest.mark.asyncio
+async def test_queue_rejects_requests_over_capacity():
+    queue = FairRequestQueue(capacity=3, per_user_capacity=2)
+    await queue.enqueue(_request("a"))
+    await queue.enqueue(_request("a"))
+
+    with pytest.raises(QueueFullError) as user_limit:
+        await queue.enqueue(_request("a"))
+    await queue.enqueue(_request("b"))
+    with pytest.raises(QueueFullError) as queue_full:
+        await queue.enqueue(_request("c"))
+
+    assert user_limit.value.status_code == 429
+    assert queue_full.value.status_code == 503
+    assert (await queue.stats())["rejected"] == {"queue_full": 1, "user_limit": 1}
+
+
+@pytest.mark.asyncio
+async def test_queue_tracks_job_status_and_drains_on_completion():
+    queue = FairRequestQueue(capacity=10, per_user_capacity=10)
+    job_id = await queue.enqueue(_request("a"))
+    assert (await queue.get_status(job_id)).status == "queued"
+
+    job = await queue.dequeue()
+    assert job.id == job_id
+    assert (await queue.get_status(job_id)).status == "running"
+
+    drain = asyncio.create_task(queue.drain())
+    await asyncio.sleep(0)
+    assert not drain.done()
+
+    await queue.complete(job, "answer")
+    await asyncio.wait_for(drain, timeout=1)
+    status = await queue.get_status(job_id)
+    assert (status.status, status.answer, status.attempts) == ("done", "answer", 1)
+    assert (await queue.stats())["in_flight"] == 0
+    assert await queue.get_status("unknown") is None
+
+
+def test_query_endpoint_returns_503_with_retry_after_when_full():
+    from main import app
+    from src.containers import AppContainer
+
+    full_queue = FairRequestQueue(capacity=1, per_user_capacity=1)
+    asyncio.run(full_queue.enqueue(_request("someone")))
+    container = AppContainer()
+    container.request_queue.override(full_queue)
+    app.state.container = container
+
+    client = TestClient(app)
+    response = client.post("/query", json={"user_id": "u", "query": "q"})
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert client.get("/jobs/unknown").status_code == 404
+
+
+def test_user_priorities_are_parsed_from_config_and_validated():
+    assert parse_user_priorities(" ops=high, bulk=low ,") == {
+        "ops": "high",
+        "bulk": "low",
+    }
+    assert parse_user_priorities("") == {}
+    with pytest.raises(ValueError):
+        parse_user_priorities("ops=urgent")
+
+
+@pytest.mark.asyncio
+async def test_queue_ignores_a_priority_sent_in_the_request_body():
+    queue = FairRequestQueue(capacity=10, per_user_capacity=10)
+    await queue.enqueue(_request("first"))
+    await queue.enqueue(
+        QueryRequest.model_validate(
+            {"user_id": "pushy", "query": "q", "priority": "high"}
+        )
+    )
+
+    job = await queue.dequeue()
+
+    assert job.request.user_id == "first"
+    assert job.priority == "normal"
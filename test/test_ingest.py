@@ -0,0 +1,25 @@
+import json
+from script.ingest import Checkpoint, chunked, read_products
+
+
+def test_read_products_streams_jsonl_and_csv(tmp_path):
+    jsonl = tmp_path / "products.jsonl"
+    jsonl.write_text('{"content": "a"}\n\n"b"\n{"content": "c", "sku": 1}\n')
+    csv_file = tmp_path / "products.csv"
+    csv_file.write_text('sku,description\n1,"x, y"\n2,z\n')
+
+    assert list(read_products(jsonl, "jsonl", "content")) == ["a", "b", "c"]
+    assert list(read_products(csv_file, "csv", "description")) == ["x, y", "z"]
+    assert list(chunked(iter("abcde"), 2)) == [["a", "b"], ["c", "d"], ["e"]]
+
+
+def test_checkpoint_resumes_only_for_the_same_input(tmp_path):
+    source = tmp_path / "products.jsonl"
+    source.write_text(json.dumps("a") + "\n")
+    checkpoint = Checkpoint(tmp_path / "checkpoint.json", source)
+    checkpoint.save(1)
+
+    assert Checkpoint(tmp_path / "checkpoint.json", source).load() == 1
+
+    source.write_text(json.dumps("a") + "\n" + json.dumps("b") + "\n")
+    assert Checkpoint(tmp_path / "checkpoint.json", source).load() == 0
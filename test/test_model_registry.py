@@ -0,0 +1,84 @@
+import os
+import subprocess
+import sys
+import threading
+import numpy as np
+import pytest
+from src.embeddings import ModelRegistry, OnnxEmbeddingBackend
+from src.embeddings.interfaces import EmbeddingBackendInterface
+
+
+class FakeModel:
+    loads = 0
+
+    def __init__(self, model_name):
+        FakeModel.loads += 1
+        self.encoded = []
+
+    def encode(self, texts, batch_size=None, convert_to_numpy=True):
+        self.encoded.extend(texts)
+        return np.ones((len(texts), 3), dtype=np.float32)
+
+
+class FakeBackend(EmbeddingBackendInterface):
+    name = "fake"
+
+    def load(self, model_name: str):
+        return FakeModel(model_name)
+
+
+def test_registry_loads_each_model_once_and_reports_warm_up():
+    FakeModel.loads = 0
+    registry = ModelRegistry(FakeBackend())
+
+    threads = [threading.Thread(target=registry.get, args=("m",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    registry.warm_up("m")
+
+    assert FakeModel.loads == 1
+    assert registry.get("m").encoded
+    stats = registry.stats()["m"]
+    assert stats["backend"] == "fake"
+    assert stats["load_ms"] >= 0 and stats["warm_up_ms"] >= 0
+
+
+def test_importing_the_app_does_not_import_torch():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, main; print('torch' in sys.modules, 'sentence_transformers' in sys.modules)",
+        ],
+        capture_output=True,
+        text=True,
+        env=os.environ,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split()[-2:] == ["False", "False"]
+
+
+def test_onnx_backend_names_the_quantized_model_file():
+    assert OnnxEmbeddingBackend("models").file_name() == "onnx/model_qint8_avx2.onnx"
+    assert OnnxEmbeddingBackend("models", "none").file_name() == "onnx/model.onnx"
+    assert OnnxEmbeddingBackend("models").model_path("org/model").name == "org__model"
+    with pytest.raises(ValueError):
+        OnnxEmbeddingBackend("models", "avx9")
+
+
+def test_parity_helpers_compare_embeddings_and_rankings():
+    from script.embedding_parity import cosine_agreement, top_k, top_k_agreement
+
+    reference = np.eye(4, dtype=np.float32)
+    candidate = reference + np.float32(0.01)
+    agreement = cosine_agreement(reference, candidate)
+    assert 0.99 < agreement["min"] <= agreement["mean"] <= 1.0
+
+    expected = top_k(reference, reference, 1)
+    assert expected[:, 0].tolist() == [0, 1, 2, 3]
+    assert top_k_agreement(expected, top_k(candidate, reference, 1)) == 1.0
+    assert top_k_agreement(expected, expected[::-1]) == 0.0
@@ -0,0 +1,146 @@
+import pytest
+import numpy as np
+from pydantic import ValidationError
+from src.config.secrets import Secrets
+from src.models.query import ProductDocument
+from src.repositories import NumpyProductRepository
+
+
+def _document(id: int, embedding: list[float]) -> ProductDocument:
+    return ProductDocument(id=id, content=f"product {id}", embeddings=embedding)
+
+
+@pytest.mark.asyncio
+async def test_numpy_repository_ranks_by_cosine_similarity():
+    repo = NumpyProductRepository(initial_capacity=2)
+    await repo.index_documents(
+        [
+            _document(1, [1.0, 0.0]),
+            _document(2, [0.0, 1.0]),
+            _document(3, [1.0, 1.0]),
+        ]
+    )
+
+    results = await repo.semantic_search([2.0, 0.1], top_k=2)
+
+    assert [d.id for d in results] == [1, 3]
+
+
+@pytest.mark.asyncio
+async def test_numpy_repository_appends_incrementally_and_skips_duplicates():
+    repo = NumpyProductRepository(initial_capacity=1)
+    await repo.index_documents([_document(1, [1.0, 0.0])])
+    await repo.index_documents([_document(1, [1.0, 0.0]), _document(2, [0.0, 1.0])])
+
+    assert len(repo) == 2
+    assert [d.id for d in await repo.semantic_search([0.0, 1.0], top_k=5)] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_numpy_repository_batch_search_matches_single_search():
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(50, 8)).astype(np.float32)
+    repo = NumpyProductRepository()
+    await repo.index_documents(
+        [_document(i, v.tolist()) for i, v in enumerate(vectors)]
+    )
+
+    queries = rng.normal(size=(4, 8)).tolist()
+    batched = await repo.semantic_search_many(queries, top_k=5)
+
+    for query, results in zip(queries, batched):
+        single = await repo.semantic_search(query, top_k=5)
+        assert [d.id for d in results] == [d.id for d in single]
+
+
+@pytest.mark.asyncio
+async def test_numpy_repository_loads_an_embedding_matrix_as_is():
+    matrix = np.array([[1.0, 0.0], [0.0, 1.0], [0.6, 0.8]], dtype=np.float32)
+    repo = NumpyProductRepository()
+    repo.load_embeddings(np.array([10, 20, 30]), ["a", "b", "c"], matrix)
+
+    results = await repo.semantic_search([0.0, 1.0], top_k=2)
+
+    assert len(repo) == 3
+    assert [(d.id, d.content) for d in results] == [(20, "b"), (30, "c")]
+
+
+def test_batch_query_endpoint_returns_top_k_per_query(monkeypatch):
+    from fastapi.testclient import TestClient
+    from main import app
+    from src.config.secrets import secrets
+    from src.containers import AppContainer
+    from src.services import EmbeddingBatcher
+
+    class KeywordModel:
+        def encode(self, texts, batch_size=None, convert_to_numpy=True):
+            return np.array(
+                [[float("kettle" in t), float("mug" in t)] for t in texts],
+                dtype=np.float32,
+            )
+
+    repo = NumpyProductRepository()
+    repo.load_embeddings(
+        np.array([1, 2]),
+        ["red kettle", "blue mug"],
+        np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32),
+    )
+    container = AppContainer()
+    container.product_repo.override(repo)
+    container.embedding_batcher.override(
+        EmbeddingBatcher(KeywordModel(), executor=None, max_batch_size=8, max_wait_ms=0)
+    )
+    app.state.container = container
+    monkeypatch.setattr(secrets, "TOP_K", 1)
+    client = TestClient(app)
+
+    response = client.post("/query/batch", json={"queries": ["a mug", "kettle"]})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "results": [
+            {"query": "a mug", "products": [{"id": 2, "content": "blue mug"}]},
+            {"query": "kettle", "products": [{"id": 1, "content": "red kettle"}]},
+        ]
+    }
+    monkeypatch.setattr(secrets, "QUERY_BATCH_MAX_SIZE", 1)
+    assert client.post("/query/batch", json={"queries": ["a", "b"]}).status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_numpy_repository_appends_beside_a_read_only_matrix():
+    matrix = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+    matrix.setflags(write=False)
+    repo = NumpyProductRepository(initial_capacity=1)
+    repo.load_embeddings(np.array([10, 20]), ["a", "b"], matrix)
+
+    await repo.index_documents([_document(30, [0.6, 0.8]), _document(40, [0.8, 0.6])])
+
+    assert repo._base is matrix
+    results = await repo.semantic_search([0.0, 1.0], top_k=3)
+    assert [d.id for d in results] == [20, 30, 40]
+
+
+@pytest.mark.asyncio
+async def test_numpy_repository_returns_top_k_around_excluded_rows():
+    repo = NumpyProductRepository()
+    repo.load_embeddings(
+        np.array([-1, 20, -1, 40]),
+        ["", "b", "", "d"],
+        np.array([[1.0, 0.0], [0.6, 0.8], [0.99, 0.1], [0.0, 1.0]], dtype=np.float32),
+    )
+    repo._excluded = np.array([0, 2])
+
+    results = await repo.semantic_search([1.0, 0.0], top_k=2)
+
+    assert [d.id for d in results] == [20, 40]
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [{"RETRIEVAL_MODE": "hybrid"}, {"RETRIEVAL_BRANCHES": "vector_keyword"}],
+)
+def test_numpy_repository_refuses_keyword_retrieval_at_startup(settings):
+    with pytest.raises(ValidationError, match="PRODUCT_REPOSITORY=numpy"):
+        Secrets(PRODUCT_REPOSITORY="numpy", **settings)
+    Secrets(PRODUCT_REPOSITORY="postgres", **settings)
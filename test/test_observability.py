@@ -0,0 +1,70 @@
+from fastapi.testclient import TestClient
+from src.observability import MetricsWriter, StageTimings, Tracer
+from src.services import EmbeddingBatcher
+
+
+def test_stage_timings_report_percentiles_and_cumulative_buckets():
+    timings = StageTimings(max_samples=100)
+    for ms in range(1, 101):
+        timings.record("responder", ms / 1000)
+
+    stats = timings.stats()["responder"]
+    assert stats["count"] == 100
+    assert 50 <= stats["p50_ms"] <= 51
+    assert 99 <= stats["p99_ms"] <= 100
+
+    buckets, total, count = timings.histograms()["responder"]
+    assert dict(buckets)[0.01] == 10
+    assert dict(buckets)[0.1] == 100
+    assert count == 100 and abs(total - 5.05) < 1e-9
+
+
+def test_metrics_writer_renders_prometheus_text():
+    writer = MetricsWriter()
+    writer.counter("hits_total", "Hits.", 3, cache='a"b')
+    writer.counter("hits_total", "Hits.", 4, cache="c")
+    writer.histogram("latency_seconds", "Latency.", [(0.1, 1), (1.0, 2)], 1.5, 3)
+
+    assert writer.render().splitlines() == [
+        "# HELP hits_total Hits.",
+        "# TYPE hits_total counter",
+        'hits_total{cache="a\\"b"} 3',
+        'hits_total{cache="c"} 4',
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 1.5",
+        "latency_seconds_count 3",
+    ]
+
+
+def test_disabled_tracer_spans_are_no_ops():
+    tracer = Tracer(enabled=False)
+    with tracer.span("rag.query", user_id="u", job_id=None):
+        pass
+    assert not tracer.enabled
+
+
+def test_metrics_endpoint_exports_stage_latencies():
+    from main import app
+    from src.containers import AppContainer
+
+    container = AppContainer()
+    container.embedding_batcher.override(
+        EmbeddingBatcher(model=None, executor=None, max_batch_size=1, max_wait_ms=0)
+    )
+    container.stage_timings().record("responder", 0.2)
+    container.stage_timings().record("queue.wait", 0.01)
+    app.state.container = container
+
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'rag_stage_duration_seconds_bucket{stage="responder",le="0.25"} 1' in body
+    assert 'rag_stage_duration_seconds_count{stage="queue.wait"} 1' in body
+    assert 'rag_cache_hits_total{cache="embedding"} 0' in body
+    assert "rag_queue_depth 0" in body
@@ -1,7 +1,11 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock, AsyncMock
+from unittest.mock import AsyncMock
+import numpy as np
+from src.cache import InMemoryAnswerCache
 from src.containers import AppContainer
 from src.models.query import ProductDocument
+from src.orchestration import LangGraphOrchestrator, RetrievalFailedError
 from fastapi.testclient import TestClient
 from main import app
 
@@ -16,7 +20,7 @@ async def test_orchestrator_full_flow():
     container = AppContainer()
 
     mock_retriever = AsyncMock()
-    mock_generator = MagicMock()
+    mock_generator = AsyncMock()
     mock_callback = AsyncMock()
 
     mock_retriever.find_similar_products.return_value = [
@@ -39,7 +43,7 @@ async def test_orchestrator_full_flow():
         await orchestrator.process_query(user_id=test_user_id, query=test_query)
 
     mock_retriever.find_similar_products.assert_awaited_once_with(test_query)
-    mock_generator.generate_response.assert_called_once_with(
+    mock_generator.generate_response.assert_awaited_once_with(
         mock_retriever.find_similar_products.return_value,
         test_query,
     )
@@ -57,7 +61,7 @@ async def test_orchestrator_handles_no_retrieved_documents():
     container = AppContainer()
 
     mock_retriever = AsyncMock()
-    mock_generator = MagicMock()
+    mock_generator = AsyncMock()
     mock_callback = AsyncMock()
 
     mock_retriever.find_similar_products.return_value = []
@@ -78,12 +82,50 @@ async def test_orchestrator_handles_no_retrieved_documents():
         )
 
     mock_retriever.find_similar_products.assert_awaited_once()
-    mock_generator.generate_response.assert_called_once_with([], "a query for nothing")
+    mock_generator.generate_response.assert_awaited_once_with([], "a query for nothing")
     mock_callback.send_response.assert_awaited_once_with(
         user_id="test_user_empty",
         answer="I'm sorry, I couldn't find any relevant products.",
     )
 
+
+@pytest.mark.asyncio
+async def test_orchestrator_skips_responder_on_answer_cache_hit():
+    """
+    Tests that a query similar to a cached one, retrieving the same products,
+    reuses the cached answer instead of calling the generation service.
+    """
+    container = AppContainer()
+
+    mock_retriever = AsyncMock()
+    mock_generator = AsyncMock()
+    mock_callback = AsyncMock()
+
+    mock_retriever.find_similar_products.return_value = [
+        ProductDocument(id=1, content="mock product")
+    ]
+    mock_retriever.embed_query.return_value = np.array([1.0, 0.0])
+    mock_generator.generate_response.return_value = "This is a mock answer."
+
+    with container.retrieval_service.override(
+        mock_retriever
+    ), container.generation_service.override(
+        mock_generator
+    ), container.callback_service.override(
+        mock_callback
+    ), container.answer_cache.override(
+        InMemoryAnswerCache(max_entries=10, ttl_seconds=60, max_distance=0.05)
+    ):
+        orchestrator = container.rag_orchestrator()
+        await orchestrator.process_query(user_id="first", query="a query")
+        await orchestrator.process_query(user_id="second", query="a query!")
+
+    mock_generator.generate_response.assert_awaited_once()
+    mock_callback.send_response.assert_any_await(
+        user_id="second", answer="This is a mock answer."
+    )
+
+
 def test_query_endpoint_returns_422_on_missing_query_field():
     response = client.post("/query", json={"user_id": "user123"})
     assert response.status_code == 422
@@ -92,3 +134,135 @@ def test_query_endpoint_returns_422_on_missing_query_field():
 def test_query_endpoint_returns_422_on_missing_user_id():
     response = client.post("/query", json={"query": "some query"})
     assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_answer_query_returns_answer_without_callback():
+    """
+    Tests that the synchronous path runs retrieval and generation inline
+    and skips the callback.
+    """
+    mock_retriever = AsyncMock()
+    mock_generator = AsyncMock()
+    mock_callback = AsyncMock()
+    mock_retriever.find_similar_products.return_value = [
+        ProductDocument(id=1, content="mock product")
+    ]
+    mock_generator.generate_response.return_value = "This is a mock answer."
+
+    orchestrator = LangGraphOrchestrator(
+        retrieval_service=mock_retriever,
+        generation_service=mock_generator,
+        callback_service=mock_callback,
+    )
+    answer = await orchestrator.answer_query(user_id="sync_user", query="any query")
+
+    assert answer == "This is a mock answer."
+    mock_callback.send_response.assert_not_awaited()
+
+
+def test_sync_query_endpoint_returns_504_when_a_stage_misses_its_deadline():
+    """
+    Tests that a responder slower than its deadline is reported as 504.
+    """
+
+    async def slow_response(documents, query):
+        await asyncio.sleep(1)
+        return "too late"
+
+    mock_retriever = AsyncMock()
+    mock_retriever.find_similar_products.return_value = []
+    mock_generator = AsyncMock()
+    mock_generator.generate_response.side_effect = slow_response
+
+    container = AppContainer()
+    container.rag_orchestrator.override(
+        LangGraphOrchestrator(
+            retrieval_service=mock_retriever,
+            generation_service=mock_generator,
+            callback_service=AsyncMock(),
+            stage_deadlines={"responder": 0.01},
+        )
+    )
+    app.state.container = container
+
+    response = client.post("/query/sync", json={"user_id": "u", "query": "q"})
+
+    assert response.status_code == 504
+    assert "responder" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_retrieval_branches_run_concurrently_and_are_fused():
+    """
+    Tests that retrieval branches overlap in time, that their results are
+    merged by reciprocal-rank fusion, and that a slow branch falls back to
+    no results instead of delaying the query.
+    """
+    kettle = ProductDocument(id=1, content="kettle")
+    toaster = ProductDocument(id=2, content="toaster")
+    mug = ProductDocument(id=3, content="mug")
+
+    async def vector_search(query):
+        await asyncio.sleep(0.05)
+        return [kettle, toaster]
+
+    async def keyword_search(query):
+        await asyncio.sleep(0.05)
+        return [toaster, mug]
+
+    async def stuck_search(query):
+        await asyncio.sleep(10)
+
+    mock_retriever = AsyncMock()
+    mock_retriever.find_similar_products.side_effect = vector_search
+    keyword = AsyncMock()
+    keyword.find_similar_products.side_effect = keyword_search
+    stuck = AsyncMock()
+    stuck.find_similar_products.side_effect = stuck_search
+    mock_generator = AsyncMock()
+    mock_generator.generate_response.return_value = "answer"
+
+    orchestrator = LangGraphOrchestrator(
+        retrieval_service=mock_retriever,
+        generation_service=mock_generator,
+        callback_service=AsyncMock(),
+        retrieval_branches={"keyword": keyword, "stuck": stuck},
+        branch_timeout=0.2,
+    )
+    started = asyncio.get_running_loop().time()
+    await orchestrator.answer_query(user_id="u", query="q")
+    elapsed = asyncio.get_running_loop().time() - started
+
+    assert elapsed < 0.3
+    mock_generator.generate_response.assert_awaited_once_with([toaster, kettle], "q")
+
+
+@pytest.mark.asyncio
+async def test_query_fails_when_every_retrieval_branch_fails():
+    """
+    Tests that one failed branch degrades to the results of the others, but
+    that a query whose branches all failed raises instead of being answered
+    as if no products matched.
+    """
+    kettle = ProductDocument(id=1, content="kettle")
+    mock_retriever = AsyncMock()
+    mock_retriever.find_similar_products.side_effect = RuntimeError("db down")
+    keyword = AsyncMock()
+    keyword.find_similar_products.return_value = [kettle]
+    mock_generator = AsyncMock()
+    mock_generator.generate_response.return_value = "answer"
+
+    orchestrator = LangGraphOrchestrator(
+        retrieval_service=mock_retriever,
+        generation_service=mock_generator,
+        callback_service=AsyncMock(),
+        retrieval_branches={"keyword": keyword},
+    )
+    assert await orchestrator.answer_query(user_id="u", query="q") == "answer"
+    mock_generator.generate_response.assert_awaited_once_with([kettle], "q")
+
+    keyword.find_similar_products.side_effect = RuntimeError("db down")
+    with pytest.raises(RetrievalFailedError):
+        await orchestrator.answer_query(user_id="u", query="q")
+    mock_generator.generate_response.assert_awaited_once()
@@ -0,0 +1,123 @@
+import asyncio
+import uuid
+import pytest
+from contextlib import asynccontextmanager
+from src.models.job import Job
+from src.models.query import QueryRequest
+from src.queue.pg_job_queue import PostgresJobQueue
+
+
+class FakeConnection:
+    """Records statements and answers them with preset results."""
+
+    def __init__(self):
+        self.executed: list[tuple[str, tuple]] = []
+        self.results: list[str] = []
+        self.record = None
+
+    async def execute(self, query: str, *args):
+        self.executed.append((" ".join(query.split()), args))
+        return self.results.pop(0) if self.results else "UPDATE 1"
+
+    async def fetchrow(self, query: str, *args):
+        self.executed.append((" ".join(query.split()), args))
+        return self.record
+
+
+class FakePool:
+    def __init__(self):
+        self.conn = FakeConnection()
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+def _queue(db: FakePool, visibility_timeout: float = 30) -> PostgresJobQueue:
+    return PostgresJobQueue(
+        db,
+        capacity=10,
+        per_user_capacity=10,
+        visibility_timeout=visibility_timeout,
+        max_attempts=3,
+        poll_interval=1,
+        retention_seconds=60,
+    )
+
+
+def _job(attempts: int = 2) -> Job:
+    return Job(
+        id=str(uuid.uuid4()),
+        request=QueryRequest(user_id="u", query="q"),
+        attempts=attempts,
+    )
+
+
+@pytest.mark.asyncio
+async def test_claim_returns_the_claimed_attempt():
+    db = FakePool()
+    job_id = uuid.uuid4()
+    db.conn.record = {
+        "id": job_id,
+        "user_id": "u",
+        "query": "q",
+        "priority": 1,
+        "attempts": 2,
+        "waited_seconds": 1.5,
+    }
+
+    job = await _queue(db, visibility_timeout=30)._claim()
+
+    assert (job.id, job.attempts, job.waited_seconds) == (str(job_id), 2, 1.5)
+    assert job.request.query == "q"
+    assert db.conn.executed[0][1] == (30, 3)
+
+    db.conn.record = None
+    assert await _queue(db)._claim() is None
+
+
+@pytest.mark.asyncio
+async def test_complete_and_fail_only_update_the_running_attempt():
+    db = FakePool()
+    queue = _queue(db)
+    job = _job(attempts=2)
+
+    await queue.complete(job, "an answer")
+    db.conn.results = ["UPDATE 0"]
+    await queue.fail(job, "boom")
+
+    (complete, complete_args), (fail, fail_args) = db.conn.executed
+    assert "attempts = $2 AND status = 'running'" in complete
+    assert complete_args == (uuid.UUID(job.id), 2, "an answer")
+    assert "attempts = $4 AND status = 'running'" in fail
+    assert fail_args == (uuid.UUID(job.id), "boom", 3, 2)
+
+
+@pytest.mark.asyncio
+async def test_lease_extends_visibility_until_the_block_ends():
+    db = FakePool()
+    queue = _queue(db, visibility_timeout=0.3)
+    job = _job(attempts=1)
+
+    async with queue.lease(job):
+        await asyncio.sleep(0.25)
+    extended = len(db.conn.executed)
+    await asyncio.sleep(0.15)
+
+    assert extended == 2
+    assert len(db.conn.executed) == extended
+    query, args = db.conn.executed[0]
+    assert query.startswith("UPDATE jobs SET visible_at")
+    assert args == (uuid.UUID(job.id), 1, 0.3)
+
+
+@pytest.mark.asyncio
+async def test_lease_stops_extending_once_the_job_is_lost():
+    db = FakePool()
+    db.conn.results = ["UPDATE 0"]
+    queue = _queue(db, visibility_timeout=0.3)
+
+    async with queue.lease(_job()):
+        await asyncio.sleep(0.35)
+
+    assert len(db.conn.executed) == 1
@@ -0,0 +1,32 @@
+import struct
+import numpy as np
+import pytest
+from src.config.pgvector import (
+    decode_halfvec,
+    decode_vector,
+    encode_halfvec,
+    encode_vector,
+)
+
+
+def test_vector_codec_uses_the_pgvector_binary_layout():
+    data = encode_vector(np.array([1.0, -2.5, 0.25], dtype=np.float32))
+    assert data == struct.pack(">HHfff", 3, 0, 1.0, -2.5, 0.25)
+
+    decoded = decode_vector(data)
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, [1.0, -2.5, 0.25])
+    np.testing.assert_array_equal(decode_vector(encode_vector([0.5, 2.0])), [0.5, 2.0])
+
+
+def test_halfvec_codec_round_trips_at_half_precision():
+    embedding = np.array([0.1, -0.2, 0.3], dtype=np.float32)
+    data = encode_halfvec(embedding)
+    assert len(data) == 4 + 2 * 3
+    assert struct.unpack_from(">HH", data) == (3, 0)
+    np.testing.assert_allclose(decode_halfvec(data), embedding, atol=1e-3)
+
+
+def test_codec_rejects_matrices():
+    with pytest.raises(ValueError):
+        encode_vector(np.ones((2, 3)))
@@ -0,0 +1,178 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from fastapi.testclient import TestClient
+from src.models.query import ProductDocument, QueryRequest
+from src.orchestration import LangGraphOrchestrator
+from src.queue import FairRequestQueue
+from src.streaming import InMemoryTokenStream, TokenStreamError, TokenStreamReset
+
+
+def _stream(idle_timeout: float = 1.0):
+    return InMemoryTokenStream(max_jobs=10, ttl_seconds=60, idle_timeout=idle_timeout)
+
+
+async def _collect(iterator):
+    return [token async for token in iterator]
+
+
+@pytest.mark.asyncio
+async def test_token_stream_replays_and_follows_live_tokens():
+    stream = _stream()
+    stream.publish("job", "Hel")
+    subscriber = asyncio.create_task(_collect(stream.subscribe("job")))
+    await asyncio.sleep(0)
+
+    stream.publish("job", "lo")
+    await stream.finish("job")
+
+    assert await asyncio.wait_for(subscriber, timeout=1) == ["Hel", "lo"]
+    assert await _collect(stream.subscribe("job", offset=1)) == ["lo"]
+
+
+@pytest.mark.asyncio
+async def test_token_stream_reports_errors_and_idle_timeouts():
+    stream = _stream(idle_timeout=0.01)
+    with pytest.raises(asyncio.TimeoutError):
+        await _collect(stream.subscribe("job"))
+
+    await stream.finish("job", error="boom")
+    with pytest.raises(TokenStreamError, match="boom"):
+        await _collect(stream.subscribe("job"))
+
+
+@pytest.mark.asyncio
+async def test_token_stream_reset_voids_sent_tokens_and_restarts():
+    stream = _stream()
+    stream.publish("job", "stale")
+    subscriber = asyncio.create_task(_collect(stream.subscribe("job")))
+    await asyncio.sleep(0)
+
+    await stream.reset("job")
+    with pytest.raises(TokenStreamReset):
+        await asyncio.wait_for(subscriber, timeout=1)
+
+    stream.publish("job", "fresh")
+    await stream.finish("job")
+    assert await _collect(stream.subscribe("job")) == ["fresh"]
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_streams_tokens_and_returns_full_answer():
+    async def tokens(documents, query):
+        for token in ["Try ", "the ", "kettle."]:
+            yield token
+
+    retriever = AsyncMock()
+    retriever.find_similar_products.return_value = [
+        ProductDocument(id=1, content="kettle")
+    ]
+    generator = AsyncMock()
+    generator.stream_response = tokens
+    callback = AsyncMock()
+    stream = _stream()
+    orchestrator = LangGraphOrchestrator(
+        retrieval_service=retriever,
+        generation_service=generator,
+        callback_service=callback,
+        token_stream=stream,
+    )
+
+    answer = await orchestrator.process_query(user_id="u", query="q", job_id="job")
+
+    assert answer == "Try the kettle."
+    assert await _collect(stream.subscribe("job")) == ["Try ", "the ", "kettle."]
+    generator.generate_response.assert_not_awaited()
+    callback.send_response.assert_awaited_once_with(user_id="u", answer=answer)
+
+
+def test_stream_endpoint_sends_tokens_as_server_sent_events():
+    from main import app
+    from src.containers import AppContainer
+
+    queue = FairRequestQueue(capacity=10, per_user_capacity=10)
+    stream = _stream()
+    job_id = asyncio.run(queue.enqueue(QueryRequest(user_id="u", query="q")))
+    stream.publish(job_id, "Hi")
+    asyncio.run(stream.finish(job_id))
+
+    container = AppContainer()
+    container.request_queue.override(queue)
+    container.token_stream.override(stream)
+    app.state.container = container
+
+    response = TestClient(app).get(f"/jobs/{job_id}/stream")
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert (
+        response.text
+        == 'event: token\ndata: {"token": "Hi"}\n\nevent: done\ndata: {}\n\n'
+    )
+
+
+def test_stream_endpoint_sends_the_rest_of_the_answer_once_the_stream_expires():
+    from main import app
+    from src.containers import AppContainer
+
+    queue = FairRequestQueue(capacity=10, per_user_capacity=10)
+    stream = InMemoryTokenStream(max_jobs=10, ttl_seconds=0.05, idle_timeout=0.02)
+    job_id = asyncio.run(queue.enqueue(QueryRequest(user_id="u", query="q")))
+    job = asyncio.run(queue.dequeue())
+    asyncio.run(queue.complete(job, "Hello"))
+    # The stream stopped after the first token, and expires while followed.
+    stream.publish(job_id, "Hel")
+
+    container = AppContainer()
+    container.request_queue.override(queue)
+    container.token_stream.override(stream)
+    app.state.container = container
+
+    response = TestClient(app).get(f"/jobs/{job_id}/stream")
+
+    events = [e for e in response.text.split("\n\n") if e.startswith("event")]
+    assert events == [
+        'event: token\ndata: {"token": "Hel"}',
+        'event: token\ndata: {"token": "lo"}',
+        "event: done\ndata: {}",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_only_ends_the_stream_when_the_last_attempt_fails():
+    attempts = []
+
+    async def tokens(documents, query):
+        attempts.append(query)
+        yield f"attempt {len(attempts)}"
+        if (query == "flaky" and len(attempts) == 1) or query == "broken":
+            raise RuntimeError("model overloaded")
+
+    retriever = AsyncMock()
+    retriever.find_similar_products.return_value = [
+        ProductDocument(id=1, content="kettle")
+    ]
+    generator = AsyncMock()
+    generator.stream_response = tokens
+    stream = _stream()
+    orchestrator = LangGraphOrchestrator(
+        retrieval_service=retriever,
+        generation_service=generator,
+        callback_service=AsyncMock(),
+        token_stream=stream,
+    )
+
+    with pytest.raises(RuntimeError):
+        await orchestrator.process_query(
+            user_id="u", query="flaky", job_id="retried", attempt=1, max_attempts=2
+        )
+    await orchestrator.process_query(
+        user_id="u", query="flaky", job_id="retried", attempt=2, max_attempts=2
+    )
+    assert await _collect(stream.subscribe("retried")) == ["attempt 2"]
+
+    with pytest.raises(RuntimeError):
+        await orchestrator.process_query(
+            user_id="u", query="broken", job_id="failed", attempt=2, max_attempts=2
+        )
+    with pytest.raises(TokenStreamError, match="model overloaded"):
+        await _collect(stream.subscribe("failed"))
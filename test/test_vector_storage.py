@@ -0,0 +1,35 @@
+import pytest
+from src.config import db
+from src.repositories import PostgresProductRepository
+from src.repositories.vector_storage import (
+    candidates_source,
+    coarse_distance,
+    index_expression,
+)
+
+
+@pytest.mark.parametrize("storage", ["halfvec", "binary"])
+def test_compact_search_orders_by_the_indexed_expression(storage):
+    expression, _ = index_expression(storage, 384)
+    # The planner only uses the index if the ORDER BY repeats its expression.
+    assert coarse_distance(storage, 384, "$1").startswith(expression.strip("()"))
+
+    source = candidates_source(storage, 384, "$2", 40)
+    assert f"ORDER BY {coarse_distance(storage, 384, '$1')}" in source
+    assert "LIMIT greatest($2, 40)" in source
+
+
+def test_full_storage_searches_the_table():
+    assert index_expression("full", 384) == ("embedding", "vector_cosine_ops")
+    assert candidates_source("full", 384, "$2", 40) == "products"
+    with pytest.raises(ValueError):
+        PostgresProductRepository(db=None, storage="int4")
+
+
+def test_compact_storage_raises_ef_search_to_the_candidates(monkeypatch):
+    monkeypatch.setattr(db.secrets, "HNSW_EF_SEARCH", 20)
+    monkeypatch.setattr(db.secrets, "RERANK_CANDIDATES", 100)
+    assert db.vector_search_settings()["hnsw.ef_search"] == "20"
+
+    monkeypatch.setattr(db.secrets, "VECTOR_STORAGE", "binary")
+    assert db.vector_search_settings()["hnsw.ef_search"] == "100"
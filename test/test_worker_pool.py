@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from src.models.query import ProductDocument, QueryRequest
+from src.orchestration import LangGraphOrchestrator
+from src.queue import FairRequestQueue
+from src.workers import WorkerPool
+
+
+class SlowOrchestrator:
+    """Fake orchestrator that records how many queries overlap."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.processed: list[str] = []
+
+    async def process_query(
+        self,
+        user_id: str,
+        query: str,
+        job_id: str,
+        attempt: int = 1,
+        max_attempts: int = 1,
+    ):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        self.processed.append(user_id)
+        return f"answer for {user_id}"
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_processes_requests_concurrently():
+    queue = FairRequestQueue(capacity=100, per_user_capacity=10)
+    orchestrator = SlowOrchestrator(delay=0.05)
+    pool = WorkerPool(orchestrator, queue, concurrency=4, shutdown_timeout=5)
+
+    job_ids = [
+        await queue.enqueue(QueryRequest(user_id=str(i), query="q")) for i in range(8)
+    ]
+
+    pool.start()
+    await asyncio.wait_for(queue.drain(), timeout=1)
+    await pool.stop()
+
+    assert orchestrator.peak == 4
+    assert sorted(orchestrator.processed) == [str(i) for i in range(8)]
+    status = await queue.get_status(job_ids[0])
+    assert (status.status, status.answer) == ("done", "answer for 0")
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_drains_queue_on_stop_and_survives_failures():
+    queue = FairRequestQueue(capacity=100, per_user_capacity=10)
+    orchestrator = AsyncMock()
+    orchestrator.process_query.side_effect = [RuntimeError("boom"), "a", "b"]
+    pool = WorkerPool(orchestrator, queue, concurrency=2, shutdown_timeout=5)
+    pool.start()
+
+    job_ids = [
+        await queue.enqueue(QueryRequest(user_id=str(i), query="q")) for i in range(3)
+    ]
+    await pool.stop()
+
+    assert orchestrator.process_query.await_count == 3
+    assert queue.qsize() == 0
+    assert pool.in_flight == 0
+    failed = await queue.get_status(job_ids[0])
+    assert (failed.status, failed.error) == ("failed", "boom")
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_retries_recording_answers_and_keeps_consuming(
+    monkeypatch,
+):
+    monkeypatch.setattr("src.workers.pool.DEQUEUE_RETRY_SECONDS", 0)
+    queue = FairRequestQueue(capacity=100, per_user_capacity=10)
+    complete = queue.complete
+
+    async def flaky_complete(job, answer=None):
+        if not flaky_complete.failed:
+            flaky_complete.failed = True
+            raise ConnectionError("db down")
+        await complete(job, answer)
+
+    flaky_complete.failed = False
+    queue.complete = flaky_complete
+    orchestrator = SlowOrchestrator(delay=0)
+    pool = WorkerPool(orchestrator, queue, concurrency=1, shutdown_timeout=5)
+    pool.start()
+
+    job_ids = [
+        await queue.enqueue(QueryRequest(user_id=str(i), query="q")) for i in range(2)
+    ]
+    await pool.stop()
+
+    assert orchestrator.processed == ["0", "1"]
+    for job_id in job_ids:
+        assert (await queue.get_status(job_id)).status == "done"
+
+
+@pytest.mark.asyncio
+async def test_orchestrator_bounds_in_flight_requests_per_stage():
+    active = 0
+    peak = 0
+
+    async def slow_search(query):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+        return [ProductDocument(id=1, content="mock product")]
+
+    retriever = AsyncMock()
+    retriever.find_similar_products.side_effect = slow_search
+    generator = AsyncMock()
+    generator.generate_response.return_value = "answer"
+
+    orchestrator = LangGraphOrchestrator(
+        retrieval_service=retriever,
+        generation_service=generator,
+        callback_service=AsyncMock(),
+        stage_limits={"retriever": 2},
+    )
+    await asyncio.gather(
+        *(orchestrator.process_query(user_id=str(i), query="q") for i in range(6))
+    )
+
+    assert peak == 2
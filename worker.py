@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import signal
+import asyncpg
+
+from src.config.db import get_db_pool, vector_search_settings
+from src.config.pgvector import register_vector_codecs
+from src.config.http import create_http_client, get_http_client
+from src.config.secrets import secrets
+from src.containers import AppContainer
+from src.config.logger import setup_logging
+from src.config import db, http
+
+setup_logging()
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker():
+    """
+    Runs a standalone worker process that consumes the durable job queue.
+    The API is expected to have initialized the database. Stops gracefully
+    on SIGINT or SIGTERM.
+    """
+    if secrets.QUEUE_BACKEND != "postgres":
+        raise RuntimeError(
+            "Standalone workers need a shared queue; set QUEUE_BACKEND=postgres."
+        )
+
+    logger.info("Worker startup...")
+    db.db_pool = await asyncpg.create_pool(
+        dsn=secrets.DATABASE_URL,
+        min_size=2,
+        max_size=secrets.WORKER_CONCURRENCY + 2,
+        server_settings=vector_search_settings(),
+        init=register_vector_codecs,
+    )
+    http.http_client = create_http_client()
+
+    container = AppContainer()
+    container.db_pool.override(get_db_pool())
+    container.http_client.override(get_http_client())
+    await container.product_repo().initialize()
+    token_stream = container.token_stream()
+    if token_stream is not None:
+        await token_stream.initialize()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    if secrets.EMBEDDING_WARM_UP:
+        await asyncio.to_thread(
+            container.model_registry().warm_up, secrets.EMBEDDING_MODEL_NAME
+        )
+    worker_pool = container.worker_pool()
+    worker_pool.start()
+    await stop.wait()
+
+    logger.info("Worker shutdown...")
+    await worker_pool.stop()
+    await container.request_queue().close()
+    if token_stream is not None:
+        await token_stream.close()
+    await container.callback_service().drain()
+    await http.http_client.aclose()
+    container.shutdown_resources()
+    await db.db_pool.close()
+    logger.info("Worker stopped.")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())